@@ -7,7 +7,7 @@ import time
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "sharp-render-splat-transform"))
 
-from pythonRun import SplatTransform
+from pythonRun import QUALITY_TIERS, SplatTransform, normalize_scenes, parse_scene_list
 
 try:
     import folder_paths
@@ -25,20 +25,42 @@ class SharpPLYToHTML:
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "ply_path": ("STRING", {
-                    "forceInput": True,
-                    "tooltip": "Path to PLY file generated by SharpPredict"
-                }),
                 "output_prefix": ("STRING", {
                     "default": "splat_html",
                     "tooltip": "Prefix for output HTML file name"
                 }),
             },
             "optional": {
+                "ply_path": ("STRING", {
+                    "forceInput": True,
+                    "tooltip": "Path to PLY file generated by SharpPredict"
+                }),
+                "splat": ("SPLAT", {
+                    "tooltip": "In-memory splat data, piped to the viewer generator without a temp file (use instead of ply_path)"
+                }),
                 "custom_output_dir": ("STRING", {
                     "default": "",
                     "tooltip": "Custom output directory (empty to use ComfyUI output directory)"
                 }),
+                "extra_scenes": ("STRING", {
+                    "default": "",
+                    "multiline": True,
+                    "tooltip": "Additional PLY scenes combined into the same viewer, one per line: path; translate=x,y,z; rotate=x,y,z; scale=s"
+                }),
+                "quality": (list(QUALITY_TIERS), {
+                    "default": "standard",
+                    "tooltip": "Encoding tier. preview: fewer k-means iterations, SH bands <= 1 and lossy WebP for fast, small previews; archival: more k-means iterations"
+                }),
+                "priority": ("INT", {
+                    "default": 0,
+                    "min": -100,
+                    "max": 100,
+                    "tooltip": "Scheduling priority. When jobs queue for memory or CPU, higher runs first; waiting raises priority by one level per minute"
+                }),
+                "client": ("STRING", {
+                    "default": "",
+                    "tooltip": "Submitter name. Queued jobs of different clients take turns, so one client's batch doesn't crowd out others"
+                }),
             }
         }
 
@@ -49,20 +71,32 @@ class SharpPLYToHTML:
     OUTPUT_NODE = True
     DESCRIPTION = "Render PLY file from SharpPredict to HTML."
 
-    def render_ply_to_html(self, ply_path: str, output_prefix: str = "splat_html", custom_output_dir: str = ""):
+    def render_ply_to_html(self, output_prefix: str = "splat_html", ply_path: str = "", splat=None,
+                           custom_output_dir: str = "", extra_scenes: str = "", quality: str = "standard",
+                           priority: int = 0, client: str = ""):
         """
         Render PLY file to HTML viewer.
         
         Args:
-            ply_path: Path to input PLY file
             output_prefix: Prefix for output HTML file name
+            ply_path: Path to input PLY file
+            splat: In-memory splat data, used instead of ply_path
             custom_output_dir: Custom output directory (empty to use ComfyUI output directory)
+            extra_scenes: Additional scenes, one per line (path; translate=x,y,z; rotate=x,y,z; scale=s)
+            quality: Encoding tier (preview, standard or archival)
+            priority: Scheduling priority, higher runs first when jobs are queued
+            client: Submitter name, so one client's jobs don't crowd out others
             
         Returns:
             Path to generated HTML file
         """
-        if not os.path.exists(ply_path):
-            raise FileNotFoundError(f"PLY file not found: {ply_path}")
+        if (splat is None) == (not ply_path):
+            raise ValueError("Connect exactly one of ply_path or splat")
+        
+        scenes = normalize_scenes([splat if splat is not None else ply_path, *parse_scene_list(extra_scenes)])
+        for scene in scenes:
+            if "path" in scene and not os.path.exists(scene["path"]):
+                raise FileNotFoundError(f"PLY file not found: {scene['path']}")
         
         timestamp = int(time.time())
         
@@ -79,9 +113,12 @@ class SharpPLYToHTML:
         try:
             splat = SplatTransform()
             html_path = splat.generate_html_viewer(
-                input_ply=ply_path,
+                input_ply=scenes,
                 output_html=output_html,
-                quiet=False
+                quality=quality,
+                quiet=False,
+                priority=priority,
+                client=client
             )
             
             if not os.path.exists(html_path):
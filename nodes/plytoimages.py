@@ -11,7 +11,8 @@ import shutil
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "sharp-render-splat-transform"))
 
-from pythonRun import SplatTransform
+from pythonRun import SplatTransform, parse_scene_list
+from sharp_render_distributed import RenderCoordinator
 
 
 class SharpPLYToImages:
@@ -23,10 +24,6 @@ class SharpPLYToImages:
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "ply_path": ("STRING", {
-                    "forceInput": True,
-                    "tooltip": "Path to PLY file generated by SharpPredict"
-                }),
                 "width": ("INT", {
                     "default": 1536,
                     "min": 64,
@@ -64,6 +61,13 @@ class SharpPLYToImages:
                 }),
             },
             "optional": {
+                "ply_path": ("STRING", {
+                    "forceInput": True,
+                    "tooltip": "Path to PLY file generated by SharpPredict"
+                }),
+                "splat": ("SPLAT", {
+                    "tooltip": "In-memory splat data, piped to the renderer without a temp file (use instead of ply_path)"
+                }),
                 "target_x": ("FLOAT", {
                     "default": 0.0,
                     "step": 0.1,
@@ -86,6 +90,29 @@ class SharpPLYToImages:
                     "step": 1.0,
                     "tooltip": "Swing angle range in degrees (e.g., 14 means -7 to 7)"
                 }),
+                "frustum_cull": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "Skip splats that are outside every frame or too small to see before encoding"
+                }),
+                "extra_scenes": ("STRING", {
+                    "default": "",
+                    "multiline": True,
+                    "tooltip": "Additional PLY scenes composited into the same frames, one per line: path; translate=x,y,z; rotate=x,y,z; scale=s"
+                }),
+                "render_workers": ("STRING", {
+                    "default": "",
+                    "tooltip": "Comma separated render worker URLs (python sharp_render_distributed.py worker, token from SHARP_RENDER_TOKEN). Frames are split across them instead of rendering locally"
+                }),
+                "priority": ("INT", {
+                    "default": 0,
+                    "min": -100,
+                    "max": 100,
+                    "tooltip": "Scheduling priority. When jobs queue for memory or CPU, higher runs first; waiting raises priority by one level per minute"
+                }),
+                "client": ("STRING", {
+                    "default": "",
+                    "tooltip": "Submitter name. Queued jobs of different clients take turns, so one client's batch doesn't crowd out others"
+                }),
             }
         }
 
@@ -96,33 +123,42 @@ class SharpPLYToImages:
     OUTPUT_NODE = True
     DESCRIPTION = "Render PLY file from SharpPredict to IMAGE using orbit-render tool."
 
-    def render(self, ply_path: str, width=1536, height=1536, fov=40.0, frames=1, radius=2.0,
-               target_x=0.0, target_y=0.0, target_z=1.0, swing_angle=14.0):
+    def render(self, width=1536, height=1536, fov=40.0, frames=1, radius=2.0, ply_path: str = "", splat=None,
+               target_x=0.0, target_y=0.0, target_z=1.0, swing_angle=14.0, frustum_cull=True,
+               extra_scenes="", render_workers="", priority=0, client=""):
         """
         Render PLY file to images using orbit-render.
         
         Args:
-            ply_path: Path to input PLY file
             width: Image width in pixels
             height: Image height in pixels
             fov: Field of view in degrees
             frames: Number of frames to render
             radius: Camera orbit radius
+            ply_path: Path to input PLY file
+            splat: In-memory splat data, used instead of ply_path
             target_x: Camera target X position
             target_y: Camera target Y position
             target_z: Camera target Z position
             swing_angle: Swing angle range in degrees (e.g., 14 means -7 to 7)
+            frustum_cull: Skip splats outside every frame or too small to see
+            extra_scenes: Additional scenes, one per line (path; translate=x,y,z; rotate=x,y,z; scale=s)
+            render_workers: Comma separated worker URLs to shard the frames across
+            priority: Scheduling priority, higher runs first when jobs are queued
+            client: Submitter name, so one client's jobs don't crowd out others
             
         Returns:
             ComfyUI IMAGE tensor: (B, H, W, C) float32 0-1
         """
+        if (splat is None) == (not ply_path):
+            raise ValueError("Connect exactly one of ply_path or splat")
+        scenes = [splat if splat is not None else ply_path, *parse_scene_list(extra_scenes)]
+        
         temp_dir = tempfile.mkdtemp(prefix="comfyui_splat_")
         
         try:
-            splat = SplatTransform()
-            
-            frame_files = splat.render_orbit(
-                input_ply=ply_path,
+            render_args = dict(
+                input_ply=scenes,
                 output_dir=temp_dir,
                 frames=frames,
                 radius=radius,
@@ -131,9 +167,17 @@ class SharpPLYToImages:
                 height=height,
                 target=(target_x, target_y, target_z),
                 swing_angle=swing_angle,
-                quiet=True
+                cull=frustum_cull,
+                priority=priority,
+                client=client
             )
             
+            workers = [url for url in render_workers.split(",") if url.strip()]
+            if workers:
+                frame_files = RenderCoordinator(workers).render_orbit(**render_args)
+            else:
+                frame_files = SplatTransform().render_orbit(**render_args, quiet=True)
+            
             if not frame_files:
                 raise RuntimeError("No frames were generated")
             
@@ -0,0 +1,121 @@
+"""SharpLoadSplat / SharpSaveSplat nodes for ComfyUI-Sharp."""
+
+import os
+import sys
+from pathlib import Path
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "sharp-render-splat-transform"))
+
+from sharp_render_splat_data import SplatData
+
+try:
+    import folder_paths
+    OUTPUT_DIR = folder_paths.get_output_directory()
+except ImportError:
+    OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "output")
+
+
+class SharpLoadSplat:
+    """
+    Load a PLY file into an in-memory SPLAT.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "ply_path": ("STRING", {
+                    "forceInput": True,
+                    "tooltip": "Path to PLY file generated by SharpPredict"
+                }),
+            }
+        }
+
+    RETURN_TYPES = ("SPLAT", )
+    RETURN_NAMES = ("splat", )
+    FUNCTION = "load"
+    CATEGORY = "SHARP"
+    DESCRIPTION = "Load a PLY file into columnar splat data that render and HTML nodes accept without temp files."
+
+    def load(self, ply_path: str):
+        """
+        Load PLY file into memory.
+
+        Args:
+            ply_path: Path to input PLY file
+
+        Returns:
+            SplatData with one NumPy array per vertex property
+        """
+        if not os.path.exists(ply_path):
+            raise FileNotFoundError(f"PLY file not found: {ply_path}")
+
+        splat = SplatData.from_ply(ply_path)
+        print(f"Loaded {splat}: {ply_path}")
+        return (splat, )
+
+
+class SharpSaveSplat:
+    """
+    Save an in-memory SPLAT to a PLY file.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "splat": ("SPLAT", {
+                    "tooltip": "Splat data to save"
+                }),
+                "output_prefix": ("STRING", {
+                    "default": "splat",
+                    "tooltip": "Prefix for output PLY file name"
+                }),
+            },
+            "optional": {
+                "custom_output_dir": ("STRING", {
+                    "default": "",
+                    "tooltip": "Custom output directory (empty to use ComfyUI output directory)"
+                }),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", )
+    RETURN_NAMES = ("ply_path", )
+    FUNCTION = "save"
+    CATEGORY = "SHARP"
+    OUTPUT_NODE = True
+    DESCRIPTION = "Save splat data to a binary PLY file."
+
+    def save(self, splat: SplatData, output_prefix: str = "splat", custom_output_dir: str = ""):
+        """
+        Save splat data to PLY file.
+
+        Args:
+            splat: Splat data to save
+            output_prefix: Prefix for output PLY file name
+            custom_output_dir: Custom output directory (empty to use ComfyUI output directory)
+
+        Returns:
+            Path to saved PLY file
+        """
+        output_dir = custom_output_dir or OUTPUT_DIR
+        os.makedirs(output_dir, exist_ok=True)
+
+        timestamp = int(time.time())
+        ply_path = splat.save_ply(os.path.join(output_dir, f"{output_prefix}_{timestamp}.ply"))
+        print(f"Saved {splat}: {ply_path}")
+        return (ply_path, )
+
+
+# Node mappings for ComfyUI
+NODE_CLASS_MAPPINGS = {
+    "SharpLoadSplat": SharpLoadSplat,
+    "SharpSaveSplat": SharpSaveSplat
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "SharpLoadSplat": "Sharp Load Splat",
+    "SharpSaveSplat": "Sharp Save Splat"
+}
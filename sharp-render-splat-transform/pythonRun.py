@@ -2,13 +2,183 @@ import subprocess
 import os
 import sys
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Any, Dict, Optional, List, Sequence, Tuple, Union
 import shutil
 
+from sharp_render_scheduler import JobScheduler, count_scene_splats, estimate_html_cost, estimate_render_cost, get_scheduler
+
+
+# A scene is a PLY path, an in-memory SplatData, or a dict with a "path" (or
+# "splat") key and optional "translate" (x, y, z), "rotate" (x, y, z Euler
+# degrees) and "scale" entries
+SceneSpec = Union[str, Dict[str, Any], Any]
+
+# SOG encoding tiers understood by splat-transform --quality
+QUALITY_TIERS = ("preview", "standard", "archival")
+
+
+def is_splat_data(value: Any) -> bool:
+    """Check whether a value is in-memory splat data (anything that serializes to PLY bytes)"""
+    return callable(getattr(value, "to_ply_bytes", None))
+
+
+def normalize_scenes(input_ply: Union[SceneSpec, Sequence[SceneSpec]]) -> List[Dict[str, Any]]:
+    """
+    Normalize a single PLY path, SplatData or a list of scene specs into a list of scene dicts
+    
+    Args:
+        input_ply: PLY path, SplatData, scene dict, or list of any of these
+        
+    Returns:
+        List of scene dicts, each with either a "path" or a "splat" key
+    """
+    if isinstance(input_ply, (str, os.PathLike, dict)) or is_splat_data(input_ply):
+        input_ply = [input_ply]
+    
+    scenes = []
+    for spec in input_ply:
+        if isinstance(spec, dict):
+            scene = dict(spec)
+        elif is_splat_data(spec):
+            scene = {"splat": spec}
+        else:
+            scene = {"path": spec}
+        
+        if "splat" in scene:
+            if not is_splat_data(scene["splat"]):
+                raise ValueError(f"Scene 'splat' entry is not splat data: {scene['splat']!r}")
+        elif "path" in scene:
+            scene["path"] = str(scene["path"])
+        else:
+            raise ValueError(f"Scene is missing a 'path' entry: {spec}")
+        scenes.append(scene)
+    
+    if not scenes:
+        raise ValueError("At least one input scene is required")
+    if sum("splat" in scene for scene in scenes) > 1:
+        raise ValueError("Only one in-memory splat scene can be passed per call")
+    return scenes
+
+
+def scene_cli_args(scenes: List[Dict[str, Any]]) -> List[str]:
+    """
+    Build the per-scene command line arguments shared by splat-transform and orbit-render
+    
+    Each scene becomes its absolute path followed by its transform options, which
+    both tools apply to the preceding input before compositing all inputs in memory.
+    An in-memory splat scene becomes "-", which both tools read from stdin.
+    
+    Args:
+        scenes: Normalized scene dicts
+        
+    Returns:
+        List of command line arguments
+    """
+    args = []
+    for scene in scenes:
+        args.append("-" if "splat" in scene else str(Path(scene["path"]).resolve()))
+        # the "=" form keeps negative values from being parsed as options
+        if scene.get("translate") is not None:
+            args.append("--translate=" + ",".join(str(float(v)) for v in scene["translate"]))
+        if scene.get("rotate") is not None:
+            args.append("--rotate=" + ",".join(str(float(v)) for v in scene["rotate"]))
+        if scene.get("scale") is not None:
+            args.append(f"--scale={float(scene['scale'])}")
+    return args
+
+
+def scene_stdin_data(scenes: List[Dict[str, Any]]) -> Optional[bytes]:
+    """
+    Serialize the in-memory splat scene, if any, for piping to the Node tools
+    
+    Args:
+        scenes: Normalized scene dicts
+        
+    Returns:
+        Binary PLY data, or None when every scene is a file
+    """
+    for scene in scenes:
+        if "splat" in scene:
+            return scene["splat"].to_ply_bytes()
+    return None
+
+
+def run_node_command(cmd: List[str], cwd: str, timeout: int, stdin_data: Optional[bytes] = None) -> subprocess.CompletedProcess:
+    """
+    Run a Node.js tool, capturing its output as text
+    
+    Args:
+        cmd: Command line
+        cwd: Working directory
+        timeout: Timeout in seconds
+        stdin_data: Binary data written to the tool's stdin, e.g. PLY data for a "-" input
+        
+    Returns:
+        Completed process with decoded stdout and stderr
+    """
+    result = subprocess.run(
+        cmd,
+        input=stdin_data,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        env=os.environ.copy(),
+        timeout=timeout
+    )
+    result.stdout = result.stdout.decode("utf-8", errors="replace")
+    result.stderr = result.stderr.decode("utf-8", errors="replace")
+    return result
+
+
+def parse_scene_list(text: str) -> List[Dict[str, Any]]:
+    """
+    Parse a multi-line scene list, one scene per line
+    
+    Each line has the form "path; translate=x,y,z; rotate=x,y,z; scale=s" where
+    every transform entry is optional. Empty lines and lines starting with # are skipped.
+    
+    Args:
+        text: Scene list text
+        
+    Returns:
+        List of scene dicts
+    """
+    scenes = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        
+        parts = [p.strip() for p in line.split(";")]
+        scene: Dict[str, Any] = {"path": parts[0]}
+        for part in parts[1:]:
+            if not part:
+                continue
+            key, _, value = part.partition("=")
+            key = key.strip().lower()
+            if key in ("translate", "rotate"):
+                vec = tuple(float(v) for v in value.split(","))
+                if len(vec) != 3:
+                    raise ValueError(f"Invalid {key} value in scene list: {part}")
+                scene[key] = vec
+            elif key == "scale":
+                scene[key] = float(value)
+            else:
+                raise ValueError(f"Unknown scene option in scene list: {part}")
+        scenes.append(scene)
+    return scenes
+
 
 class SplatTransform:
-    def __init__(self, project_path: str = None):
+    def __init__(self, project_path: str = None, scheduler: Optional[JobScheduler] = None):
+        """
+        Args:
+            project_path: splat-transform project directory (defaults to this directory)
+            scheduler: Admits render and HTML jobs against memory and CPU budgets. Defaults
+                to the process-wide scheduler shared by all instances
+        """
         self.project_path = Path(project_path) if project_path else Path(__file__).parent
+        self.scheduler = scheduler or get_scheduler()
         self.orbit_render_dir = self.project_path / "tools" / "orbit-render"
         self.dist_dir = self.project_path / "dist"
         self._check_nodejs()
@@ -154,7 +324,7 @@ class SplatTransform:
         
     def render_orbit(
         self,
-        input_ply: str,
+        input_ply: Union[SceneSpec, Sequence[SceneSpec]],
         output_dir: str,
         frames: int = 36,
         radius: float = 2.0,
@@ -163,14 +333,22 @@ class SplatTransform:
         height: int = 1080,
         target: Tuple[float, float, float] = (0, 0, 1),
         swing_angle: float = 30.0,
+        cull: bool = True,
+        cull_min_size: float = 0.5,
+        frame_range: Optional[Tuple[int, int]] = None,
+        bake_harmonics: bool = True,
         cleanup: bool = False,
-        quiet: bool = False
+        quiet: bool = False,
+        priority: int = 0,
+        client: str = ""
     ) -> List[str]:
         """
-        Render orbit sequence from PLY file
+        Render orbit sequence from one or more PLY files
         
         Args:
-            input_ply: Path to input PLY file
+            input_ply: Path to input PLY file, SplatData, or a list of scenes (paths, SplatData
+                or dicts with "path"/"splat" and optional "translate", "rotate", "scale")
+                composited into one frame set. SplatData is piped to the tool as binary PLY
             output_dir: Output directory for frames
             frames: Number of frames to render
             radius: Camera orbit radius
@@ -179,19 +357,27 @@ class SplatTransform:
             height: Image height in pixels
             target: Camera target point (x, y, z)
             swing_angle: Swing angle range in degrees (e.g., 30 means -15 to 15)
+            cull: Only encode and render splats visible from at least one frame
+            cull_min_size: Cull splats whose projected size is below this many pixels in every frame
+            frame_range: Render only frames start to end - 1 of the orbit, keeping their frame
+                numbers (default: all frames)
+            bake_harmonics: Refit spherical harmonics to the fewest bands that reproduce the
+                color seen along the orbit (keeping all bands when none is accurate enough)
             cleanup: Clean up temporary files after rendering
             quiet: Suppress non-error output
+            priority: Scheduling priority, higher runs first when jobs are queued
+            client: Submitter name, so one client's jobs don't crowd out others
             
         Returns:
             List of generated frame file paths
         """
-        input_ply_abs = str(Path(input_ply).resolve())
+        scenes = normalize_scenes(input_ply)
         output_dir_abs = str(Path(output_dir).resolve())
         
         cmd = [
             "node",
             str(self.orbit_render_dir.resolve() / "index.mjs"),
-            input_ply_abs,
+            *scene_cli_args(scenes),
             "-o", output_dir_abs,
             "--frames", str(frames),
             "--radius", str(radius),
@@ -199,9 +385,16 @@ class SplatTransform:
             "--width", str(width),
             "--img-height", str(height),
             "--target", f"{target[0]},{target[1]},{target[2]}",
-            "--swing-angle", str(swing_angle)
+            "--swing-angle", str(swing_angle),
+            "--cull-min-size", str(cull_min_size)
         ]
         
+        if frame_range is not None:
+            cmd.extend(["--frame-range", f"{frame_range[0]},{frame_range[1]}"])
+        if not cull:
+            cmd.append("--disable-cull")
+        if not bake_harmonics:
+            cmd.append("--disable-sh-bake")
         if cleanup:
             cmd.append("--cleanup")
         if quiet:
@@ -210,19 +403,17 @@ class SplatTransform:
         print(f"Running command: {' '.join(cmd)}")
         print(f"Working directory: {str(self.orbit_render_dir.resolve())}")
         
-        # Get current environment and ensure PATH is preserved
-        env = os.environ.copy()
+        rendered_frames = frame_range[1] - frame_range[0] if frame_range is not None else frames
+        cost = estimate_render_cost(count_scene_splats(scenes), width, height, rendered_frames)
         
         try:
-            result = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=str(self.orbit_render_dir.resolve()),
-                env=env,
-                timeout=300  # 5 minutes timeout for rendering
-            )
+            with self.scheduler.reserve(cost, priority=priority, client=client, name=f"orbit render {output_dir_abs}"):
+                result = run_node_command(
+                    cmd,
+                    cwd=str(self.orbit_render_dir.resolve()),
+                    timeout=300,  # 5 minutes timeout for rendering
+                    stdin_data=scene_stdin_data(scenes)
+                )
             
             if result.returncode != 0:
                 print(f"Command failed with return code: {result.returncode}")
@@ -249,54 +440,68 @@ class SplatTransform:
     
     def generate_html_viewer(
         self,
-        input_ply: str,
+        input_ply: Union[SceneSpec, Sequence[SceneSpec]],
         output_html: str,
         width: int = 1920,
         height: int = 1080,
-        quiet: bool = False
+        threads: int = 0,
+        quality: str = "standard",
+        quiet: bool = False,
+        priority: int = 0,
+        client: str = ""
     ) -> str:
         """
-        Generate HTML viewer from PLY file
+        Generate HTML viewer from one or more PLY files
         
         Args:
-            input_ply: Path to input PLY file
+            input_ply: Path to input PLY file, SplatData, or a list of scenes (paths, SplatData
+                or dicts with "path"/"splat" and optional "translate", "rotate", "scale")
+                combined into one viewer. SplatData is piped to the tool as binary PLY
             output_html: Output HTML file path
             width: Viewer width in pixels
             height: Viewer height in pixels
+            threads: Worker threads for SOG compression (0 = one per CPU core)
+            quality: Encoding tier: "preview" (fewer k-means iterations, SH bands <= 1,
+                lossy WebP), "standard" or "archival" (more k-means iterations). The
+                size and error summary is part of the printed output
             quiet: Suppress non-error output
+            priority: Scheduling priority, higher runs first when jobs are queued
+            client: Submitter name, so one client's jobs don't crowd out others
             
         Returns:
             Path to generated HTML file
         """
-        input_ply_abs = str(Path(input_ply).resolve())
+        if quality not in QUALITY_TIERS:
+            raise ValueError(f"Invalid quality: {quality}. Must be one of {', '.join(QUALITY_TIERS)}")
+        
+        scenes = normalize_scenes(input_ply)
         output_html_abs = str(Path(output_html).resolve())
         
         cmd = [
             "node",
             str(self.project_path.resolve() / "bin" / "cli.mjs"),
             "-w",  # Overwrite if file exists
-            input_ply_abs,
+            *scene_cli_args(scenes),
             output_html_abs,
             "--width", str(width),
-            "--height", str(height)
+            "--height", str(height),
+            "--threads", str(threads),
+            "--quality", quality
         ]
         
         print(f"Running command: {' '.join(cmd)}")
         print(f"Working directory: {str(self.project_path.resolve())}")
         
-        # Get current environment and ensure PATH is preserved
-        env = os.environ.copy()
+        cost = estimate_html_cost(count_scene_splats(scenes), threads)
         
         try:
-            result = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=str(self.project_path.resolve()),
-                env=env,
-                timeout=120  # Add timeout to prevent hanging
-            )
+            with self.scheduler.reserve(cost, priority=priority, client=client, name=f"HTML viewer {output_html_abs}"):
+                result = run_node_command(
+                    cmd,
+                    cwd=str(self.project_path.resolve()),
+                    timeout=120,  # Add timeout to prevent hanging
+                    stdin_data=scene_stdin_data(scenes)
+                )
             
             if result.returncode != 0:
                 print(f"Command failed with return code: {result.returncode}")
@@ -405,6 +610,7 @@ def main():
         print("  --width W           Image width (default: 1920)")
         print("  --height H          Image height (default: 1080)")
         print("  --target X,Y,Z      Target point (default: 0,0,1)")
+        print("  --scene SPEC        Composite another scene: \"path;translate=x,y,z;rotate=x,y,z;scale=s\"")
         print("  --grayscale         Convert to grayscale")
         print("  --comfyui DIR       Prepare for ComfyUI (output directory)")
         print("  --cleanup           Clean up temporary files")
@@ -415,6 +621,7 @@ def main():
         print("  python pythonRun.py input.ply ./output --frames 72 --radius 3")
         print("  python pythonRun.py input.ply ./output --grayscale")
         print("  python pythonRun.py input.ply ./output --comfyui ./comfyui_input")
+        print("  python pythonRun.py a.ply ./output --scene \"b.ply;translate=1,0,0\"")
         sys.exit(1)
     
     input_ply = sys.argv[1]
@@ -426,6 +633,7 @@ def main():
     width = 1920
     height = 1080
     target = (0, 0, 1)
+    extra_scenes = []
     grayscale = False
     comfyui_dir = None
     cleanup = False
@@ -453,6 +661,9 @@ def main():
         elif arg == "--target" and i + 1 < len(sys.argv):
             target = tuple(map(float, sys.argv[i + 1].split(',')))
             i += 2
+        elif arg == "--scene" and i + 1 < len(sys.argv):
+            extra_scenes.extend(parse_scene_list(sys.argv[i + 1]))
+            i += 2
         elif arg == "--grayscale":
             grayscale = True
             i += 1
@@ -474,7 +685,7 @@ def main():
         
         print(f"Rendering orbit sequence from {input_ply}...")
         frame_files = splat.render_orbit(
-            input_ply=input_ply,
+            input_ply=[input_ply, *extra_scenes],
             output_dir=output_dir,
             frames=frames,
             radius=radius,
@@ -3,12 +3,17 @@ import resolve from '@rollup/plugin-node-resolve';
 import typescript from '@rollup/plugin-typescript';
 
 const application = {
-    input: 'src/index.ts',
+    input: {
+        index: 'src/index.ts',
+        // worker thread script loaded by the SOG writer
+        'sog-worker': 'src/writers/sog-worker.ts'
+    },
     output: {
         dir: 'dist',
         format: 'esm',
         sourcemap: true,
-        entryFileNames: '[name].mjs'
+        entryFileNames: '[name].mjs',
+        chunkFileNames: '[name]-[hash].mjs'
     },
     external: ['webgpu'],
     plugins: [
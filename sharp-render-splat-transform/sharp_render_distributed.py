@@ -0,0 +1,751 @@
+"""
+Sharded orbit rendering across render hosts
+
+A RenderWorker serves SplatTransform.render_orbit over HTTP. A RenderCoordinator splits
+an orbit into frame ranges, sends each worker the scenes it doesn't have yet (addressed
+by content hash) and the camera parameters, and gathers the frames back in order,
+retrying failed shards on the remaining workers.
+
+Worker protocol:
+    GET  /status                  JSON with cached scenes and scheduler metrics
+    HEAD /scenes/<sha256><ext>    200 when the scene is cached, 404 otherwise
+    PUT  /scenes/<sha256><ext>    store a scene, rejected unless the body matches the hash
+    POST /render                  JSON render request, answered with the frames as
+                                  (uint32 frame index, uint32 length, PNG bytes) records
+
+When a token is set, every request must carry it in the X-Sharp-Token header. Workers
+only listen on other interfaces than loopback with a token.
+
+Start a worker with:
+    SHARP_RENDER_TOKEN=<secret> python sharp_render_distributed.py worker --host 0.0.0.0 --port 8765
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from pythonRun import SceneSpec, SplatTransform, normalize_scenes
+
+
+# scene names are the SHA-256 of the content plus the original extension, which the
+# tools use to pick a reader
+SCENE_NAME = re.compile(r"^[0-9a-f]{64}(\.[A-Za-z0-9.-]+)?$")
+
+FRAME_RECORD = struct.Struct("<II")
+
+TOKEN_HEADER = "X-Sharp-Token"
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+# render requests are small JSON documents
+MAX_REQUEST_BYTES = 1 << 20
+
+# render_orbit parameters a render request may set
+RENDER_PARAMS = (
+    "frames", "radius", "fov", "width", "height", "target", "swing_angle",
+    "cull", "cull_min_size", "bake_harmonics", "frame_range", "priority"
+)
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def split_frames(frames: int, shards: int) -> List[Tuple[int, int]]:
+    """
+    Split frames 0 to frames - 1 into contiguous, near equal ranges
+
+    Ranges are contiguous so each worker renders neighbouring views, which keeps the
+    depth order carried between frames coherent.
+
+    Args:
+        frames: Number of frames in the orbit
+        shards: Number of ranges (clamped to the frame count)
+
+    Returns:
+        (start, end) ranges, end exclusive
+    """
+    shards = max(1, min(shards, frames))
+    bounds = [frames * i // shards for i in range(shards + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(shards)]
+
+
+def pack_frames(frames: Sequence[Tuple[int, bytes]]) -> bytes:
+    """Encode (frame index, PNG bytes) pairs as a render response body"""
+    return b"".join(FRAME_RECORD.pack(index, len(data)) + data for index, data in frames)
+
+
+def unpack_frames(body: bytes) -> List[Tuple[int, bytes]]:
+    """Decode a render response body into (frame index, PNG bytes) pairs"""
+    frames = []
+    offset = 0
+    while offset < len(body):
+        if offset + FRAME_RECORD.size > len(body):
+            raise ValueError("Truncated frame record")
+        index, length = FRAME_RECORD.unpack_from(body, offset)
+        offset += FRAME_RECORD.size
+        if offset + length > len(body):
+            raise ValueError(f"Truncated data for frame {index}")
+        frames.append((index, body[offset:offset + length]))
+        offset += length
+    return frames
+
+
+class _WorkerHandler(BaseHTTPRequestHandler):
+    server: "_WorkerServer"
+
+    def log_message(self, format, *args):
+        print(f"[{self.address_string()}] {format % args}")
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        """Check the request's token, answering 401 if it is missing or wrong"""
+        token = self.server.worker.token
+        if token and not hmac.compare_digest(self.headers.get(TOKEN_HEADER, "").encode(), token.encode()):
+            self._send(401, b"Missing or wrong token")
+            return False
+        return True
+
+    def _content_length(self, limit: int) -> Optional[int]:
+        """Declared body size, or None after rejecting a missing or oversized body"""
+        try:
+            length = int(self.headers["Content-Length"])
+        except (TypeError, ValueError):
+            self._send(411, b"Content-Length required")
+            return None
+        if length < 0 or length > limit:
+            self._send(413, f"Body larger than {limit} bytes".encode())
+            return None
+        return length
+
+    def _scene_path(self) -> Optional[Path]:
+        name = self.path[len("/scenes/"):] if self.path.startswith("/scenes/") else ""
+        if not SCENE_NAME.match(name):
+            self._send(404, b"Unknown scene")
+            return None
+        return self.server.worker.scene_dir / name
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path != "/status":
+            self._send(404, b"Not found")
+            return
+        self._send(200, json.dumps(self.server.worker.status()).encode(), "application/json")
+
+    def do_HEAD(self):
+        if not self._authorized():
+            return
+        path = self._scene_path()
+        if path is not None:
+            self._send(200 if self.server.worker.touch_scene(path) else 404)
+
+    def do_PUT(self):
+        if not self._authorized():
+            return
+        path = self._scene_path()
+        if path is None:
+            return
+        worker = self.server.worker
+        length = self._content_length(worker.max_scene_bytes)
+        if length is None:
+            return
+
+        # stream to a temporary name, so neither the whole scene is held in memory nor a
+        # concurrent render sees a partial file
+        temp_path = path.with_name(f".{path.name}.{threading.get_ident()}")
+        digest = hashlib.sha256()
+        try:
+            with open(temp_path, "wb") as f:
+                remaining = length
+                while remaining:
+                    chunk = self.rfile.read(min(remaining, 1 << 20))
+                    if not chunk:
+                        raise ConnectionError("Connection closed before the scene was received")
+                    digest.update(chunk)
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            matches = digest.hexdigest() == path.name[:64]
+            if matches:
+                worker.add_scene(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+        if matches:
+            self._send(201)
+        else:
+            self._send(400, b"Scene content does not match its hash")
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path != "/render":
+            self._send(404, b"Not found")
+            return
+        length = self._content_length(MAX_REQUEST_BYTES)
+        if length is None:
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+            # the coordinator's host keeps submitters apart even when they send the same name
+            client = f"{self.client_address[0]}/{request.get('client', '')}"
+            frames = self.server.worker.render(request, client=client)
+        except FileNotFoundError as e:
+            self._send(409, str(e).encode())
+            return
+        except Exception as e:
+            self._send(500, str(e).encode())
+            return
+        self._send(200, pack_frames(frames), "application/octet-stream")
+
+
+class _WorkerServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, worker: "RenderWorker"):
+        super().__init__(address, _WorkerHandler)
+        self.worker = worker
+
+
+class RenderWorker:
+    """Renders frame ranges for a RenderCoordinator, caching scenes by content hash"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        splat: Optional[SplatTransform] = None,
+        token: Optional[str] = None,
+        cache_bytes: Optional[int] = None,
+        max_scene_bytes: Optional[int] = None
+    ):
+        """
+        Args:
+            cache_dir: Directory for received scenes and render output (default: a
+                directory under the system temp directory)
+            splat: SplatTransform used to render (created on the first render if omitted)
+            token: Secret every request must carry. Defaults to SHARP_RENDER_TOKEN, else none
+            cache_bytes: Size the scene cache is trimmed to, least recently used first.
+                Defaults to SHARP_RENDER_CACHE_MB, else 20 GB
+            max_scene_bytes: Largest scene accepted. Defaults to SHARP_RENDER_MAX_SCENE_MB,
+                else 4 GB
+        """
+        if token is None:
+            token = os.environ.get("SHARP_RENDER_TOKEN")
+        if cache_bytes is None:
+            cache_bytes = int(float(os.environ.get("SHARP_RENDER_CACHE_MB", 20480)) * 2**20)
+        if max_scene_bytes is None:
+            max_scene_bytes = int(float(os.environ.get("SHARP_RENDER_MAX_SCENE_MB", 4096)) * 2**20)
+
+        self.token = token or None
+        self.cache_bytes = cache_bytes
+        self.max_scene_bytes = max_scene_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(tempfile.gettempdir()) / "sharp_render_worker"
+        self.scene_dir = self.cache_dir / "scenes"
+        self.job_dir = self.cache_dir / "jobs"
+        self.scene_dir.mkdir(parents=True, exist_ok=True)
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        self._splat = splat
+        self._splat_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._in_use: Dict[str, int] = {}
+        self._server: Optional[_WorkerServer] = None
+
+    @property
+    def splat(self) -> SplatTransform:
+        with self._splat_lock:
+            if self._splat is None:
+                self._splat = SplatTransform()
+            return self._splat
+
+    def _cached_scenes(self) -> List[Path]:
+        # temporary uploads start with a dot
+        return [p for p in self.scene_dir.iterdir() if not p.name.startswith(".")]
+
+    def status(self) -> Dict[str, Any]:
+        """Cached scene count and size, and the render scheduler's metrics"""
+        with self._cache_lock:
+            scenes = self._cached_scenes()
+            return {
+                "scenes": len(scenes),
+                "cache_bytes": sum(p.stat().st_size for p in scenes),
+                "scheduler": self.splat.scheduler.metrics()
+            }
+
+    def touch_scene(self, path: Path) -> bool:
+        """Mark a cached scene as recently used, returning False if it isn't cached"""
+        with self._cache_lock:
+            try:
+                os.utime(path)
+                return True
+            except FileNotFoundError:
+                return False
+
+    def add_scene(self, temp_path: Path, path: Path):
+        """
+        Move a received scene into the cache, then evict least recently used scenes until
+        the cache fits cache_bytes. The new scene and scenes being rendered are kept.
+
+        Args:
+            temp_path: Verified upload
+            path: Cache path of the scene
+        """
+        with self._cache_lock:
+            os.replace(temp_path, path)
+            scenes = sorted(self._cached_scenes(), key=lambda p: p.stat().st_mtime)
+            total = sum(p.stat().st_size for p in scenes)
+            for scene in scenes:
+                if total <= self.cache_bytes:
+                    break
+                if scene == path or self._in_use.get(scene.name):
+                    continue
+                total -= scene.stat().st_size
+                scene.unlink()
+                print(f"Evicted {scene.name[:12]} from the scene cache")
+
+    def render(self, request: Dict[str, Any], client: str = "") -> List[Tuple[int, bytes]]:
+        """
+        Render a shard
+
+        Args:
+            request: "scenes" (dicts with a cached scene "name" and optional "translate",
+                "rotate", "scale") plus render_orbit parameters (see RENDER_PARAMS)
+            client: Submitter, passed to the scheduler so coordinators take turns
+
+        Returns:
+            (frame index, PNG bytes) pairs in frame order
+        """
+        scenes = []
+        names = []
+        with self._cache_lock:
+            # hold the scenes so they aren't evicted while rendering
+            for scene in request["scenes"]:
+                name = scene.get("name", "")
+                path = self.scene_dir / name
+                if not SCENE_NAME.match(name) or not path.exists():
+                    self._release_scenes(names)
+                    raise FileNotFoundError(f"Scene not cached: {name}")
+                os.utime(path)
+                self._in_use[name] = self._in_use.get(name, 0) + 1
+                names.append(name)
+                scenes.append({"path": str(path), **{k: v for k, v in scene.items() if k != "name"}})
+
+        job_dir = None
+        try:
+            params = {k: request[k] for k in RENDER_PARAMS if k in request}
+            for key in ("target", "frame_range"):
+                if key in params:
+                    params[key] = tuple(params[key])
+
+            # orbit-render keeps its scratch files next to the output directory, so each
+            # job renders one level down in a directory of its own
+            job_dir = tempfile.mkdtemp(dir=self.job_dir)
+            frame_files = self.splat.render_orbit(
+                input_ply=scenes,
+                output_dir=str(Path(job_dir) / "frames"),
+                cleanup=True,
+                quiet=True,
+                client=client,
+                **params
+            )
+            return [(int(Path(f).stem.split("_")[-1]), Path(f).read_bytes()) for f in frame_files]
+        finally:
+            if job_dir:
+                shutil.rmtree(job_dir, ignore_errors=True)
+            with self._cache_lock:
+                self._release_scenes(names)
+
+    def _release_scenes(self, names: List[str]):
+        """Let scenes held by a render be evicted again. Must hold the cache lock."""
+        for name in names:
+            self._in_use[name] -= 1
+            if not self._in_use[name]:
+                del self._in_use[name]
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8765) -> str:
+        """
+        Start serving in a background thread
+
+        Args:
+            host: Interface to listen on. Interfaces other than loopback require a token
+            port: Port to listen on (0 picks a free port)
+
+        Returns:
+            Worker URL
+        """
+        if not self.token and host not in LOOPBACK_HOSTS:
+            raise ValueError(f"Refusing to listen on {host} without a token, set SHARP_RENDER_TOKEN")
+        self._server = _WorkerServer((host, port), self)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        bound_host, bound_port = self._server.server_address[:2]
+        return f"http://{'127.0.0.1' if bound_host == '0.0.0.0' else bound_host}:{bound_port}"
+
+    def shutdown(self):
+        """Stop serving"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class RenderCoordinator:
+    """Renders orbits by splitting their frames across RenderWorkers"""
+
+    def __init__(
+        self,
+        workers: Optional[Sequence[str]] = None,
+        retries: int = 2,
+        timeout: float = 900,
+        token: Optional[str] = None
+    ):
+        """
+        Args:
+            workers: Worker URLs, e.g. "http://render-1:8765". Defaults to the comma
+                separated SHARP_RENDER_WORKERS environment variable
+            retries: Times a failed shard is retried on another worker
+            timeout: Seconds to wait for a single HTTP request, including a shard render
+            token: Secret the workers expect. Defaults to SHARP_RENDER_TOKEN, else none
+        """
+        if workers is None:
+            workers = [w for w in os.environ.get("SHARP_RENDER_WORKERS", "").split(",") if w.strip()]
+        if token is None:
+            token = os.environ.get("SHARP_RENDER_TOKEN")
+        self.workers: List[str] = []
+        for url in workers:
+            self.add_worker(url)
+        self.retries = retries
+        self.timeout = timeout
+        self.token = token or None
+
+    def add_worker(self, url: str):
+        """Register a worker URL"""
+        url = url.strip().rstrip("/")
+        if url not in self.workers:
+            self.workers.append(url)
+
+    def status(self) -> Dict[str, Any]:
+        """Status of every worker, or the error reaching it"""
+        result = {}
+        for url in self.workers:
+            try:
+                result[url] = json.loads(self._request("GET", f"{url}/status", timeout=10))
+            except (OSError, ValueError) as e:
+                result[url] = {"error": str(e)}
+        return result
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        data: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> bytes:
+        headers = dict(headers or {})
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        request = urllib.request.Request(url, data=data, method=method, headers=headers)
+        with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+            return response.read()
+
+    def _upload_scenes(self, url: str, scenes: List[Dict[str, Any]]):
+        """Send the worker every scene it doesn't have"""
+        for scene in scenes:
+            scene_url = f"{url}/scenes/{scene['name']}"
+            try:
+                self._request("HEAD", scene_url)
+                continue
+            except urllib.error.HTTPError as e:
+                if e.code != 404:
+                    raise
+            print(f"Uploading {scene['name'][:12]} ({scene['size'] / 2**20:.1f} MB) to {url}")
+            headers = {"Content-Length": str(scene["size"]), "Content-Type": "application/octet-stream"}
+            if "data" in scene:
+                self._request("PUT", scene_url, scene["data"], headers)
+            else:
+                with open(scene["path"], "rb") as f:
+                    self._request("PUT", scene_url, f, headers)
+
+    def _render_shard(self, url: str, scenes: List[Dict[str, Any]], params: Dict[str, Any], frame_range: Tuple[int, int]) -> List[Tuple[int, bytes]]:
+        self._upload_scenes(url, scenes)
+        request = {
+            "scenes": [{k: v for k, v in s.items() if k not in ("path", "data", "size")} for s in scenes],
+            **params,
+            "frame_range": list(frame_range)
+        }
+        body = json.dumps(request).encode()
+        headers = {"Content-Type": "application/json"}
+        try:
+            try:
+                response = self._request("POST", f"{url}/render", body, headers)
+            except urllib.error.HTTPError as e:
+                if e.code != 409:
+                    raise
+                # the worker evicted a scene between upload and render, send it again
+                self._upload_scenes(url, scenes)
+                response = self._request("POST", f"{url}/render", body, headers)
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"{e.code} {e.read().decode(errors='replace')}") from e
+
+        frames = unpack_frames(response)
+        expected = list(range(*frame_range))
+        if [index for index, _ in frames] != expected:
+            raise RuntimeError(f"Expected frames {frame_range[0]} to {frame_range[1] - 1}, got {[index for index, _ in frames]}")
+        return frames
+
+    def render_orbit(
+        self,
+        input_ply: Union[SceneSpec, Sequence[SceneSpec]],
+        output_dir: str,
+        frames: int = 36,
+        radius: float = 2.0,
+        fov: int = 45,
+        width: int = 1920,
+        height: int = 1080,
+        target: Tuple[float, float, float] = (0, 0, 1),
+        swing_angle: float = 30.0,
+        cull: bool = True,
+        cull_min_size: float = 0.5,
+        bake_harmonics: bool = True,
+        shards: Optional[int] = None,
+        priority: int = 0,
+        client: str = ""
+    ) -> List[str]:
+        """
+        Render an orbit sequence on the workers, same as SplatTransform.render_orbit
+
+        Args:
+            input_ply: Scenes as accepted by SplatTransform.render_orbit. File scenes must
+                be single-file formats (the file is what gets transferred)
+            output_dir: Output directory for frames
+            frames: Number of frames to render
+            radius: Camera orbit radius
+            fov: Camera field of view in degrees
+            width: Image width in pixels
+            height: Image height in pixels
+            target: Camera target point (x, y, z)
+            swing_angle: Swing angle range in degrees (e.g., 30 means -15 to 15)
+            cull: Only encode and render splats visible from at least one frame of a shard
+            cull_min_size: Cull splats whose projected size is below this many pixels in every frame
+            bake_harmonics: Refit spherical harmonics to the bands a shard's view directions need
+            shards: Number of frame ranges (default: one per worker)
+            priority: Scheduling priority on the workers, higher runs first when jobs are queued
+            client: Submitter name, so one client's jobs don't crowd out others on the workers
+
+        Returns:
+            List of generated frame file paths, in frame order
+        """
+        if not self.workers:
+            raise RuntimeError("No render workers registered")
+
+        scenes = []
+        for scene in normalize_scenes(input_ply):
+            entry = {k: scene[k] for k in ("translate", "rotate", "scale") if k in scene}
+            if "splat" in scene:
+                data = scene["splat"].to_ply_bytes()
+                entry.update(name=hashlib.sha256(data).hexdigest() + ".ply", data=data, size=len(data))
+            else:
+                path = scene["path"]
+                if not os.path.isfile(path):
+                    raise FileNotFoundError(f"Input file not found: {path}")
+                entry.update(name=_hash_file(path) + Path(path).suffix.lower(), path=path, size=os.path.getsize(path))
+            scenes.append(entry)
+
+        params = {
+            "frames": frames, "radius": radius, "fov": fov, "width": width, "height": height,
+            "target": list(target), "swing_angle": swing_angle, "cull": cull, "cull_min_size": cull_min_size,
+            "bake_harmonics": bake_harmonics, "priority": priority, "client": client
+        }
+
+        output_path = Path(output_dir).resolve()
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        pending = [(frame_range, 0) for frame_range in split_frames(frames, shards or len(self.workers))]
+        idle = list(self.workers)
+        errors = []
+        frame_files = {}
+
+        print(f"Rendering {frames} frames in {len(pending)} shards on {len(self.workers)} workers")
+
+        with ThreadPoolExecutor(max_workers=len(self.workers)) as executor:
+            running = {}
+            while pending or running:
+                while pending and idle:
+                    frame_range, attempt = pending.pop(0)
+                    url = idle.pop(0)
+                    future = executor.submit(self._render_shard, url, scenes, params, frame_range)
+                    running[future] = (url, frame_range, attempt)
+
+                if not running:
+                    raise RuntimeError(f"All render workers failed: {'; '.join(errors)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, frame_range, attempt = running.pop(future)
+                    try:
+                        shard_frames = future.result()
+                    except Exception as e:
+                        # the worker sits out the rest of this render, the shard goes to another
+                        error = f"{url} frames {frame_range[0]}-{frame_range[1] - 1}: {e}"
+                        errors.append(error)
+                        print(f"Shard failed: {error}")
+                        if attempt >= self.retries:
+                            raise RuntimeError(f"Shard failed after {attempt + 1} attempts: {error}")
+                        pending.append((frame_range, attempt + 1))
+                        continue
+
+                    for index, data in shard_frames:
+                        frame_file = output_path / f"frame_{index:03d}.png"
+                        frame_file.write_bytes(data)
+                        frame_files[index] = str(frame_file)
+                    idle.append(url)
+                    print(f"Frames {frame_range[0]}-{frame_range[1] - 1} done on {url}")
+
+        print(f"Generated {len(frame_files)} frames in {output_path}")
+        return [frame_files[i] for i in range(frames)]
+
+
+class LocalWorkers:
+    """
+    Worker processes on this machine, standing in for render hosts
+
+    Usage:
+        with LocalWorkers(2) as workers:
+            RenderCoordinator(workers.urls, token=workers.token).render_orbit("input.ply", "./output")
+    """
+
+    def __init__(self, count: int, cache_dir: Optional[str] = None):
+        """
+        Args:
+            count: Number of worker processes
+            cache_dir: Parent of the per-worker cache directories (default: a temp directory)
+        """
+        self._temp_dir = None if cache_dir else tempfile.mkdtemp(prefix="sharp_workers_")
+        root = Path(cache_dir or self._temp_dir)
+        # passed in the environment rather than on the command line, where other users can see it
+        self.token = secrets.token_hex(16)
+        self.processes: List[subprocess.Popen] = []
+        self.urls: List[str] = []
+        try:
+            for i in range(count):
+                process = subprocess.Popen(
+                    [sys.executable, str(Path(__file__).resolve()), "worker",
+                     "--host", "127.0.0.1", "--port", "0", "--cache-dir", str(root / f"worker-{i}")],
+                    stdout=subprocess.PIPE,
+                    text=True,
+                    env={**os.environ, "SHARP_RENDER_TOKEN": self.token}
+                )
+                self.processes.append(process)
+                # the worker announces its URL on the first line once it is listening
+                line = process.stdout.readline().strip()
+                if not line.startswith("Listening on "):
+                    raise RuntimeError(f"Worker {i} failed to start: {line}")
+                self.urls.append(line[len("Listening on "):])
+                # keep draining its output so the worker never blocks on a full pipe
+                threading.Thread(target=self._forward_output, args=(i, process), daemon=True).start()
+        except Exception:
+            self.close()
+            raise
+
+    @staticmethod
+    def _forward_output(index: int, process: subprocess.Popen):
+        for line in process.stdout:
+            print(f"[worker {index}] {line.rstrip()}")
+
+    def close(self):
+        """Stop the worker processes and remove their caches if this created them"""
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.processes = []
+        if self._temp_dir:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+
+    def __enter__(self) -> "LocalWorkers":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "worker":
+        print("Usage:")
+        print("  python sharp_render_distributed.py worker [options]")
+        print()
+        print("Options:")
+        print("  --host HOST         Interface to listen on (default: 127.0.0.1). Other interfaces")
+        print("                      require a token in SHARP_RENDER_TOKEN")
+        print("  --port N            Port to listen on, 0 for any free port (default: 8765)")
+        print("  --cache-dir DIR     Scene cache and scratch directory")
+        print()
+        print("Environment:")
+        print("  SHARP_RENDER_TOKEN         Secret coordinators must send in the X-Sharp-Token header")
+        print("  SHARP_RENDER_CACHE_MB      Scene cache size, least recently used scenes are evicted (default: 20480)")
+        print("  SHARP_RENDER_MAX_SCENE_MB  Largest scene accepted (default: 4096)")
+        sys.exit(1)
+
+    host = "127.0.0.1"
+    port = 8765
+    cache_dir = None
+
+    i = 2
+    while i < len(sys.argv):
+        arg = sys.argv[i]
+        if arg == "--host" and i + 1 < len(sys.argv):
+            host = sys.argv[i + 1]
+            i += 2
+        elif arg == "--port" and i + 1 < len(sys.argv):
+            port = int(sys.argv[i + 1])
+            i += 2
+        elif arg == "--cache-dir" and i + 1 < len(sys.argv):
+            cache_dir = sys.argv[i + 1]
+            i += 2
+        else:
+            print(f"Unknown option: {arg}")
+            sys.exit(1)
+
+    worker = RenderWorker(cache_dir)
+    try:
+        url = worker.serve(host, port)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    print(f"Listening on {url}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        worker.shutdown()
+
+
+if __name__ == "__main__":
+    main()
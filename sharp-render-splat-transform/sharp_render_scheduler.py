@@ -0,0 +1,556 @@
+"""
+Resource-aware admission of Node tool runs shared by every SplatTransform in the process,
+and through a shared directory by every process on the machine
+"""
+
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import IO, Any, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional
+
+
+# Rough working set of the tools, measured on SharpPredict scenes
+NODE_BASE_MB = 200          # splat-transform process
+BROWSER_BASE_MB = 600       # headless Chromium with the viewer loaded
+SOG_WORKER_MB = 50          # each SOG compression worker thread
+ENCODE_BYTES_PER_SPLAT = 600    # splat table, k-means state and textures while encoding SOG
+VIEWER_BYTES_PER_SPLAT = 250    # decoded splat textures and depth sort state in the viewer
+FRAMEBUFFER_COPIES = 8          # color, depth, composited and screenshot copies of a frame
+
+# Rough splat throughput, used to estimate how long a job holds its reservation
+ENCODE_SPLATS_PER_CPU_SECOND = 100_000
+
+# Average share of a SOG encode's worker threads that is busy. Only the k-means
+# iterations run on the workers; reading, sorting, clustering setup and writing are
+# single threaded, so charging every worker as a full core would serialize all jobs.
+SOG_WORKER_UTILIZATION = 0.25
+RENDER_PIXELS_PER_SECOND = 100_000_000
+
+# Bytes per splat of an uncompressed 3DGS PLY, to estimate files without a readable header
+PLY_BYTES_PER_SPLAT = 248
+
+
+class JobCost(NamedTuple):
+    """Estimated peak resources a job holds while it runs"""
+    memory_mb: float
+    cpus: float
+    seconds: float
+
+
+def _system_memory_mb() -> Optional[float]:
+    """Physical memory in MB, or None when it can't be determined"""
+    try:
+        import psutil
+        return psutil.virtual_memory().total / 2**20
+    except ImportError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def read_splat_count(path: str) -> int:
+    """
+    Number of splats in a scene file, from the PLY header or else estimated from the file size
+
+    Args:
+        path: Scene file path
+
+    Returns:
+        Splat count
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(128 * 1024)
+    except OSError:
+        return 0
+
+    if head.startswith((b"ply\n", b"ply\r\n")):
+        end = head.find(b"end_header")
+        for line in head[:end].decode("ascii", errors="replace").split("\n"):
+            words = line.split()
+            if len(words) == 3 and words[0] == "element" and words[1] == "vertex":
+                return int(words[2])
+
+    return os.path.getsize(path) // PLY_BYTES_PER_SPLAT
+
+
+def count_scene_splats(scenes: List[Dict[str, Any]]) -> int:
+    """
+    Total splats of normalized scene dicts (see pythonRun.normalize_scenes)
+
+    Args:
+        scenes: Scene dicts with a "path" or "splat" entry
+
+    Returns:
+        Splat count
+    """
+    total = 0
+    for scene in scenes:
+        if "splat" in scene:
+            total += len(scene["splat"])
+        else:
+            total += read_splat_count(scene["path"])
+    return total
+
+
+def estimate_html_cost(num_splats: int, threads: int) -> JobCost:
+    """
+    Estimate the cost of encoding splats into an HTML viewer
+
+    Args:
+        num_splats: Splats in all input scenes
+        threads: SOG compression worker threads (0 = one per CPU core)
+
+    Returns:
+        Estimated cost
+    """
+    workers = threads or os.cpu_count() or 1
+    return JobCost(
+        memory_mb=NODE_BASE_MB + num_splats * ENCODE_BYTES_PER_SPLAT / 2**20 + workers * SOG_WORKER_MB,
+        # the main thread, plus the average load of the workers
+        cpus=1 + (workers - 1) * SOG_WORKER_UTILIZATION,
+        seconds=num_splats / (ENCODE_SPLATS_PER_CPU_SECOND * workers)
+    )
+
+
+def estimate_render_cost(num_splats: int, width: int, height: int, frames: int) -> JobCost:
+    """
+    Estimate the cost of an orbit render
+
+    The viewer is encoded first and the browser launched after, so peak memory is the
+    larger of the two phases. The browser needs frame buffers at the output resolution
+    plus decoded splats; frame count adds time but not memory, as frames are captured
+    one at a time.
+
+    Args:
+        num_splats: Splats in all input scenes
+        width: Image width in pixels
+        height: Image height in pixels
+        frames: Number of frames
+
+    Returns:
+        Estimated cost
+    """
+    # orbit-render encodes with splat-transform's default of one thread per CPU core
+    encode = estimate_html_cost(num_splats, 0)
+    browser_mb = (
+        BROWSER_BASE_MB
+        + width * height * 4 * FRAMEBUFFER_COPIES / 2**20
+        + num_splats * VIEWER_BYTES_PER_SPLAT / 2**20
+    )
+    # rasterization cost grows with both the image size and the splats drawn per frame
+    render_seconds = frames * (width * height + num_splats * 16) / RENDER_PIXELS_PER_SECOND
+    return JobCost(
+        memory_mb=max(encode.memory_mb, browser_mb),
+        cpus=max(encode.cpus, 2),
+        seconds=encode.seconds + render_seconds
+    )
+
+
+# Byte locked in each reservation file while its job runs. Past the JSON content, so other
+# processes can still read the file on Windows, where locks are mandatory.
+_LOCK_OFFSET = 1 << 20
+
+
+def _try_lock(f: IO, blocking: bool) -> bool:
+    """Lock an open file exclusively, returning False if it is held and blocking is off"""
+    f.seek(_LOCK_OFFSET)
+    try:
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    return True
+                except OSError:
+                    if not blocking:
+                        return False
+                    time.sleep(0.01)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+    except OSError:
+        return False
+
+
+def _unlock(f: IO):
+    f.seek(_LOCK_OFFSET)
+    if os.name == "nt":
+        import msvcrt
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class SharedBudget:
+    """
+    Reservations of every scheduler using the same directory, so separate processes
+    (several ComfyUI instances, render workers) are admitted against one budget
+
+    Each running job is a JSON file holding its cost, locked by its process for as long as
+    the job runs. A file nobody holds a lock on belongs to a process that died, and is
+    removed. Admission checks and adds a reservation under a directory-wide lock.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Directory shared by the cooperating processes, created if missing
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock_path = os.path.join(directory, "scheduler.lock")
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self._lock_path, "a+b") as f:
+            _try_lock(f, blocking=True)
+            try:
+                yield
+            finally:
+                _unlock(f)
+
+    def _reservations(self) -> List[JobCost]:
+        """Costs of the live reservations, removing those of dead processes. Must hold the lock."""
+        costs = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".job"):
+                continue
+            try:
+                with open(entry.path, "r+b") as f:
+                    if _try_lock(f, blocking=False):
+                        # nobody holds it, so its process is gone
+                        _unlock(f)
+                        stale = True
+                    else:
+                        stale = False
+                        f.seek(0)
+                        costs.append(JobCost(**json.loads(f.read(_LOCK_OFFSET).decode("utf-8"))))
+                if stale:
+                    os.remove(entry.path)
+            except (OSError, ValueError, TypeError):
+                # half written or just released
+                continue
+        return costs
+
+    def usage(self) -> Dict[str, float]:
+        """Jobs, memory and CPUs reserved by all processes"""
+        with self._locked():
+            costs = self._reservations()
+        return {
+            "jobs": len(costs),
+            "memory_mb": sum(c.memory_mb for c in costs),
+            "cpus": sum(c.cpus for c in costs),
+        }
+
+    def try_reserve(self, cost: JobCost, fits: Callable[[int, float, float], bool]) -> Optional[IO]:
+        """
+        Reserve cost if fits(jobs, memory_mb, cpus) accepts the current reservations
+
+        Args:
+            cost: Estimated job cost
+            fits: Admission check given the jobs, memory and CPUs reserved so far
+
+        Returns:
+            Handle to pass to release(), or None if the job doesn't fit
+        """
+        with self._locked():
+            costs = self._reservations()
+            if not fits(len(costs), sum(c.memory_mb for c in costs), sum(c.cpus for c in costs)):
+                return None
+            path = os.path.join(self.directory, f"{uuid.uuid4().hex}.job")
+            f = open(path, "w+b")
+            _try_lock(f, blocking=True)
+            f.seek(0)
+            f.write(json.dumps(cost._asdict()).encode("utf-8"))
+            f.flush()
+            return f
+
+    def release(self, handle: IO):
+        """Drop a reservation made by try_reserve()"""
+        with self._locked():
+            _unlock(handle)
+            handle.close()
+            try:
+                os.remove(handle.name)
+            except OSError:
+                pass
+
+
+class _Waiter:
+    """A queued job"""
+
+    def __init__(self, seq: int, cost: JobCost, priority: int, client: str, name: str):
+        self.seq = seq
+        self.cost = cost
+        self.priority = priority
+        self.client = client
+        self.name = name
+        self.enqueued = time.monotonic()
+        self.admitted = False
+        self.reservation: Optional[IO] = None
+
+
+class JobScheduler:
+    """
+    Admits jobs against memory and CPU budgets, queueing the rest
+
+    Jobs are served by priority (higher first), then round robin across clients (a client
+    with jobs running or queued ahead waits its turn, and of clients with equal turns the
+    one served longest ago goes first), then in arrival order. Waiting raises a job's
+    effective priority by one level every aging_seconds, so low priority jobs are not starved. Only the best queued
+    job is considered for admission, so large jobs are not overtaken indefinitely by small
+    ones. A job larger than a whole budget still runs once nothing else is running.
+
+    Schedulers given the same shared directory admit against the jobs of all of them, so
+    several processes on one machine share the budgets. Queue order is still decided per
+    process; across processes a freed budget goes to whichever process polls first.
+    """
+
+    # how often a waiting job re-checks budgets freed by other processes
+    shared_poll_seconds = 1.0
+
+    def __init__(
+        self,
+        memory_budget_mb: Optional[float] = None,
+        cpu_budget: Optional[float] = None,
+        max_jobs: Optional[int] = None,
+        aging_seconds: float = 60.0,
+        shared_dir: Optional[str] = None
+    ):
+        """
+        Args:
+            memory_budget_mb: Memory all running jobs may use together. Defaults to
+                SHARP_SCHEDULER_MEMORY_MB, else 75% of physical memory
+            cpu_budget: CPU cores all running jobs may use together. Defaults to
+                SHARP_SCHEDULER_CPUS, else the number of CPU cores
+            max_jobs: Maximum concurrent jobs. Defaults to SHARP_SCHEDULER_MAX_JOBS, else no limit
+            aging_seconds: Waiting time that raises a job's priority by one level
+            shared_dir: Directory through which processes share the budgets. Defaults to
+                SHARP_SCHEDULER_DIR, else sharp-render-scheduler in the temp directory.
+                An empty string keeps the budgets to this process
+        """
+        if memory_budget_mb is None:
+            env = os.environ.get("SHARP_SCHEDULER_MEMORY_MB")
+            system_mb = _system_memory_mb()
+            memory_budget_mb = float(env) if env else (system_mb * 0.75 if system_mb else 8192.0)
+        if cpu_budget is None:
+            env = os.environ.get("SHARP_SCHEDULER_CPUS")
+            cpu_budget = float(env) if env else float(os.cpu_count() or 1)
+        if max_jobs is None:
+            env = os.environ.get("SHARP_SCHEDULER_MAX_JOBS")
+            max_jobs = int(env) if env else 0
+        if shared_dir is None:
+            shared_dir = os.environ.get(
+                "SHARP_SCHEDULER_DIR", os.path.join(tempfile.gettempdir(), "sharp-render-scheduler")
+            )
+
+        self.memory_budget_mb = memory_budget_mb
+        self.cpu_budget = cpu_budget
+        self.max_jobs = max_jobs
+        self.aging_seconds = aging_seconds
+        self.shared = SharedBudget(shared_dir) if shared_dir else None
+
+        self._condition = threading.Condition()
+        self._seq = itertools.count()
+        self._queue: List[_Waiter] = []
+        self._running: Dict[int, _Waiter] = {}
+        self._client_running: Dict[str, int] = {}
+        self._client_served: Dict[str, int] = {}     # admission count when each client last started a job
+        self._memory_in_use = 0.0
+        self._cpus_in_use = 0.0
+
+        self._admitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._waits: Deque[float] = deque(maxlen=256)
+
+    def _within_budget(self, cost: JobCost, jobs: int, memory_mb: float, cpus: float) -> bool:
+        """Whether cost fits next to jobs already holding memory_mb and cpus"""
+        if not jobs:
+            return True
+        if self.max_jobs and jobs >= self.max_jobs:
+            return False
+        return (
+            memory_mb + cost.memory_mb <= self.memory_budget_mb
+            and cpus + cost.cpus <= self.cpu_budget
+        )
+
+    def _fits(self, waiter: _Waiter) -> bool:
+        """Whether the job fits, reserving it in the shared directory if so"""
+        if not self._within_budget(waiter.cost, len(self._running), self._memory_in_use, self._cpus_in_use):
+            return False
+        if self.shared is None:
+            return True
+        # this process's running jobs are among the shared reservations
+        waiter.reservation = self.shared.try_reserve(
+            waiter.cost, lambda jobs, memory_mb, cpus: self._within_budget(waiter.cost, jobs, memory_mb, cpus)
+        )
+        return waiter.reservation is not None
+
+    def _next(self) -> Optional[_Waiter]:
+        """The queued job to admit next"""
+        if not self._queue:
+            return None
+        now = time.monotonic()
+        # position of each job among its client's queued jobs, so clients take turns
+        turns: Dict[str, int] = {}
+        candidates = []
+        for w in self._queue:
+            turn = turns.get(w.client, 0)
+            turns[w.client] = turn + 1
+            candidates.append((
+                -(w.priority + int((now - w.enqueued) / self.aging_seconds)),
+                self._client_running.get(w.client, 0) + turn,
+                # between clients with equal turns, the one served longest ago goes first
+                self._client_served.get(w.client, -1),
+                w.seq,
+                w
+            ))
+        return min(candidates, key=lambda c: c[:4])[4]
+
+    def _admit_ready(self):
+        """Admit queued jobs in order while they fit. Must hold the condition."""
+        while True:
+            waiter = self._next()
+            if waiter is None or not self._fits(waiter):
+                break
+            self._queue.remove(waiter)
+            waiter.admitted = True
+            self._running[waiter.seq] = waiter
+            self._client_running[waiter.client] = self._client_running.get(waiter.client, 0) + 1
+            self._client_served[waiter.client] = self._admitted
+            self._memory_in_use += waiter.cost.memory_mb
+            self._cpus_in_use += waiter.cost.cpus
+            self._admitted += 1
+            self._waits.append(time.monotonic() - waiter.enqueued)
+        self._condition.notify_all()
+
+    def _release(self, waiter: _Waiter, failed: bool):
+        """Give back an admitted job's resources and admit what now fits. Must hold the condition."""
+        if waiter.reservation is not None:
+            self.shared.release(waiter.reservation)
+            waiter.reservation = None
+        del self._running[waiter.seq]
+        self._client_running[waiter.client] -= 1
+        if not self._client_running[waiter.client]:
+            del self._client_running[waiter.client]
+        self._memory_in_use -= waiter.cost.memory_mb
+        self._cpus_in_use -= waiter.cost.cpus
+        self._completed += 1
+        self._failed += failed
+        self._admit_ready()
+
+    @contextmanager
+    def reserve(self, cost: JobCost, priority: int = 0, client: str = "", name: str = "job") -> Iterator[float]:
+        """
+        Block until the job is admitted, holding its resources for the duration of the block
+
+        Args:
+            cost: Estimated job cost
+            priority: Higher runs first
+            client: Identifies the submitter, so one client's burst doesn't crowd out others
+            name: Label used in log output
+
+        Yields:
+            Seconds spent waiting in the queue
+        """
+        with self._condition:
+            waiter = _Waiter(next(self._seq), cost, priority, client, name)
+            self._queue.append(waiter)
+            try:
+                self._admit_ready()
+                if not waiter.admitted:
+                    print(
+                        f"Scheduler: queued {name} ({cost.memory_mb:.0f} MB, {cost.cpus:g} CPUs), "
+                        f"{len(self._queue)} waiting, {len(self._running)} running"
+                    )
+                # re-evaluate periodically, since aging changes the order and other processes
+                # free their share while nothing completes here
+                timeout = self.aging_seconds / 4
+                if self.shared is not None:
+                    timeout = min(timeout, self.shared_poll_seconds)
+                while not waiter.admitted:
+                    self._condition.wait(timeout=timeout)
+                    if not waiter.admitted:
+                        self._admit_ready()
+            except BaseException:
+                # interrupted (Ctrl+C, a cancelled prompt): leave the queue, or give back
+                # the resources if admitted meanwhile, so later jobs aren't blocked behind it
+                if waiter.admitted:
+                    self._release(waiter, failed=True)
+                else:
+                    if waiter in self._queue:
+                        self._queue.remove(waiter)
+                    if waiter.reservation is not None:
+                        self.shared.release(waiter.reservation)
+                        waiter.reservation = None
+                    self._condition.notify_all()
+                raise
+
+        wait = time.monotonic() - waiter.enqueued
+        if wait >= 1.0:
+            print(f"Scheduler: started {name} after waiting {wait:.1f}s")
+
+        failed = True
+        try:
+            yield wait
+            failed = False
+        finally:
+            with self._condition:
+                self._release(waiter, failed)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Snapshot of the scheduler state
+
+        Returns:
+            Dict with queue depth, running jobs, resources in use, admission wait times
+            (over the most recent admissions) in seconds, and the usage of every process
+            sharing the budgets (None when they aren't shared)
+        """
+        with self._condition:
+            now = time.monotonic()
+            waits = sorted(self._waits)
+            shared = self.shared.usage() if self.shared is not None else None
+            return {
+                "queue_depth": len(self._queue),
+                "running": len(self._running),
+                "memory_in_use_mb": self._memory_in_use,
+                "memory_budget_mb": self.memory_budget_mb,
+                "cpus_in_use": self._cpus_in_use,
+                "cpu_budget": self.cpu_budget,
+                "admitted": self._admitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "oldest_wait": max((now - w.enqueued for w in self._queue), default=0.0),
+                "queued_work_seconds": sum(w.cost.seconds for w in self._queue),
+                "wait_mean": sum(waits) / len(waits) if waits else 0.0,
+                "wait_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+                "wait_max": waits[-1] if waits else 0.0,
+                # jobs, memory and CPUs reserved by every process sharing the budgets
+                "shared": shared,
+            }
+
+
+_default_scheduler: Optional[JobScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler() -> JobScheduler:
+    """The process-wide scheduler, created from the environment on first use"""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = JobScheduler()
+        return _default_scheduler
@@ -0,0 +1,256 @@
+"""
+Columnar in-memory Gaussian splat container with binary PLY reading and writing
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# PLY property type names and their NumPy equivalents
+PLY_TYPES = {
+    "char": "i1", "int8": "i1",
+    "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2",
+    "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4",
+    "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4",
+    "double": "f8", "float64": "f8",
+}
+
+# NumPy dtypes and the PLY type names written for them
+NUMPY_TYPES = {
+    "i1": "char", "u1": "uchar",
+    "i2": "short", "u2": "ushort",
+    "i4": "int", "u4": "uint",
+    "f4": "float", "f8": "double",
+}
+
+PLY_FORMATS = {
+    "binary_little_endian": "<",
+    "binary_big_endian": ">",
+}
+
+
+def _parse_ply_header(data: bytes) -> Tuple[str, List[str], List[Tuple[str, int, List[Tuple[str, str]]]], int]:
+    """
+    Parse a PLY header
+
+    Args:
+        data: PLY file contents (at least the full header)
+
+    Returns:
+        Tuple of (byte order, comments, elements as (name, count, [(property, numpy type)]), header size)
+    """
+    # headers may use CRLF line endings
+    if not data.startswith((b"ply\n", b"ply\r\n")):
+        raise ValueError("Invalid PLY data: missing 'ply' magic")
+
+    end = data.find(b"end_header")
+    newline = data.find(b"\n", end)
+    if end < 0 or newline < 0 or data[end + len(b"end_header"):newline].strip(b"\r "):
+        raise ValueError("Invalid PLY data: missing 'end_header'")
+    header_size = newline + 1
+
+    byte_order = None
+    comments = []
+    elements = []
+    for line in data[:header_size].decode("ascii").split("\n")[1:]:
+        line = line.rstrip("\r")
+        words = line.split()
+        if not words or words[0] in ("end_header", "obj_info"):
+            continue
+        if words[0] == "format":
+            if words[1] not in PLY_FORMATS:
+                raise ValueError(f"Unsupported PLY format: {words[1]}. Only binary PLY files are supported")
+            byte_order = PLY_FORMATS[words[1]]
+        elif words[0] == "comment":
+            comments.append(line[len("comment "):])
+        elif words[0] == "element":
+            elements.append((words[1], int(words[2]), []))
+        elif words[0] == "property":
+            if not elements:
+                raise ValueError("Invalid PLY header: property before element")
+            if words[1] == "list":
+                raise ValueError(f"Unsupported PLY list property: {words[-1]}")
+            if words[1] not in PLY_TYPES:
+                raise ValueError(f"Unsupported PLY property type: {words[1]}")
+            elements[-1][2].append((words[2], PLY_TYPES[words[1]]))
+        else:
+            raise ValueError(f"Unrecognized PLY header line: {line}")
+
+    if byte_order is None:
+        raise ValueError("Invalid PLY header: missing format")
+
+    return byte_order, comments, elements, header_size
+
+
+class SplatData:
+    """
+    Gaussian splats held as one NumPy array per PLY vertex property (x, y, z, f_dc_0,
+    opacity, scale_0, rot_0, f_rest_*, ...)
+
+    Elements other than 'vertex' (e.g. the camera metadata SharpPredict writes) are
+    kept as structured arrays so they survive a load/save round trip.
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        extra_elements: Optional[Sequence[Tuple[str, np.ndarray]]] = None,
+        comments: Optional[Sequence[str]] = None
+    ):
+        """
+        Args:
+            columns: Vertex property name to 1D array, all of the same length
+            extra_elements: Non-vertex elements as (name, structured array) pairs
+            comments: PLY header comments
+        """
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"All columns must have the same length, got {sorted(lengths)}")
+
+        self.columns = {name: np.ascontiguousarray(column) for name, column in columns.items()}
+        self.extra_elements = list(extra_elements or [])
+        self.comments = list(comments or [])
+
+    @property
+    def num_splats(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.columns.keys())
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __len__(self) -> int:
+        return self.num_splats
+
+    def __repr__(self) -> str:
+        return f"SplatData({self.num_splats} splats, {len(self.columns)} columns)"
+
+    def copy(self) -> "SplatData":
+        """Return a deep copy, so edits don't affect other nodes holding this data"""
+        return SplatData(
+            {name: column.copy() for name, column in self.columns.items()},
+            [(name, data.copy()) for name, data in self.extra_elements],
+            self.comments
+        )
+
+    def select(self, mask_or_indices: np.ndarray) -> "SplatData":
+        """
+        Return the splats selected by a boolean mask or index array
+
+        Args:
+            mask_or_indices: Boolean mask of length num_splats, or integer indices
+
+        Returns:
+            New SplatData with the selected rows
+        """
+        return SplatData(
+            {name: column[mask_or_indices] for name, column in self.columns.items()},
+            self.extra_elements,
+            self.comments
+        )
+
+    @classmethod
+    def from_ply_bytes(cls, data: bytes) -> "SplatData":
+        """
+        Parse binary PLY data
+
+        Args:
+            data: PLY file contents
+
+        Returns:
+            SplatData with one array per vertex property
+        """
+        byte_order, comments, elements, offset = _parse_ply_header(data)
+
+        columns = None
+        extra_elements = []
+        for name, count, properties in elements:
+            dtype = np.dtype([(prop, byte_order + np_type) for prop, np_type in properties])
+            if offset + count * dtype.itemsize > len(data):
+                raise ValueError(f"PLY data is truncated in element '{name}'")
+            rows = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += count * dtype.itemsize
+
+            if name == "vertex":
+                # split interleaved rows into native-endian columns
+                columns = {prop: rows[prop].astype(np_type) for prop, np_type in properties}
+            else:
+                extra_elements.append((name, rows.copy()))
+
+        if columns is None:
+            raise ValueError("PLY data does not contain a vertex element")
+
+        return cls(columns, extra_elements, comments)
+
+    @classmethod
+    def from_ply(cls, path: str) -> "SplatData":
+        """
+        Read a binary PLY file
+
+        Args:
+            path: PLY file path
+
+        Returns:
+            SplatData with one array per vertex property
+        """
+        with open(path, "rb") as f:
+            return cls.from_ply_bytes(f.read())
+
+    def to_ply_bytes(self) -> bytes:
+        """
+        Serialize to binary little endian PLY
+
+        Returns:
+            PLY file contents
+        """
+        vertex_dtype = []
+        for name, column in self.columns.items():
+            key = column.dtype.str[1:]
+            if key not in NUMPY_TYPES:
+                raise ValueError(f"Column '{name}' has unsupported dtype {column.dtype}")
+            vertex_dtype.append((name, "<" + key))
+
+        vertex = np.empty(self.num_splats, dtype=vertex_dtype)
+        for name, column in self.columns.items():
+            vertex[name] = column
+
+        elements = [("vertex", vertex)]
+        for name, data in self.extra_elements:
+            elements.append((name, data.astype(data.dtype.newbyteorder("<"))))
+
+        header = ["ply", "format binary_little_endian 1.0"]
+        header.extend(f"comment {comment}" for comment in self.comments)
+        for name, data in elements:
+            header.append(f"element {name} {len(data)}")
+            for prop in data.dtype.names:
+                header.append(f"property {NUMPY_TYPES[data.dtype[prop].str[1:]]} {prop}")
+        header.append("end_header")
+
+        return b"".join([("\n".join(header) + "\n").encode("ascii")] + [data.tobytes() for _, data in elements])
+
+    def save_ply(self, path: str) -> str:
+        """
+        Write a binary little endian PLY file
+
+        Args:
+            path: Output PLY file path
+
+        Returns:
+            Absolute path of the written file
+        """
+        path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(self.to_ply_bytes())
+        return path
@@ -0,0 +1,228 @@
+import { Column, DataTable } from './data-table';
+import { CullCamera } from '../spatial/frustum-cull';
+import { logger } from '../utils/logger';
+
+type BakeSettings = {
+    cameras: CullCamera[];
+    maxColorError?: number;             // largest tolerated color difference, in 0-1 color units
+};
+
+const shNames = new Array(45).fill('').map((_, i) => `f_rest_${i}`);
+
+const SH_C0 = 0.28209479177387814;
+const SH_C1 = 0.4886025119029199;
+const SH_C2 = [1.0925484305920792, -1.0925484305920792, 0.31539156525252005, -1.0925484305920792, 0.5462742152960396];
+const SH_C3 = [-0.5900435899266435, 2.890611442640554, -0.4570457994644658, 0.3731763325901154, -0.4570457994644658, 1.445305721320277, -0.5900435899266435];
+
+// directions each splat's color is fitted to. the error is checked from every camera.
+const numFitDirections = 12;
+
+// a band count is accepted when at most this fraction of splats exceed the error bound
+const maxOutlierFraction = 0.001;
+
+// damping of the fitted coefficients. the trajectory only spans a narrow range of
+// directions, so without it coefficients the fit can't pin down would grow unbounded.
+const ridge = 1e-5;
+
+// view dependent SH basis (bands 1 to 3) of direction (x, y, z), as evaluated by the viewer
+const evalBasis = (x: number, y: number, z: number, out: Float64Array, offset: number) => {
+    const xx = x * x, yy = y * y, zz = z * z;
+    out[offset + 0] = -SH_C1 * y;
+    out[offset + 1] = SH_C1 * z;
+    out[offset + 2] = -SH_C1 * x;
+    out[offset + 3] = SH_C2[0] * x * y;
+    out[offset + 4] = SH_C2[1] * y * z;
+    out[offset + 5] = SH_C2[2] * (2 * zz - xx - yy);
+    out[offset + 6] = SH_C2[3] * x * z;
+    out[offset + 7] = SH_C2[4] * (xx - yy);
+    out[offset + 8] = SH_C3[0] * y * (3 * xx - yy);
+    out[offset + 9] = SH_C3[1] * x * y * z;
+    out[offset + 10] = SH_C3[2] * y * (4 * zz - xx - yy);
+    out[offset + 11] = SH_C3[3] * z * (2 * zz - 3 * xx - 3 * yy);
+    out[offset + 12] = SH_C3[4] * x * (4 * zz - xx - yy);
+    out[offset + 13] = SH_C3[5] * z * (xx - yy);
+    out[offset + 14] = SH_C3[6] * x * (xx - 3 * yy);
+};
+
+// evenly spaced subset of at most count items, including the first and last
+const subsample = <T>(items: T[], count: number) => {
+    if (items.length <= count) {
+        return items;
+    }
+    return new Array(count).fill(0).map((_, i) => items[Math.round(i * (items.length - 1) / (count - 1))]);
+};
+
+// solve the symmetric positive definite n x n system a x = b in place by cholesky
+// decomposition, for 3 right hand sides stored one after another in b
+const solve = (a: Float64Array, b: Float64Array, n: number) => {
+    for (let j = 0; j < n; ++j) {
+        let d = a[j * n + j];
+        for (let k = 0; k < j; ++k) {
+            d -= a[j * n + k] * a[j * n + k];
+        }
+        d = Math.sqrt(Math.max(d, 1e-12));
+        a[j * n + j] = d;
+        for (let i = j + 1; i < n; ++i) {
+            let s = a[i * n + j];
+            for (let k = 0; k < j; ++k) {
+                s -= a[i * n + k] * a[j * n + k];
+            }
+            a[i * n + j] = s / d;
+        }
+    }
+    for (let c = 0; c < 3; ++c) {
+        const o = c * n;
+        for (let i = 0; i < n; ++i) {
+            let s = b[o + i];
+            for (let k = 0; k < i; ++k) {
+                s -= a[i * n + k] * b[o + k];
+            }
+            b[o + i] = s / a[i * n + i];
+        }
+        for (let i = n - 1; i >= 0; --i) {
+            let s = b[o + i];
+            for (let k = i + 1; k < n; ++k) {
+                s -= a[k * n + i] * b[o + k];
+            }
+            b[o + i] = s / a[i * n + i];
+        }
+    }
+};
+
+// replace each splat's spherical harmonics by the fewest bands that reproduce its view
+// dependent color, within maxColorError, from every camera of a fixed trajectory.
+// lower bands are fitted by least squares to the exact color over the directions the
+// splat is seen from, with the constant part folded into f_dc. when no lower band count
+// keeps enough splats within the bound, the table is returned unchanged so the viewer
+// evaluates the exact harmonics.
+const bakeHarmonics = (dataTable: DataTable, settings: BakeSettings): DataTable => {
+    const inputBands = { '9': 1, '24': 2, '-1': 3 }[shNames.findIndex(v => !dataTable.hasColumn(v))] ?? 0;
+    if (inputBands === 0 || dataTable.numRows === 0) {
+        return dataTable;
+    }
+
+    const inputCoeffs = [0, 3, 8, 15][inputBands];
+    const maxColorError = settings.maxColorError ?? 2 / 255;
+    const { numRows } = dataTable;
+
+    const cameras = settings.cameras.map(camera => camera.position);
+    const numChecks = cameras.length;
+    const fitIndices = subsample(cameras.map((_, m) => m), numFitDirections);
+    const [x, y, z] = ['x', 'y', 'z'].map(name => dataTable.getColumnByName(name).data);
+    const sh = shNames.slice(0, inputCoeffs * 3).map(name => dataTable.getColumnByName(name).data);
+
+    const basis = new Float64Array(numChecks * 15);
+    const exact = new Float64Array(numChecks * 3);
+    const normal = new Float64Array(9 * 9);
+    const rhs = new Float64Array(9 * 3);
+    const maxOutliers = Math.floor(numRows * maxOutlierFraction);
+
+    // fit every splat with the given band count. returns null as soon as too many splats
+    // exceed the error bound, so failing band counts are cheap to rule out.
+    const fit = (bands: number) => {
+        const coeffs = [0, 3, 8][bands];
+        const n = 1 + coeffs;
+        const dc = new Float32Array(numRows * 3);
+        const result = new Float32Array(numRows * coeffs * 3);
+        let outliers = 0;
+        let maxError = 0;
+
+        for (let i = 0; i < numRows; ++i) {
+            // exact view dependent color from each camera
+            for (let m = 0; m < numChecks; ++m) {
+                const [px, py, pz] = cameras[m];
+                let dx = x[i] - px, dy = y[i] - py, dz = z[i] - pz;
+                const len = Math.sqrt(dx * dx + dy * dy + dz * dz) || 1;
+                dx /= len; dy /= len; dz /= len;
+                evalBasis(dx, dy, dz, basis, m * 15);
+
+                for (let c = 0; c < 3; ++c) {
+                    let sum = 0;
+                    for (let k = 0; k < inputCoeffs; ++k) {
+                        sum += basis[m * 15 + k] * sh[c * inputCoeffs + k][i];
+                    }
+                    exact[m * 3 + c] = sum;
+                }
+            }
+
+            // least squares over a constant plus the first coeffs basis functions
+            normal.fill(0, 0, n * n);
+            rhs.fill(0, 0, n * 3);
+            for (const m of fitIndices) {
+                const row = m * 15 - 1;         // column 0 is the constant
+                for (let a = 0; a < n; ++a) {
+                    const va = a === 0 ? 1 : basis[row + a];
+                    for (let b = 0; b <= a; ++b) {
+                        normal[a * n + b] += va * (b === 0 ? 1 : basis[row + b]);
+                    }
+                    for (let c = 0; c < 3; ++c) {
+                        rhs[c * n + a] += va * exact[m * 3 + c];
+                    }
+                }
+            }
+            for (let a = 1; a < n; ++a) {
+                normal[a * n + a] += ridge * fitIndices.length;
+            }
+            solve(normal, rhs, n);
+
+            // worst color difference from every camera, including those between the fitted ones
+            let error = 0;
+            for (let m = 0; m < numChecks; ++m) {
+                for (let c = 0; c < 3; ++c) {
+                    let approx = rhs[c * n];
+                    for (let k = 1; k < n; ++k) {
+                        approx += rhs[c * n + k] * basis[m * 15 + k - 1];
+                    }
+                    error = Math.max(error, Math.abs(approx - exact[m * 3 + c]));
+                }
+            }
+            maxError = Math.max(maxError, error);
+            if (error > maxColorError && ++outliers > maxOutliers) {
+                logger.debug(`SH bands ${inputBands} -> ${bands}: more than ${maxOutliers} splats exceed ${maxColorError.toFixed(4)} after ${i + 1} of ${numRows}`);
+                return null;
+            }
+
+            for (let c = 0; c < 3; ++c) {
+                dc[i * 3 + c] = rhs[c * n];
+                for (let k = 1; k < n; ++k) {
+                    result[(c * coeffs + k - 1) * numRows + i] = rhs[c * n + k];
+                }
+            }
+        }
+
+        return { bands, coeffs, dc, sh: result, outliers, maxError };
+    };
+
+    let candidate = null;
+    for (let bands = 0; bands < inputBands && !candidate; ++bands) {
+        candidate = fit(bands);
+    }
+
+    if (!candidate) {
+        logger.info(`kept ${inputBands} SH bands: no lower band count reproduces the trajectory's view dependent color within ${maxColorError.toFixed(4)}`);
+        return dataTable;
+    }
+
+    logger.info(`baked SH bands ${inputBands} -> ${candidate.bands} over ${numChecks} view directions, fitted to ${fitIndices.length} (max error ${candidate.maxError.toFixed(4)}, ${candidate.outliers} splats above ${maxColorError.toFixed(4)})`);
+
+    // fold the constant part into the base color and replace the harmonics
+    const columns = dataTable.columns.filter(column => !shNames.includes(column.name)).map((column) => {
+        const c = ['f_dc_0', 'f_dc_1', 'f_dc_2'].indexOf(column.name);
+        if (c === -1) {
+            return column;
+        }
+        const data = new Float32Array(column.data);
+        for (let i = 0; i < numRows; ++i) {
+            data[i] += candidate.dc[i * 3 + c] / SH_C0;
+        }
+        return new Column(column.name, data);
+    });
+
+    for (let k = 0; k < candidate.coeffs * 3; ++k) {
+        columns.push(new Column(shNames[k], candidate.sh.subarray(k * numRows, (k + 1) * numRows)));
+    }
+
+    return new DataTable(columns);
+};
+
+export { BakeSettings, bakeHarmonics };
@@ -0,0 +1,125 @@
+import { Column, DataTable, TypedArray } from './data-table';
+
+// a table that is delivered as a sequence of row blocks instead of being held in memory.
+// blocks() can be called again to restart from the first row. sources holding resources
+// across calls release them in close().
+type BlockSource = {
+    numRows: number;
+    blocks: (blockRows: number) => AsyncGenerator<DataTable>;
+    close?: () => Promise<void>;
+};
+
+// description of a column without its data
+type ColumnSchema = {
+    name: string;
+    type: new (length: number) => TypedArray;
+};
+
+const getSchema = (dataTable: DataTable): ColumnSchema[] => {
+    return dataTable.columns.map(c => ({
+        name: c.name,
+        type: c.data.constructor as new (length: number) => TypedArray
+    }));
+};
+
+// bytes per row of a table with the given schema
+const getRowBytes = (schema: ColumnSchema[]) => {
+    return schema.reduce((total, column) => total + (column.type as any).BYTES_PER_ELEMENT, 0);
+};
+
+// copy rows [start, end) into a new table
+const sliceRows = (dataTable: DataTable, start: number, end: number) => {
+    return new DataTable(dataTable.columns.map(c => new Column(c.name, c.data.slice(start, end))));
+};
+
+// serve an in-memory table as blocks. blocks are copies, since process actions modify
+// their input in place and a source may be read more than once.
+const tableBlockSource = (dataTable: DataTable): BlockSource => {
+    return {
+        numRows: dataTable.numRows,
+        blocks: async function* (blockRows: number) {
+            for (let start = 0; start < dataTable.numRows; start += blockRows) {
+                yield sliceRows(dataTable, start, Math.min(dataTable.numRows, start + blockRows));
+            }
+        }
+    };
+};
+
+// the first block of a source, closing the source afterwards
+const firstBlock = async (source: BlockSource, blockRows: number) => {
+    for await (const block of source.blocks(blockRows)) {
+        return block;
+    }
+    return null;
+};
+
+// return a table with exactly the columns of schema, in schema order. columns of another
+// type are converted and columns missing from the input are zero filled, matching how
+// combine() merges tables with different columns.
+const conformToSchema = (dataTable: DataTable, schema: ColumnSchema[]) => {
+    return new DataTable(schema.map((s) => {
+        const column = dataTable.getColumnByName(s.name);
+        if (!column) {
+            return new Column(s.name, new s.type(dataTable.numRows));
+        }
+        return column.data.constructor === s.type ? column : new Column(s.name, new s.type(column.data));
+    }));
+};
+
+const unsignedTypes: ColumnSchema['type'][] = [Uint8Array, Uint16Array, Uint32Array];
+const signedTypes: ColumnSchema['type'][] = [Int8Array, Int16Array, Int32Array];
+
+// smallest column type holding every value of both types
+const widenType = (a: ColumnSchema['type'], b: ColumnSchema['type']): ColumnSchema['type'] => {
+    if (a === b) {
+        return a;
+    }
+
+    const bytes = (t: ColumnSchema['type']) => (t as any).BYTES_PER_ELEMENT as number;
+    const isFloat = (t: ColumnSchema['type']) => t === Float32Array || t === Float64Array;
+
+    if (isFloat(a) || isFloat(b)) {
+        // float32 holds 16 bit integers exactly, but not 32 bit ones
+        const other = isFloat(a) ? b : a;
+        return a === Float64Array || b === Float64Array || bytes(other) > 2 ? Float64Array : Float32Array;
+    }
+
+    if (unsignedTypes.includes(a) === unsignedTypes.includes(b)) {
+        return bytes(a) > bytes(b) ? a : b;
+    }
+
+    // mixed signedness needs a signed type wider than the unsigned one
+    const unsigned = unsignedTypes.includes(a) ? a : b;
+    const signed = unsigned === a ? b : a;
+    const needed = Math.max(bytes(signed), bytes(unsigned) * 2);
+    return needed > 4 ? Float64Array : signedTypes.find(t => bytes(t) >= needed);
+};
+
+// union of schemas in order of first occurrence. a column appearing with different types
+// gets a type that holds all of them.
+const mergeSchemas = (schemas: ColumnSchema[][]) => {
+    const result: ColumnSchema[] = [];
+    for (const schema of schemas) {
+        for (const column of schema) {
+            const existing = result.find(c => c.name === column.name);
+            if (existing) {
+                existing.type = widenType(existing.type, column.type);
+            } else {
+                result.push({ ...column });
+            }
+        }
+    }
+    return result;
+};
+
+export {
+    BlockSource,
+    ColumnSchema,
+    conformToSchema,
+    firstBlock,
+    getRowBytes,
+    getSchema,
+    mergeSchemas,
+    sliceRows,
+    tableBlockSource
+};
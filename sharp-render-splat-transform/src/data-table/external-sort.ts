@@ -0,0 +1,297 @@
+import { FileHandle, mkdtemp, open, rm } from 'node:fs/promises';
+import { tmpdir } from 'node:os';
+import { join } from 'node:path';
+
+import { ColumnSchema, getRowBytes, sliceRows } from './block-source';
+import { Column, DataTable, TypedArray } from './data-table';
+import { encodeMorton3 } from './morton-order';
+
+type Bounds = {
+    min: [number, number, number];
+    max: [number, number, number];
+};
+
+const createBounds = (): Bounds => ({
+    min: [Infinity, Infinity, Infinity],
+    max: [-Infinity, -Infinity, -Infinity]
+});
+
+// grow bounds to include the splat centers of dataTable
+const updateBounds = (bounds: Bounds, dataTable: DataTable) => {
+    const columns = ['x', 'y', 'z'].map(name => dataTable.getColumnByName(name).data);
+    for (let j = 0; j < 3; ++j) {
+        const data = columns[j];
+        for (let i = 0; i < data.length; ++i) {
+            const v = data[i];
+            if (v < bounds.min[j]) bounds.min[j] = v;
+            if (v > bounds.max[j]) bounds.max[j] = v;
+        }
+    }
+};
+
+// morton code of each row on a 1024^3 grid spanning bounds, as in sortMortonOrder
+const calcMortonCodes = (dataTable: DataTable, bounds: Bounds) => {
+    const [cx, cy, cz] = ['x', 'y', 'z'].map(name => dataTable.getColumnByName(name).data);
+    const [mx, my, mz] = bounds.min;
+    const mul = bounds.min.map((min, j) => {
+        const len = bounds.max[j] - min;
+        return (len > 0 && isFinite(len)) ? 1024 / len : 0;
+    });
+
+    const result = new Uint32Array(dataTable.numRows);
+    for (let i = 0; i < result.length; ++i) {
+        const ix = Math.min(1023, (cx[i] - mx) * mul[0]) >>> 0;
+        const iy = Math.min(1023, (cy[i] - my) * mul[1]) >>> 0;
+        const iz = Math.min(1023, (cz[i] - mz) * mul[2]) >>> 0;
+        result[i] = encodeMorton3(ix, iy, iz);
+    }
+    return result;
+};
+
+// concatenate tables sharing a schema
+const concatRows = (dataTables: DataTable[]) => {
+    if (dataTables.length === 1) {
+        return dataTables[0];
+    }
+    const numRows = dataTables.reduce((total, dataTable) => total + dataTable.numRows, 0);
+    return new DataTable(dataTables[0].columns.map((column, c) => {
+        const data = new (column.data.constructor as new (length: number) => TypedArray)(numRows);
+        let offset = 0;
+        for (const dataTable of dataTables) {
+            data.set(dataTable.columns[c].data, offset);
+            offset += dataTable.numRows;
+        }
+        return new Column(column.name, data);
+    }));
+};
+
+// runs are limited so a 30 bit code and the row index fit the 53 bit float64 mantissa
+const maxRunRows = 0x800000;
+
+// sort rows by morton code. the code and row index are packed into one float64 key so
+// the typed array sort can be used.
+const sortRun = (dataTable: DataTable, bounds: Bounds) => {
+    const codes = calcMortonCodes(dataTable, bounds);
+    const keys = new Float64Array(codes.length);
+    for (let i = 0; i < keys.length; ++i) {
+        keys[i] = codes[i] * maxRunRows + i;
+    }
+    keys.sort();
+
+    const order = new Uint32Array(keys.length);
+    const sortedCodes = new Uint32Array(keys.length);
+    for (let i = 0; i < keys.length; ++i) {
+        order[i] = keys[i] % maxRunRows;
+        sortedCodes[i] = codes[order[i]];
+    }
+
+    return {
+        codes: sortedCodes,
+        rows: dataTable.permuteRows(order)
+    };
+};
+
+// a sorted run on disk. rows are stored in blocks of blockRows, each block holding the
+// codes followed by every column, so a block can be read back one column at a time.
+type Run = {
+    filename: string;
+    numRows: number;
+};
+
+const writeRun = async (filename: string, codes: Uint32Array, rows: DataTable, blockRows: number) => {
+    const handle = await open(filename, 'w');
+    try {
+        for (let start = 0; start < rows.numRows; start += blockRows) {
+            const end = Math.min(rows.numRows, start + blockRows);
+            for (const data of [codes, ...rows.columnData]) {
+                const view = data.subarray(start, end);
+                await handle.write(new Uint8Array(view.buffer, view.byteOffset, view.byteLength));
+            }
+        }
+    } finally {
+        await handle.close();
+    }
+};
+
+// sequential reader over one run, holding a single block in memory
+class RunReader {
+    index: number;
+    run: Run;
+    schema: ColumnSchema[];
+    blockRows: number;
+    rowBytes: number;
+    handle: FileHandle;
+
+    codes: Uint32Array;
+    columns: TypedArray[];
+    blockStart = 0;
+    pos = 0;                    // row index within the current block
+
+    constructor(index: number, run: Run, schema: ColumnSchema[], blockRows: number) {
+        this.index = index;
+        this.run = run;
+        this.schema = schema;
+        this.blockRows = blockRows;
+        this.rowBytes = 4 + getRowBytes(schema);
+    }
+
+    get done() {
+        return this.blockStart + this.pos >= this.run.numRows;
+    }
+
+    get code() {
+        return this.codes[this.pos];
+    }
+
+    async open() {
+        this.handle = await open(this.run.filename, 'r');
+        await this.load(0);
+    }
+
+    async close() {
+        await this.handle?.close();
+    }
+
+    // advance to the next row, loading the next block when the current one is used up
+    async next() {
+        if (++this.pos >= this.codes.length && !this.done) {
+            await this.load(this.blockStart + this.codes.length);
+        }
+    }
+
+    private async load(blockStart: number) {
+        const numRows = Math.min(this.blockRows, this.run.numRows - blockStart);
+        let position = blockStart * this.rowBytes;
+
+        const read = async <T extends TypedArray>(data: T) => {
+            await this.handle.read(new Uint8Array(data.buffer), 0, data.byteLength, position);
+            position += data.byteLength;
+            return data;
+        };
+
+        this.codes = await read(new Uint32Array(numRows));
+        this.columns = [];
+        for (const column of this.schema) {
+            this.columns.push(await read(new column.type(numRows)));
+        }
+        this.blockStart = blockStart;
+        this.pos = 0;
+    }
+}
+
+type ExternalSortOptions = {
+    runRows: number;            // rows sorted in memory at once
+    mergeRows: number;          // rows per run held in memory while merging
+    blockRows: number;          // rows per output block
+};
+
+// sort a stream of row blocks into morton order with bounded memory. the input is cut into
+// runs of runRows rows that are sorted in memory and spilled to temporary files, then the
+// runs are merged. bounds must contain every row. when the whole input fits in a single
+// run, nothing is written to disk.
+const externalMortonSort = async function* (blocks: AsyncIterable<DataTable>, schema: ColumnSchema[], bounds: Bounds, options: ExternalSortOptions): AsyncGenerator<DataTable> {
+    const { mergeRows, blockRows } = options;
+    const runRows = Math.min(options.runRows, maxRunRows);
+
+    let tempDir: string;
+    const runs: Run[] = [];
+    let pending: DataTable[] = [];
+    let pendingRows = 0;
+
+    const spill = async () => {
+        const { codes, rows } = sortRun(concatRows(pending), bounds);
+        pending = [];
+        pendingRows = 0;
+
+        tempDir ??= await mkdtemp(join(tmpdir(), 'splat-transform-'));
+        const run = { filename: join(tempDir, `run-${runs.length}.bin`), numRows: rows.numRows };
+        await writeRun(run.filename, codes, rows, mergeRows);
+        runs.push(run);
+    };
+
+    const readers: RunReader[] = [];
+
+    try {
+        for await (const block of blocks) {
+            pending.push(block);
+            pendingRows += block.numRows;
+            if (pendingRows >= runRows) {
+                await spill();
+            }
+        }
+
+        // everything fit in memory
+        if (runs.length === 0) {
+            if (pendingRows > 0) {
+                const { rows } = sortRun(concatRows(pending), bounds);
+                pending = [];
+                for (let start = 0; start < rows.numRows; start += blockRows) {
+                    yield sliceRows(rows, start, Math.min(rows.numRows, start + blockRows));
+                }
+            }
+            return;
+        }
+
+        if (pendingRows > 0) {
+            await spill();
+        }
+
+        // k-way merge of the sorted runs
+        for (let i = 0; i < runs.length; ++i) {
+            const reader = new RunReader(i, runs[i], schema, mergeRows);
+            await reader.open();
+            readers.push(reader);
+        }
+
+        // binary min-heap of readers ordered by current code, then run index for stability
+        const heap = readers.slice();
+        const less = (a: RunReader, b: RunReader) => a.code < b.code || (a.code === b.code && a.index < b.index);
+        const siftDown = (i: number) => {
+            while (true) {
+                const l = 2 * i + 1;
+                const r = l + 1;
+                let m = i;
+                if (l < heap.length && less(heap[l], heap[m])) m = l;
+                if (r < heap.length && less(heap[r], heap[m])) m = r;
+                if (m === i) break;
+                [heap[i], heap[m]] = [heap[m], heap[i]];
+                i = m;
+            }
+        };
+        for (let i = (heap.length >> 1) - 1; i >= 0; --i) {
+            siftDown(i);
+        }
+
+        const totalRows = runs.reduce((total, run) => total + run.numRows, 0);
+        for (let start = 0; start < totalRows; start += blockRows) {
+            const numRows = Math.min(blockRows, totalRows - start);
+            const out = schema.map(column => new column.type(numRows));
+
+            for (let i = 0; i < numRows; ++i) {
+                const reader = heap[0];
+                const { columns, pos } = reader;
+                for (let c = 0; c < out.length; ++c) {
+                    out[c][i] = columns[c][pos];
+                }
+
+                await reader.next();
+                if (reader.done) {
+                    heap[0] = heap[heap.length - 1];
+                    heap.pop();
+                }
+                siftDown(0);
+            }
+
+            yield new DataTable(schema.map((column, c) => new Column(column.name, out[c])));
+        }
+    } finally {
+        for (const reader of readers) {
+            await reader.close();
+        }
+        if (tempDir) {
+            await rm(tempDir, { recursive: true, force: true });
+        }
+    }
+};
+
+export { Bounds, createBounds, externalMortonSort, updateBounds };
@@ -1,6 +1,21 @@
 import { DataTable } from './data-table';
 import { logger } from '../utils/logger.js';
 
+// interleave the bits of three 10-bit integers
+// https://fgiesen.wordpress.com/2009/12/13/decoding-morton-codes/
+const encodeMorton3 = (x: number, y: number, z: number) : number => {
+    const Part1By2 = (x: number) => {
+        x &= 0x000003ff;
+        x = (x ^ (x << 16)) & 0xff0000ff;
+        x = (x ^ (x <<  8)) & 0x0300f00f;
+        x = (x ^ (x <<  4)) & 0x030c30c3;
+        x = (x ^ (x <<  2)) & 0x09249249;
+        return x;
+    };
+
+    return (Part1By2(z) << 2) + (Part1By2(y) << 1) + Part1By2(x);
+};
+
 // sort the provided indices into morton order
 const sortMortonOrder = (dataTable: DataTable, indices: Uint32Array): void => {
     const cx = dataTable.getColumnByName('x').data;
@@ -8,20 +23,6 @@ const sortMortonOrder = (dataTable: DataTable, indices: Uint32Array): void => {
     const cz = dataTable.getColumnByName('z').data;
 
     const generate = (indices: Uint32Array) => {
-        // https://fgiesen.wordpress.com/2009/12/13/decoding-morton-codes/
-        const encodeMorton3 = (x: number, y: number, z: number) : number => {
-            const Part1By2 = (x: number) => {
-                x &= 0x000003ff;
-                x = (x ^ (x << 16)) & 0xff0000ff;
-                x = (x ^ (x <<  8)) & 0x0300f00f;
-                x = (x ^ (x <<  4)) & 0x030c30c3;
-                x = (x ^ (x <<  2)) & 0x09249249;
-                return x;
-            };
-
-            return (Part1By2(z) << 2) + (Part1By2(y) << 1) + Part1By2(x);
-        };
-
         let mx: number;
         let my: number;
         let mz: number;
@@ -108,4 +109,4 @@ const sortMortonOrder = (dataTable: DataTable, indices: Uint32Array): void => {
     generate(indices);
 };
 
-export { sortMortonOrder };
+export { encodeMorton3, sortMortonOrder };
@@ -1,4 +1,5 @@
 import { lstat, mkdir, readFile as pathReadFile } from 'node:fs/promises';
+import { cpus } from 'node:os';
 import { basename, dirname, join, resolve } from 'node:path';
 import { exit, hrtime } from 'node:process';
 import { parseArgs } from 'node:util';
@@ -6,13 +7,16 @@ import { parseArgs } from 'node:util';
 import { Vec3 } from 'playcanvas';
 
 import { version } from '../package.json';
+import { firstBlock } from './data-table/block-source';
 import { combine } from './data-table/combine';
 import { DataTable } from './data-table/data-table';
 import { enumerateAdapters } from './gpu/gpu-device';
 import { NodeFileSystem } from './node-file-system';
 import { ProcessAction, processDataTable } from './process';
-import { getInputFormat, readFile } from './read';
-import { Options } from './types';
+import { getInputFormat, readFile, readFileBlocks, stdinFilename } from './read';
+import { LccRegion } from './readers/read-lcc';
+import { streamFile, StreamSource } from './stream';
+import { Options, Quality } from './types';
 import { logger } from './utils/logger';
 import { getOutputFormat, writeFile } from './write';
 
@@ -62,6 +66,9 @@ const parseArguments = async () => {
             iterations: { type: 'string', short: 'i', default: '10' },
             'list-gpus': { type: 'boolean', short: 'L', default: false },
             gpu: { type: 'string', short: 'g', default: '-1' },
+            threads: { type: 'string', short: 'j', default: '0' },
+            quality: { type: 'string', short: 'Q', default: 'standard' },
+            'memory-budget': { type: 'string', short: 'M', default: '0' },
             'lod-select': { type: 'string', short: 'O', default: '' },
             'viewer-settings': { type: 'string', short: 'E', default: '' },
             'lod-chunk-count': { type: 'string', short: 'C', default: '512' },
@@ -77,6 +84,8 @@ const parseArguments = async () => {
             'filter-harmonics': { type: 'string', short: 'H', multiple: true },
             'filter-box': { type: 'string', short: 'B', multiple: true },
             'filter-sphere': { type: 'string', short: 'S', multiple: true },
+            'filter-frustum': { type: 'string', short: 'F', multiple: true },
+            'bake-harmonics': { type: 'string', short: 'D', multiple: true },
             params: { type: 'string', short: 'p', multiple: true },
             lod: { type: 'string', short: 'l', multiple: true }
         }
@@ -133,12 +142,27 @@ const parseArguments = async () => {
         }
     }
 
-    const readJsonFile = async (path: string) => {
+    const threads = parseInteger(v.threads);
+    if (threads < 0) {
+        throw new Error(`Invalid threads value: ${threads}. Must be >= 0.`);
+    }
+
+    const quality = v.quality.toLowerCase();
+    if (!['preview', 'standard', 'archival'].includes(quality)) {
+        throw new Error(`Invalid quality value: ${v.quality}. Must be preview, standard or archival.`);
+    }
+
+    const memoryBudget = parseNumber(v['memory-budget']);
+    if (memoryBudget < 0) {
+        throw new Error(`Invalid memory-budget value: ${memoryBudget}. Must be >= 0.`);
+    }
+
+    const readJsonFile = async (path: string, description = 'viewer settings') => {
         const content = await pathReadFile(path, 'utf-8');
         try {
             return JSON.parse(content);
         } catch (e) {
-            throw new Error(`Failed to parse viewer settings JSON file: ${path}`);
+            throw new Error(`Failed to parse ${description} JSON file: ${path}`);
         }
     };
 
@@ -152,7 +176,10 @@ const parseArguments = async () => {
         iterations: parseInteger(v.iterations),
         listGpus: v['list-gpus'],
         deviceIdx,
-        lodSelect: v['lod-select'].split(',').filter(v => !!v).map(parseInteger),
+        threads: threads === 0 ? cpus().length : threads,
+        quality: quality as Quality,
+        memoryBudget,
+        lodSelect: v['lod-select'] === 'auto' ? 'auto' : v['lod-select'].split(',').filter(v => !!v).map(parseInteger),
         viewerSettingsJson: viewerSettingsPath && await readJsonFile(viewerSettingsPath),
         unbundled: v.unbundled,
         lodChunkCount: parseInteger(v['lod-chunk-count']),
@@ -252,6 +279,37 @@ const parseArguments = async () => {
                     });
                     break;
                 }
+                case 'filter-frustum': {
+                    const settings = await readJsonFile(t.value, 'camera');
+                    if (!Array.isArray(settings?.cameras) || settings.cameras.length === 0) {
+                        throw new Error(`Invalid filter-frustum file: ${t.value}. Must contain a non-empty cameras array.`);
+                    }
+                    current.processActions.push({
+                        kind: 'filterFrustum',
+                        settings: {
+                            width: settings.width ?? 1920,
+                            height: settings.height ?? 1080,
+                            fov: settings.fov ?? 50,
+                            minPixelSize: settings.minPixelSize ?? 0,
+                            cameras: settings.cameras
+                        }
+                    });
+                    break;
+                }
+                case 'bake-harmonics': {
+                    const settings = await readJsonFile(t.value, 'camera');
+                    if (!Array.isArray(settings?.cameras) || settings.cameras.length === 0) {
+                        throw new Error(`Invalid bake-harmonics file: ${t.value}. Must contain a non-empty cameras array.`);
+                    }
+                    current.processActions.push({
+                        kind: 'bakeHarmonics',
+                        settings: {
+                            cameras: settings.cameras,
+                            maxColorError: settings.maxColorError
+                        }
+                    });
+                    break;
+                }
                 case 'params': {
                     const params = t.value.split(',').map((p: string) => p.trim());
                     for (const param of params) {
@@ -291,6 +349,7 @@ USAGE
 
   • Input files become the working set; ACTIONS are applied in order.
   • The last file is the output; actions after it modify the final result.
+  • An input of '-' reads binary PLY data from stdin.
 
 SUPPORTED INPUTS
     .ply   .compressed.ply   .sog   meta.json   .ksplat   .splat   .spz   .mjs   .lcc
@@ -308,6 +367,11 @@ ACTIONS (can be repeated, in any order)
     -S, --filter-sphere    <x,y,z,radius>   Remove Gaussians outside sphere (center, radius)
     -V, --filter-value     <name,cmp,value> Keep Gaussians where <name> <cmp> <value>
                                               cmp ∈ {lt,lte,gt,gte,eq,neq}
+    -F, --filter-frustum   <cameras.json>   Remove Gaussians outside every camera frustum or
+                                              smaller than minPixelSize on screen
+    -D, --bake-harmonics   <cameras.json>   Refit spherical harmonics to the fewest bands that
+                                              reproduce the color seen from every camera within
+                                              maxColorError (default 2/255), else keep them
     -p, --params           <key=val,...>    Pass parameters to .mjs generator script
     -l, --lod              <n>              Specify the level of detail, n >= 0
 
@@ -319,9 +383,18 @@ GLOBAL OPTIONS
     -i, --iterations       <n>              Iterations for SOG SH compression (more=better). Default: 10
     -L, --list-gpus                         List available GPU adapters and exit
     -g, --gpu              <n|cpu>          Select device for SOG compression: GPU adapter index | 'cpu'
+    -j, --threads          <n>              Worker threads for SOG compression, 0 = one per CPU. Default: 0
+    -Q, --quality          <tier>           SOG encoding tier: preview | standard | archival. Default: standard
+                                              preview: fewer iterations, SH bands <= 1, lossy WebP
+    -M, --memory-budget    <MB>             Stream the conversion in row blocks within this memory
+                                              budget, 0 = load the whole scene. .ply, .splat, .ksplat
+                                              and .lcc inputs, .ply, .compressed.ply or .csv output
+                                              only. Default: 0
     -E, --viewer-settings  <settings.json>  HTML viewer settings JSON file
     -U, --unbundled                         Generate unbundled HTML viewer with separate files
-    -O, --lod-select       <n,n,...>        Comma-separated LOD levels to read from LCC input
+    -O, --lod-select       <n,n,...|auto>   Comma-separated LOD levels to read from LCC input, or
+                                              'auto' to read each unit at a LOD chosen by its
+                                              distance to the input's --filter-frustum cameras
     -C, --lod-chunk-count  <n>              Approximate number of Gaussians per LOD chunk in K. Default: 512
     -X, --lod-chunk-extent <n>              Approximate size of an LOD chunk in world units (m). Default: 16
 
@@ -338,6 +411,24 @@ EXAMPLES
     # Generate synthetic splats using a generator script
     splat-transform gen-grid.mjs -p width=500,height=500,scale=0.1 grid.ply
 
+    # Read PLY data piped from another process
+    cat scene.ply | splat-transform - scene.sog
+
+    # Fast, small preview viewer
+    splat-transform -Q preview scene.ply scene-preview.html
+
+    # Convert a scene larger than RAM to compressed PLY within 2 GB
+    splat-transform -M 2048 huge.ply huge.compressed.ply
+
+    # Keep only Gaussians visible from a camera trajectory
+    splat-transform scene.ply scene-viewer.html -F cameras.json
+
+    # Cull and reduce the harmonics to what a fixed camera trajectory can see
+    splat-transform scene.ply scene-orbit.html -F cameras.json -D cameras.json
+
+    # Read only the part of a large LCC scene a camera trajectory sees, finer near the cameras
+    splat-transform -O auto city.lcc -F cameras.json city-orbit.html
+
     # Generate LOD with custom chunk size and node split size
     splat-transform -O 0,1,2 -C 1024 -X 32 input.lcc output/lod-meta.json
 `;
@@ -390,6 +481,11 @@ const main = async () => {
     const inputArgs = files.slice(0, -1);
     const outputArg = files[files.length - 1];
 
+    if (inputArgs.filter(f => f.filename === stdinFilename).length > 1) {
+        logger.error('Only one input can be read from stdin.');
+        exit(1);
+    }
+
     const outputFilename = resolve(outputArg.filename);
     const outputFormat = getOutputFormat(outputFilename, options);
 
@@ -422,40 +518,57 @@ const main = async () => {
         }
     }
 
-    try {
-        // read, filter, process input files
-        const inputDataTables = (await Promise.all(inputArgs.map(async (inputArg) => {
-            // extract params
-            const params = inputArg.processActions.filter(a => a.kind === 'param').map((p) => {
-                return { name: p.name, value: p.value };
-            });
+    // filters ahead of the first transform are in file coordinates, so tiled inputs can
+    // skip the parts of the scene they would remove
+    const getRegions = (inputArg: File) => {
+        const firstTransform = inputArg.processActions.findIndex(a => ['translate', 'rotate', 'scale'].includes(a.kind));
+        return inputArg.processActions
+        .slice(0, firstTransform === -1 ? undefined : firstTransform)
+        .filter((a): a is LccRegion => ['filterBox', 'filterSphere', 'filterFrustum'].includes(a.kind));
+    };
 
-            // read input
-            const filename = resolve(inputArg.filename);
-            const inputFormat = getInputFormat(filename);
-            const dataTables = await readFile({
-                filename,
-                inputFormat,
-                options,
-                params
-            });
+    // read, validate and process an input file in memory
+    const readInput = async (inputArg: File) => {
+        // extract params
+        const params = inputArg.processActions.filter(a => a.kind === 'param').map((p) => {
+            return { name: p.name, value: p.value };
+        });
+
+        const regions = getRegions(inputArg);
+
+        // read input
+        const filename = inputArg.filename === stdinFilename ? stdinFilename : resolve(inputArg.filename);
+        const inputFormat = getInputFormat(filename);
+        const dataTables = await readFile({
+            filename,
+            inputFormat,
+            options,
+            params,
+            regions
+        });
+
+        for (let i = 0; i < dataTables.length; ++i) {
+            const dataTable = dataTables[i];
+
+            if (dataTable.numRows === 0 || !isGSDataTable(dataTable)) {
+                throw new Error(`Unsupported data in file '${inputArg.filename}'`);
+            }
 
-            for (let i = 0; i < dataTables.length; ++i) {
-                const dataTable = dataTables[i];
+            dataTables[i] = processDataTable(dataTable, inputArg.processActions);
+        }
 
-                if (dataTable.numRows === 0 || !isGSDataTable(dataTable)) {
-                    throw new Error(`Unsupported data in file '${inputArg.filename}'`);
-                }
+        return dataTables;
+    };
 
-                dataTables[i] = processDataTable(dataTable, inputArg.processActions);
-            }
+    const isEnvDataTable = (dt: DataTable) => dt.hasColumn('lod') && dt.getColumnByName('lod').data.every(v => v === -1);
 
-            return dataTables;
-        }))).flat(1).filter(dataTable => dataTable !== null);
+    const convertInMemory = async () => {
+        // read, filter, process input files
+        const inputDataTables = (await Promise.all(inputArgs.map(readInput))).flat(1).filter(dataTable => dataTable !== null);
 
         // special-case the environment dataTable
-        const envDataTables = inputDataTables.filter(dt => dt.hasColumn('lod') && dt.getColumnByName('lod').data.every(v => v === -1));
-        const nonEnvDataTables = inputDataTables.filter(dt => !dt.hasColumn('lod') || dt.getColumnByName('lod').data.some(v => v !== -1));
+        const envDataTables = inputDataTables.filter(isEnvDataTable);
+        const nonEnvDataTables = inputDataTables.filter(dt => !isEnvDataTable(dt));
 
         // combine inputs into a single output dataTable
         const dataTable = nonEnvDataTables.length > 0 && processDataTable(
@@ -482,6 +595,46 @@ const main = async () => {
             envDataTable,
             options
         }, new NodeFileSystem());
+    };
+
+    try {
+        if (options.memoryBudget > 0) {
+            // formats that are decoded whole are rejected by readFileBlocks rather than
+            // silently loaded, which the budget couldn't bound
+            const sources: StreamSource[] = [];
+
+            for (const inputArg of inputArgs) {
+                const filename = inputArg.filename === stdinFilename ? stdinFilename : resolve(inputArg.filename);
+                const source = await readFileBlocks({
+                    filename,
+                    inputFormat: getInputFormat(filename),
+                    options,
+                    params: [],
+                    regions: getRegions(inputArg)
+                });
+                const block = source.numRows > 0 && await firstBlock(source, 1);
+                if (!block || !isGSDataTable(block)) {
+                    throw new Error(`Unsupported data in file '${inputArg.filename}'`);
+                }
+                sources.push({ source, processActions: inputArg.processActions });
+            }
+
+            try {
+                await streamFile({
+                    filename: outputFilename,
+                    outputFormat,
+                    sources,
+                    processActions: outputArg.processActions,
+                    options
+                }, new NodeFileSystem());
+            } finally {
+                for (const { source } of sources) {
+                    await source.close?.();
+                }
+            }
+        } else {
+            await convertInMemory();
+        }
     } catch (err) {
         // handle errors
         logger.error(err);
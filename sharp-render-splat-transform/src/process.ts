@@ -1,7 +1,9 @@
 import { Quat, Vec3 } from 'playcanvas';
 
+import { BakeSettings, bakeHarmonics } from './data-table/bake-harmonics';
 import { Column, DataTable } from './data-table/data-table';
 import { transform } from './data-table/transform';
+import { CullSettings, dropSplatIndex, frustumCull } from './spatial/frustum-cull';
 
 type Translate = {
     kind: 'translate';
@@ -46,6 +48,16 @@ type FilterSphere = {
     radius: number;
 };
 
+type FilterFrustum = {
+    kind: 'filterFrustum';
+    settings: CullSettings;
+};
+
+type BakeHarmonics = {
+    kind: 'bakeHarmonics';
+    settings: BakeSettings;
+};
+
 type Param = {
     kind: 'param';
     name: string;
@@ -57,7 +69,7 @@ type Lod = {
     value: number;
 };
 
-type ProcessAction = Translate | Rotate | Scale | FilterNaN | FilterByValue | FilterBands | FilterBox | FilterSphere | Param | Lod;
+type ProcessAction = Translate | Rotate | Scale | FilterNaN | FilterByValue | FilterBands | FilterBox | FilterSphere | FilterFrustum | BakeHarmonics | Param | Lod;
 
 const shNames = new Array(45).fill('').map((_, i) => `f_rest_${i}`);
 
@@ -85,8 +97,10 @@ const processDataTable = (dataTable: DataTable, processActions: ProcessAction[])
         const processAction = processActions[i];
 
         switch (processAction.kind) {
+            // transforms move splats in place, so a cull index built over the table is stale
             case 'translate':
                 transform(result, processAction.value, Quat.IDENTITY, 1);
+                dropSplatIndex(result);
                 break;
             case 'rotate':
                 transform(result, Vec3.ZERO, new Quat().setFromEulerAngles(
@@ -94,9 +108,11 @@ const processDataTable = (dataTable: DataTable, processActions: ProcessAction[])
                     processAction.value.y,
                     processAction.value.z
                 ), 1);
+                dropSplatIndex(result);
                 break;
             case 'scale':
                 transform(result, Vec3.ZERO, Quat.IDENTITY, processAction.value);
+                dropSplatIndex(result);
                 break;
             case 'filterNaN': {
                 const infOk = new Set(['opacity']);
@@ -177,6 +193,14 @@ const processDataTable = (dataTable: DataTable, processActions: ProcessAction[])
                 result = filter(result, predicate);
                 break;
             }
+            case 'filterFrustum': {
+                result = result.permuteRows(frustumCull(result, processAction.settings));
+                break;
+            }
+            case 'bakeHarmonics': {
+                result = bakeHarmonics(result, processAction.settings);
+                break;
+            }
             case 'param': {
                 // skip params
                 break;
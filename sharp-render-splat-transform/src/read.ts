@@ -1,22 +1,30 @@
 import { open } from 'node:fs/promises';
+import { stdin } from 'node:process';
 
+import { BlockSource } from './data-table/block-source';
 import { DataTable } from './data-table/data-table';
-import { readKsplat } from './readers/read-ksplat';
-import { readLcc } from './readers/read-lcc';
+import { readKsplat, readKsplatBlocks } from './readers/read-ksplat';
+import { LccRegion, readLcc, readLccBlocks } from './readers/read-lcc';
 import { readMjs } from './readers/read-mjs';
-import { readPly } from './readers/read-ply';
+import { readPly, readPlyBlocks } from './readers/read-ply';
 import { readSog } from './readers/read-sog';
-import { readSplat } from './readers/read-splat';
+import { readSplat, readSplatBlocks } from './readers/read-splat';
 import { readSpz } from './readers/read-spz';
+import { StreamReader } from './readers/stream-reader';
 import { Options, Param } from './types';
 import { logger } from './utils/logger';
 
 type InputFormat = 'mjs' | 'ksplat' | 'splat' | 'sog' | 'ply' | 'spz' | 'lcc';
 
+// input filename for binary PLY data piped to stdin
+const stdinFilename = '-';
+
 const getInputFormat = (filename: string): InputFormat => {
     const lowerFilename = filename.toLowerCase();
 
-    if (lowerFilename.endsWith('.mjs')) {
+    if (filename === stdinFilename) {
+        return 'ply';
+    } else if (lowerFilename.endsWith('.mjs')) {
         return 'mjs';
     } else if (lowerFilename.endsWith('.ksplat')) {
         return 'ksplat';
@@ -40,17 +48,22 @@ type ReadFileOptions = {
     inputFormat: InputFormat;
     options: Options;
     params: Param[];
+    regions?: LccRegion[];      // filters in file coordinates, so tiled inputs read only what they keep
 };
 
 const readFile = async (readFileOptions: ReadFileOptions): Promise<DataTable[]> => {
-    const { filename, inputFormat, options, params } = readFileOptions;
+    const { filename, inputFormat, options, params, regions } = readFileOptions;
 
     let result: DataTable[];
 
-    logger.info(`reading '${filename}'...`);
+    logger.info(`reading '${filename === stdinFilename ? 'stdin' : filename}'...`);
 
     if (inputFormat === 'mjs') {
         result = [await readMjs(filename, params)];
+    } else if (filename === stdinFilename) {
+        const reader = new StreamReader(stdin);
+        result = [await readPly(reader)];
+        await reader.close();
     } else {
         const inputFile = await open(filename, 'r');
 
@@ -65,7 +78,7 @@ const readFile = async (readFileOptions: ReadFileOptions): Promise<DataTable[]>
         } else if (inputFormat === 'spz') {
             result = [await readSpz(inputFile)];
         } else if (inputFormat === 'lcc') {
-            result = await readLcc(inputFile, filename, options);
+            result = await readLcc(inputFile, filename, options, regions);
         }
 
         await inputFile.close();
@@ -74,4 +87,30 @@ const readFile = async (readFileOptions: ReadFileOptions): Promise<DataTable[]>
     return result;
 };
 
-export { readFile, getInputFormat, type InputFormat };
+// open an input as a source of row blocks. .spz inflates every attribute of the scene
+// from one gzip stream, .sog decodes whole textures and .mjs generates the scene in
+// memory, so those and stdin can't be read in blocks.
+const readFileBlocks = async (readFileOptions: ReadFileOptions): Promise<BlockSource> => {
+    const { filename, inputFormat, options, regions } = readFileOptions;
+
+    if (filename === stdinFilename || !['ply', 'splat', 'ksplat', 'lcc'].includes(inputFormat)) {
+        throw new Error(`--memory-budget reads .ply, .compressed.ply, .splat, .ksplat and .lcc inputs in blocks and cannot bound '${filename === stdinFilename ? 'stdin' : filename}', which is loaded whole. Convert it to PLY first or omit the budget`);
+    }
+
+    logger.info(`reading '${filename}' in blocks...`);
+
+    switch (inputFormat) {
+        case 'splat':
+            return readSplatBlocks(filename);
+        case 'ksplat':
+            return readKsplatBlocks(filename);
+        case 'lcc':
+            // the stream makes several passes over its inputs, so keep decoded units for
+            // the next one within an eighth of the budget
+            return readLccBlocks(filename, options, regions, options.memoryBudget * 1024 * 1024 / 8);
+        default:
+            return readPlyBlocks(filename);
+    }
+};
+
+export { readFile, readFileBlocks, getInputFormat, stdinFilename, type InputFormat };
@@ -231,4 +231,4 @@ const decompressPly = (ply: PlyData): DataTable => {
     return result;
 };
 
-export { isCompressedPly, decompressPly };
+export { CHUNK_SIZE as COMPRESSED_CHUNK_SIZE, isCompressedPly, decompressPly };
@@ -1,6 +1,7 @@
 import { Buffer } from 'node:buffer';
-import { FileHandle } from 'node:fs/promises';
+import { FileHandle, open } from 'node:fs/promises';
 
+import { BlockSource } from '../data-table/block-source';
 import { Column, DataTable } from '../data-table/data-table';
 
 // Format configuration for different compression modes
@@ -92,23 +93,48 @@ const COMPRESSION_MODES: CompressionConfig[] = [
 
 const HARMONICS_COMPONENT_COUNT = [0, 9, 24, 45];
 
-const readKsplat = async (fileHandle: FileHandle): Promise<DataTable> => {
-    const stats = await fileHandle.stat();
-    const totalSize = stats.size;
+const MAIN_HEADER_SIZE = 4096;
+const SECTION_HEADER_SIZE = 1024;
+
+// layout of one section of splats
+type KsplatSection = {
+    splatCount: number;
+    bucketCapacity: number;
+    bucketCount: number;
+    fullBuckets: number;
+    partialBuckets: number;
+    positionScale: number;
+    quantizationRange: number;
+    harmonicsComponentCount: number;
+    bytesPerSplat: number;
+    bucketOffset: number;       // file offset of the partial bucket sizes and bucket centers
+    bucketStorageSize: number;  // total size of the partial bucket sizes and bucket centers
+    dataOffset: number;         // file offset of the splat data
+};
 
-    // Load complete file
-    const fileBuffer = Buffer.alloc(totalSize);
-    await fileHandle.read(fileBuffer, 0, totalSize, 0);
+type KsplatHeader = {
+    numSplats: number;
+    compressionMode: number;
+    minHarmonicsValue: number;
+    maxHarmonicsValue: number;
+    maxHarmonicsDegree: number;
+    sections: KsplatSection[];
+};
 
-    const MAIN_HEADER_SIZE = 4096;
-    const SECTION_HEADER_SIZE = 1024;
+// bucket data of a section, needed to decode the positions of its splats
+type KsplatBuckets = {
+    centers: Float32Array;
+    partialStarts: Uint32Array;     // first splat of each partial bucket, plus the end
+};
 
+// parse the main header and section headers, which come first in the file
+const parseHeader = (headerData: Buffer, totalSize: number): KsplatHeader => {
     if (totalSize < MAIN_HEADER_SIZE) {
         throw new Error('File too small to be valid .ksplat format');
     }
 
     // Parse main header
-    const mainHeader = new DataView(fileBuffer.buffer, fileBuffer.byteOffset, MAIN_HEADER_SIZE);
+    const mainHeader = new DataView(headerData.buffer, headerData.byteOffset, MAIN_HEADER_SIZE);
 
     const majorVersion = mainHeader.getUint8(0);
     const minorVersion = mainHeader.getUint8(1);
@@ -131,19 +157,102 @@ const readKsplat = async (fileHandle: FileHandle): Promise<DataTable> => {
         throw new Error('Invalid .ksplat file: file is empty');
     }
 
-    // First pass: scan all sections to find maximum harmonics degree
+    if (headerData.length < MAIN_HEADER_SIZE + maxSections * SECTION_HEADER_SIZE) {
+        throw new Error('File too small to be valid .ksplat format');
+    }
+
+    const {
+        centerBytes,
+        scaleBytes,
+        rotationBytes,
+        colorBytes,
+        harmonicsBytes,
+        scaleQuantRange
+    } = COMPRESSION_MODES[compressionMode];
+
     let maxHarmonicsDegree = 0;
+    let currentSectionDataOffset = MAIN_HEADER_SIZE + maxSections * SECTION_HEADER_SIZE;
+    const sections: KsplatSection[] = [];
+
     for (let sectionIdx = 0; sectionIdx < maxSections; sectionIdx++) {
         const sectionHeaderOffset = MAIN_HEADER_SIZE + sectionIdx * SECTION_HEADER_SIZE;
-        const sectionHeader = new DataView(fileBuffer.buffer, fileBuffer.byteOffset + sectionHeaderOffset, SECTION_HEADER_SIZE);
+        const sectionHeader = new DataView(headerData.buffer, headerData.byteOffset + sectionHeaderOffset, SECTION_HEADER_SIZE);
 
         const sectionSplatCount = sectionHeader.getUint32(0, true);
-        if (sectionSplatCount === 0) continue; // Skip empty sections
-
+        const maxSectionSplats = sectionHeader.getUint32(4, true);
+        const bucketCapacity = sectionHeader.getUint32(8, true);
+        const bucketCount = sectionHeader.getUint32(12, true);
+        const spatialBlockSize = sectionHeader.getFloat32(16, true);
+        const bucketStorageSize = sectionHeader.getUint16(20, true);
+        const quantizationRange = sectionHeader.getUint32(24, true) || scaleQuantRange;
+        const fullBuckets = sectionHeader.getUint32(32, true);
+        const partialBuckets = sectionHeader.getUint32(36, true);
         const harmonicsDegree = sectionHeader.getUint16(40, true);
-        maxHarmonicsDegree = Math.max(maxHarmonicsDegree, harmonicsDegree);
+
+        // empty sections don't count towards the harmonics degree
+        if (sectionSplatCount > 0) {
+            maxHarmonicsDegree = Math.max(maxHarmonicsDegree, harmonicsDegree);
+        }
+
+        // Calculate layout
+        const partialBucketMetaSize = partialBuckets * 4;
+        const totalBucketStorageSize = bucketStorageSize * bucketCount + partialBucketMetaSize;
+        const harmonicsComponentCount = HARMONICS_COMPONENT_COUNT[harmonicsDegree];
+        const bytesPerSplat = centerBytes + scaleBytes + rotationBytes +
+                             colorBytes + harmonicsComponentCount * harmonicsBytes;
+        const sectionDataSize = bytesPerSplat * maxSectionSplats;
+
+        sections.push({
+            splatCount: sectionSplatCount,
+            bucketCapacity,
+            bucketCount,
+            fullBuckets,
+            partialBuckets,
+            // Calculate decompression parameters
+            positionScale: spatialBlockSize / 2.0 / quantizationRange,
+            quantizationRange,
+            harmonicsComponentCount,
+            bytesPerSplat,
+            bucketOffset: currentSectionDataOffset,
+            bucketStorageSize: totalBucketStorageSize,
+            dataOffset: currentSectionDataOffset + totalBucketStorageSize
+        });
+
+        currentSectionDataOffset += sectionDataSize + totalBucketStorageSize;
+    }
+
+    return {
+        numSplats,
+        compressionMode,
+        minHarmonicsValue,
+        maxHarmonicsValue,
+        maxHarmonicsDegree,
+        sections
+    };
+};
+
+// read the bucket centers and partial bucket sizes of a section from its bucket storage
+const parseBuckets = (section: KsplatSection, bucketData: Buffer): KsplatBuckets => {
+    const { partialBuckets, bucketCount, fullBuckets, bucketCapacity } = section;
+    const partialBucketMetaSize = partialBuckets * 4;
+
+    // Get bucket centers
+    const centers = new Float32Array(bucketCount * 3);
+    for (let i = 0; i < centers.length; i++) {
+        centers[i] = bucketData.readFloatLE(partialBucketMetaSize + i * 4);
     }
 
+    // Get partial bucket sizes
+    const partialStarts = new Uint32Array(partialBuckets + 1);
+    partialStarts[0] = fullBuckets * bucketCapacity;
+    for (let i = 0; i < partialBuckets; i++) {
+        partialStarts[i + 1] = partialStarts[i] + bucketData.readUInt32LE(i * 4);
+    }
+
+    return { centers, partialStarts };
+};
+
+const createColumns = (numSplats: number, maxHarmonicsDegree: number) => {
     // Initialize data storage with base columns
     const columns: Column[] = [
         new Column('x', new Float32Array(numSplats)),
@@ -168,196 +277,186 @@ const readKsplat = async (fileHandle: FileHandle): Promise<DataTable> => {
         columns.push(new Column(`f_rest_${i}`, new Float32Array(numSplats)));
     }
 
+    return columns;
+};
+
+// decode splats [first, first + count) of a section into columns starting at row start.
+// splatData holds the section's splat data from splat first onwards.
+const decodeSection = (
+    header: KsplatHeader,
+    section: KsplatSection,
+    buckets: KsplatBuckets,
+    splatData: DataView,
+    first: number,
+    count: number,
+    columns: Column[],
+    start: number
+) => {
+    const { compressionMode, minHarmonicsValue, maxHarmonicsValue } = header;
+    const { bucketCapacity, fullBuckets, positionScale, quantizationRange, harmonicsComponentCount, bytesPerSplat } = section;
+    const { centers: bucketCenters, partialStarts } = buckets;
     const {
-        centerBytes,
-        scaleBytes,
-        rotationBytes,
-        colorBytes,
-        harmonicsBytes,
         scaleStartByte,
         rotationStartByte,
         colorStartByte,
-        harmonicsStartByte,
-        scaleQuantRange
+        harmonicsStartByte
     } = COMPRESSION_MODES[compressionMode];
 
-    let currentSectionDataOffset = MAIN_HEADER_SIZE + maxSections * SECTION_HEADER_SIZE;
-    let splatIndex = 0;
-
-    // Process each section
-    for (let sectionIdx = 0; sectionIdx < maxSections; sectionIdx++) {
-        const sectionHeaderOffset = MAIN_HEADER_SIZE + sectionIdx * SECTION_HEADER_SIZE;
-        const sectionHeader = new DataView(fileBuffer.buffer, fileBuffer.byteOffset + sectionHeaderOffset, SECTION_HEADER_SIZE);
-
-        const sectionSplatCount = sectionHeader.getUint32(0, true);
-        const maxSectionSplats = sectionHeader.getUint32(4, true);
-        const bucketCapacity = sectionHeader.getUint32(8, true);
-        const bucketCount = sectionHeader.getUint32(12, true);
-        const spatialBlockSize = sectionHeader.getFloat32(16, true);
-        const bucketStorageSize = sectionHeader.getUint16(20, true);
-        const quantizationRange = sectionHeader.getUint32(24, true) || scaleQuantRange;
-        const fullBuckets = sectionHeader.getUint32(32, true);
-        const partialBuckets = sectionHeader.getUint32(36, true);
-        const harmonicsDegree = sectionHeader.getUint16(40, true);
+    // Harmonic value decoder
+    const decodeHarmonics = (offset: number, component: number): number => {
+        switch (compressionMode) {
+            case 0:
+                return splatData.getFloat32(offset + harmonicsStartByte + component * 4, true);
+            case 1:
+                return decodeFloat16(splatData.getUint16(offset + harmonicsStartByte + component * 2, true));
+            case 2: {
+                const normalized = splatData.getUint8(offset + harmonicsStartByte + component) / 255;
+                return minHarmonicsValue + normalized * (maxHarmonicsValue - minHarmonicsValue);
+            }
+            default:
+                return 0;
+        }
+    };
 
-        // Calculate layout
-        const fullBucketSplats = fullBuckets * bucketCapacity;
-        const partialBucketMetaSize = partialBuckets * 4;
-        const totalBucketStorageSize = bucketStorageSize * bucketCount + partialBucketMetaSize;
-        const harmonicsComponentCount = HARMONICS_COMPONENT_COUNT[harmonicsDegree];
-        const bytesPerSplat = centerBytes + scaleBytes + rotationBytes +
-                             colorBytes + harmonicsComponentCount * harmonicsBytes;
-        const sectionDataSize = bytesPerSplat * maxSectionSplats;
+    // Track partial bucket processing, starting from the partial bucket holding splat first
+    let currentPartial = 0;
+    while (currentPartial < partialStarts.length - 2 && first >= partialStarts[currentPartial + 1]) {
+        currentPartial++;
+    }
 
-        // Calculate decompression parameters
-        const positionScale = spatialBlockSize / 2.0 / quantizationRange;
-
-        // Get bucket centers
-        const bucketCentersOffset = currentSectionDataOffset + partialBucketMetaSize;
-        const bucketCenters = new Float32Array(fileBuffer.buffer, fileBuffer.byteOffset + bucketCentersOffset, bucketCount * 3);
-
-        // Get partial bucket sizes
-        const partialBucketSizes = new Uint32Array(fileBuffer.buffer, fileBuffer.byteOffset + currentSectionDataOffset, partialBuckets);
-
-        // Get splat data
-        const splatDataOffset = currentSectionDataOffset + totalBucketStorageSize;
-        const splatData = new DataView(fileBuffer.buffer, fileBuffer.byteOffset + splatDataOffset, sectionDataSize);
-
-        // Harmonic value decoder
-        const decodeHarmonics = (offset: number, component: number): number => {
-            switch (compressionMode) {
-                case 0:
-                    return splatData.getFloat32(offset + harmonicsStartByte + component * 4, true);
-                case 1:
-                    return decodeFloat16(splatData.getUint16(offset + harmonicsStartByte + component * 2, true));
-                case 2: {
-                    const normalized = splatData.getUint8(offset + harmonicsStartByte + component) / 255;
-                    return minHarmonicsValue + normalized * (maxHarmonicsValue - minHarmonicsValue);
-                }
-                default:
-                    return 0;
+    // Process splats in this section
+    for (let r = 0; r < count; r++) {
+        const splatIdx = first + r;
+        const splatIndex = start + r;
+        const splatByteOffset = r * bytesPerSplat;
+
+        // Determine which bucket this splat belongs to
+        let bucketIdx: number;
+        if (splatIdx < partialStarts[0]) {
+            bucketIdx = Math.floor(splatIdx / bucketCapacity);
+        } else {
+            while (currentPartial < partialStarts.length - 2 && splatIdx >= partialStarts[currentPartial + 1]) {
+                currentPartial++;
             }
-        };
+            bucketIdx = fullBuckets + currentPartial;
+        }
 
-        // Track partial bucket processing
-        let currentPartialBucket = fullBuckets;
-        let currentPartialBase = fullBucketSplats;
+        // Decode position
+        let x: number, y: number, z: number;
+        if (compressionMode === 0) {
+            x = splatData.getFloat32(splatByteOffset, true);
+            y = splatData.getFloat32(splatByteOffset + 4, true);
+            z = splatData.getFloat32(splatByteOffset + 8, true);
+        } else {
+            x = (splatData.getUint16(splatByteOffset, true) - quantizationRange) * positionScale + bucketCenters[bucketIdx * 3];
+            y = (splatData.getUint16(splatByteOffset + 2, true) - quantizationRange) * positionScale + bucketCenters[bucketIdx * 3 + 1];
+            z = (splatData.getUint16(splatByteOffset + 4, true) - quantizationRange) * positionScale + bucketCenters[bucketIdx * 3 + 2];
+        }
 
-        // Process splats in this section
-        for (let splatIdx = 0; splatIdx < sectionSplatCount; splatIdx++) {
-            const splatByteOffset = splatIdx * bytesPerSplat;
+        // Decode scales
+        let scaleX: number, scaleY: number, scaleZ: number;
+        if (compressionMode === 0) {
+            scaleX = splatData.getFloat32(splatByteOffset + scaleStartByte, true);
+            scaleY = splatData.getFloat32(splatByteOffset + scaleStartByte + 4, true);
+            scaleZ = splatData.getFloat32(splatByteOffset + scaleStartByte + 8, true);
+        } else {
+            scaleX = decodeFloat16(splatData.getUint16(splatByteOffset + scaleStartByte, true));
+            scaleY = decodeFloat16(splatData.getUint16(splatByteOffset + scaleStartByte + 2, true));
+            scaleZ = decodeFloat16(splatData.getUint16(splatByteOffset + scaleStartByte + 4, true));
+        }
 
-            // Determine which bucket this splat belongs to
-            let bucketIdx: number;
-            if (splatIdx < fullBucketSplats) {
-                bucketIdx = Math.floor(splatIdx / bucketCapacity);
-            } else {
-                const currentBucketSize = partialBucketSizes[currentPartialBucket - fullBuckets];
-                if (splatIdx >= currentPartialBase + currentBucketSize) {
-                    currentPartialBucket++;
-                    currentPartialBase += currentBucketSize;
-                }
-                bucketIdx = currentPartialBucket;
-            }
+        // Decode rotation quaternion
+        let rot0: number, rot1: number, rot2: number, rot3: number;
+        if (compressionMode === 0) {
+            rot0 = splatData.getFloat32(splatByteOffset + rotationStartByte, true);
+            rot1 = splatData.getFloat32(splatByteOffset + rotationStartByte + 4, true);
+            rot2 = splatData.getFloat32(splatByteOffset + rotationStartByte + 8, true);
+            rot3 = splatData.getFloat32(splatByteOffset + rotationStartByte + 12, true);
+        } else {
+            rot0 = decodeFloat16(splatData.getUint16(splatByteOffset + rotationStartByte, true));
+            rot1 = decodeFloat16(splatData.getUint16(splatByteOffset + rotationStartByte + 2, true));
+            rot2 = decodeFloat16(splatData.getUint16(splatByteOffset + rotationStartByte + 4, true));
+            rot3 = decodeFloat16(splatData.getUint16(splatByteOffset + rotationStartByte + 6, true));
+        }
 
-            // Decode position
-            let x: number, y: number, z: number;
-            if (compressionMode === 0) {
-                x = splatData.getFloat32(splatByteOffset, true);
-                y = splatData.getFloat32(splatByteOffset + 4, true);
-                z = splatData.getFloat32(splatByteOffset + 8, true);
+        // Decode color and opacity
+        const red = splatData.getUint8(splatByteOffset + colorStartByte);
+        const green = splatData.getUint8(splatByteOffset + colorStartByte + 1);
+        const blue = splatData.getUint8(splatByteOffset + colorStartByte + 2);
+        const opacity = splatData.getUint8(splatByteOffset + colorStartByte + 3);
+
+        // Store position
+        (columns[0].data as Float32Array)[splatIndex] = x;
+        (columns[1].data as Float32Array)[splatIndex] = y;
+        (columns[2].data as Float32Array)[splatIndex] = z;
+
+        // Store scale (convert from linear in .ksplat to log scale for internal use)
+        (columns[3].data as Float32Array)[splatIndex] = scaleX > 0 ? Math.log(scaleX) : -10;
+        (columns[4].data as Float32Array)[splatIndex] = scaleY > 0 ? Math.log(scaleY) : -10;
+        (columns[5].data as Float32Array)[splatIndex] = scaleZ > 0 ? Math.log(scaleZ) : -10;
+
+        // Store color (convert from uint8 back to spherical harmonics)
+        const SH_C0 = 0.28209479177387814;
+        (columns[6].data as Float32Array)[splatIndex] = (red / 255.0 - 0.5) / SH_C0;
+        (columns[7].data as Float32Array)[splatIndex] = (green / 255.0 - 0.5) / SH_C0;
+        (columns[8].data as Float32Array)[splatIndex] = (blue / 255.0 - 0.5) / SH_C0;
+
+        // Store opacity (convert from uint8 to float and apply inverse sigmoid)
+        const epsilon = 1e-6;
+        const normalizedOpacity = Math.max(epsilon, Math.min(1.0 - epsilon, opacity / 255.0));
+        (columns[9].data as Float32Array)[splatIndex] = Math.log(normalizedOpacity / (1.0 - normalizedOpacity));
+
+        // Store quaternion
+        (columns[10].data as Float32Array)[splatIndex] = rot0;
+        (columns[11].data as Float32Array)[splatIndex] = rot1;
+        (columns[12].data as Float32Array)[splatIndex] = rot2;
+        (columns[13].data as Float32Array)[splatIndex] = rot3;
+
+        // Store spherical harmonics
+        for (let i = 0; i < harmonicsComponentCount; i++) {
+            let channel;
+            let coeff;
+
+            // band 0 is packed together, then band 1, then band 2.
+            if (i < 9) {
+                channel = Math.floor(i / 3);
+                coeff = i % 3;
+            } else if (i < 24) {
+                channel = Math.floor((i - 9) / 5);
+                coeff = (i - 9) % 5 + 3;
             } else {
-                x = (splatData.getUint16(splatByteOffset, true) - quantizationRange) * positionScale + bucketCenters[bucketIdx * 3];
-                y = (splatData.getUint16(splatByteOffset + 2, true) - quantizationRange) * positionScale + bucketCenters[bucketIdx * 3 + 1];
-                z = (splatData.getUint16(splatByteOffset + 4, true) - quantizationRange) * positionScale + bucketCenters[bucketIdx * 3 + 2];
+                // don't think 3 bands are supported, but here just in case
+                channel = Math.floor((i - 24) / 7);
+                coeff = (i - 24) % 7 + 8;
             }
 
-            // Decode scales
-            let scaleX: number, scaleY: number, scaleZ: number;
-            if (compressionMode === 0) {
-                scaleX = splatData.getFloat32(splatByteOffset + scaleStartByte, true);
-                scaleY = splatData.getFloat32(splatByteOffset + scaleStartByte + 4, true);
-                scaleZ = splatData.getFloat32(splatByteOffset + scaleStartByte + 8, true);
-            } else {
-                scaleX = decodeFloat16(splatData.getUint16(splatByteOffset + scaleStartByte, true));
-                scaleY = decodeFloat16(splatData.getUint16(splatByteOffset + scaleStartByte + 2, true));
-                scaleZ = decodeFloat16(splatData.getUint16(splatByteOffset + scaleStartByte + 4, true));
-            }
+            const col = channel * (harmonicsComponentCount / 3) + coeff;
 
-            // Decode rotation quaternion
-            let rot0: number, rot1: number, rot2: number, rot3: number;
-            if (compressionMode === 0) {
-                rot0 = splatData.getFloat32(splatByteOffset + rotationStartByte, true);
-                rot1 = splatData.getFloat32(splatByteOffset + rotationStartByte + 4, true);
-                rot2 = splatData.getFloat32(splatByteOffset + rotationStartByte + 8, true);
-                rot3 = splatData.getFloat32(splatByteOffset + rotationStartByte + 12, true);
-            } else {
-                rot0 = decodeFloat16(splatData.getUint16(splatByteOffset + rotationStartByte, true));
-                rot1 = decodeFloat16(splatData.getUint16(splatByteOffset + rotationStartByte + 2, true));
-                rot2 = decodeFloat16(splatData.getUint16(splatByteOffset + rotationStartByte + 4, true));
-                rot3 = decodeFloat16(splatData.getUint16(splatByteOffset + rotationStartByte + 6, true));
-            }
+            (columns[14 + col].data as Float32Array)[splatIndex] = decodeHarmonics(splatByteOffset, i);
+        }
+    }
+};
 
-            // Decode color and opacity
-            const red = splatData.getUint8(splatByteOffset + colorStartByte);
-            const green = splatData.getUint8(splatByteOffset + colorStartByte + 1);
-            const blue = splatData.getUint8(splatByteOffset + colorStartByte + 2);
-            const opacity = splatData.getUint8(splatByteOffset + colorStartByte + 3);
-
-            // Store position
-            (columns[0].data as Float32Array)[splatIndex] = x;
-            (columns[1].data as Float32Array)[splatIndex] = y;
-            (columns[2].data as Float32Array)[splatIndex] = z;
-
-            // Store scale (convert from linear in .ksplat to log scale for internal use)
-            (columns[3].data as Float32Array)[splatIndex] = scaleX > 0 ? Math.log(scaleX) : -10;
-            (columns[4].data as Float32Array)[splatIndex] = scaleY > 0 ? Math.log(scaleY) : -10;
-            (columns[5].data as Float32Array)[splatIndex] = scaleZ > 0 ? Math.log(scaleZ) : -10;
-
-            // Store color (convert from uint8 back to spherical harmonics)
-            const SH_C0 = 0.28209479177387814;
-            (columns[6].data as Float32Array)[splatIndex] = (red / 255.0 - 0.5) / SH_C0;
-            (columns[7].data as Float32Array)[splatIndex] = (green / 255.0 - 0.5) / SH_C0;
-            (columns[8].data as Float32Array)[splatIndex] = (blue / 255.0 - 0.5) / SH_C0;
-
-            // Store opacity (convert from uint8 to float and apply inverse sigmoid)
-            const epsilon = 1e-6;
-            const normalizedOpacity = Math.max(epsilon, Math.min(1.0 - epsilon, opacity / 255.0));
-            (columns[9].data as Float32Array)[splatIndex] = Math.log(normalizedOpacity / (1.0 - normalizedOpacity));
-
-            // Store quaternion
-            (columns[10].data as Float32Array)[splatIndex] = rot0;
-            (columns[11].data as Float32Array)[splatIndex] = rot1;
-            (columns[12].data as Float32Array)[splatIndex] = rot2;
-            (columns[13].data as Float32Array)[splatIndex] = rot3;
-
-            // Store spherical harmonics
-            for (let i = 0; i < harmonicsComponentCount; i++) {
-                let channel;
-                let coeff;
-
-                // band 0 is packed together, then band 1, then band 2.
-                if (i < 9) {
-                    channel = Math.floor(i / 3);
-                    coeff = i % 3;
-                } else if (i < 24) {
-                    channel = Math.floor((i - 9) / 5);
-                    coeff = (i - 9) % 5 + 3;
-                } else {
-                    // don't think 3 bands are supported, but here just in case
-                    channel = Math.floor((i - 24) / 7);
-                    coeff = (i - 24) % 7 + 8;
-                }
+const readKsplat = async (fileHandle: FileHandle): Promise<DataTable> => {
+    const stats = await fileHandle.stat();
+    const totalSize = stats.size;
 
-                const col = channel * (harmonicsComponentCount / 3) + coeff;
+    // Load complete file
+    const fileBuffer = Buffer.alloc(totalSize);
+    await fileHandle.read(fileBuffer, 0, totalSize, 0);
 
-                (columns[14 + col].data as Float32Array)[splatIndex] = decodeHarmonics(splatByteOffset, i);
-            }
+    const header = parseHeader(fileBuffer, totalSize);
+    const { numSplats, sections } = header;
+    const columns = createColumns(numSplats, header.maxHarmonicsDegree);
 
-            splatIndex++;
-        }
+    let splatIndex = 0;
 
-        currentSectionDataOffset += sectionDataSize + totalBucketStorageSize;
+    // Process each section
+    for (const section of sections) {
+        const buckets = parseBuckets(section, fileBuffer.subarray(section.bucketOffset, section.bucketOffset + section.bucketStorageSize));
+        const splatData = new DataView(fileBuffer.buffer, fileBuffer.byteOffset + section.dataOffset, section.bytesPerSplat * section.splatCount);
+        decodeSection(header, section, buckets, splatData, 0, section.splatCount, columns, splatIndex);
+        splatIndex += section.splatCount;
     }
 
     if (splatIndex !== numSplats) {
@@ -367,4 +466,78 @@ const readKsplat = async (fileHandle: FileHandle): Promise<DataTable> => {
     return new DataTable(columns);
 };
 
-export { readKsplat };
+const readPart = async (fileHandle: FileHandle, offset: number, size: number) => {
+    const data = Buffer.alloc(size);
+    const { bytesRead } = await fileHandle.read(data, 0, size, offset);
+    if (bytesRead !== size) {
+        throw new Error('Failed to read expected amount of data from .ksplat file');
+    }
+    return data;
+};
+
+// open a .ksplat file as a source of row blocks. the headers and bucket data of every
+// section are kept in memory, splat data is read from the file as blocks are requested.
+const readKsplatBlocks = async (filename: string): Promise<BlockSource> => {
+    const fileHandle = await open(filename, 'r');
+    let header: KsplatHeader;
+    let buckets: KsplatBuckets[];
+    try {
+        const totalSize = (await fileHandle.stat()).size;
+        const mainHeader = await readPart(fileHandle, 0, Math.min(totalSize, MAIN_HEADER_SIZE));
+        const maxSections = totalSize < MAIN_HEADER_SIZE ? 0 : mainHeader.readUInt32LE(4);
+        const headerSize = Math.min(totalSize, MAIN_HEADER_SIZE + maxSections * SECTION_HEADER_SIZE);
+
+        header = parseHeader(await readPart(fileHandle, 0, headerSize), totalSize);
+        buckets = [];
+        for (const section of header.sections) {
+            buckets.push(parseBuckets(section, await readPart(fileHandle, section.bucketOffset, section.bucketStorageSize)));
+        }
+    } finally {
+        await fileHandle.close();
+    }
+
+    const { numSplats, sections } = header;
+    if (sections.reduce((total, section) => total + section.splatCount, 0) !== numSplats) {
+        throw new Error(`Splat count mismatch: expected ${numSplats}`);
+    }
+
+    const blocks = async function* (blockRows: number) {
+        const handle = await open(filename, 'r');
+        try {
+            let sectionIdx = 0;
+            let first = 0;      // next splat of the current section
+            for (let start = 0; start < numSplats; start += blockRows) {
+                const numRows = Math.min(blockRows, numSplats - start);
+                const columns = createColumns(numRows, header.maxHarmonicsDegree);
+
+                // a block can span sections
+                for (let row = 0; row < numRows;) {
+                    const section = sections[sectionIdx];
+                    const count = Math.min(numRows - row, section.splatCount - first);
+                    if (count > 0) {
+                        const data = await readPart(handle, section.dataOffset + first * section.bytesPerSplat, count * section.bytesPerSplat);
+                        const splatData = new DataView(data.buffer, data.byteOffset, data.byteLength);
+                        decodeSection(header, section, buckets[sectionIdx], splatData, first, count, columns, row);
+                        row += count;
+                        first += count;
+                    }
+                    if (first === section.splatCount) {
+                        sectionIdx++;
+                        first = 0;
+                    }
+                }
+
+                yield new DataTable(columns);
+            }
+        } finally {
+            await handle.close();
+        }
+    };
+
+    return {
+        numRows: numSplats,
+        blocks
+    };
+};
+
+export { readKsplat, readKsplatBlocks };
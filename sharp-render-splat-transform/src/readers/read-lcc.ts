@@ -4,13 +4,20 @@ import { dirname, join } from 'node:path';
 
 import { Vec3 } from 'playcanvas';
 
+import { BlockSource, sliceRows } from '../data-table/block-source';
 import { Column, DataTable } from '../data-table/data-table';
+import { ProcessAction } from '../process';
+import { CullCamera, createFrustum, isVisible } from '../spatial/frustum-cull';
 import { Options } from '../types';
+import { logger } from '../utils/logger';
 
 const kSH_C0 = 0.28209479177387814;
 const SQRT_2 = 1.414213562373095;
 const SQRT_2_INV = 0.7071067811865475;
 
+// default size of the decoded unit cache of an LccScene
+const defaultCacheBytes = 512 * 1024 * 1024;
+
 // lod data in data.bin
 type LccLod = {
     points: number;     // number of splats
@@ -38,26 +45,15 @@ type CompressInfo = {
     envShMax: Vec3;         // max environment sh
 }
 
-// parameters used to convert LCC data into GSplatData
-type LccParam = {
-    totalSplats: number;
-    targetLod: number;
-    compressInfo: CompressInfo;
-    unitInfos: Array<LccUnitInfo>;
-    dataFile: FileHandle;
-    shFile?: FileHandle;
-}
+// a filter action ahead of any transform on an LCC input. only units that can hold
+// splats the filter keeps are read.
+type LccRegion = Extract<ProcessAction, { kind: 'filterBox' | 'filterSphere' | 'filterFrustum' }>;
 
-type ProcessUnitContext = {
-    info: LccUnitInfo;
-    targetLod: number;
-    dataFile: FileHandle;
-    shFile?: FileHandle;
-    compressInfo: CompressInfo;
-    propertyOffset: number;
-    properties: Record<string, Float32Array>;
-    properties_f_rest: Float32Array[] | null;
-}
+// a unit of the scene and the lod to read it at
+type LccSelection = {
+    unit: number;       // index into LccScene.units
+    lod: number;
+};
 
 const readPart = async (fh: FileHandle, start: number, end: number): Promise<Uint8Array> => {
     const buf = Buffer.alloc(end - start);
@@ -288,88 +284,6 @@ const decodeSplat = (
     }
 };
 
-const processUnit = async (ctx: ProcessUnitContext) => {
-    const {
-        info,
-        targetLod,
-        dataFile,
-        shFile,
-        compressInfo,
-        propertyOffset,
-        properties,
-        properties_f_rest
-    } = ctx;
-
-    const lod = info.lods[targetLod];
-    const unitSplats = lod.points;
-    const offset = Number(lod.offset);
-    const size = lod.size;
-
-    if (unitSplats === 0) {
-        return propertyOffset;
-    }
-
-    // load data
-    const dataSource = await readPart(dataFile, offset, offset + size);
-    const dataView = new DataView(dataSource.buffer);
-
-    // load sh data
-    let shDataView: DataView | null = null;
-    if (shFile) {
-        const shSource = await readPart(shFile, offset * 2, offset * 2 + size * 2);
-        shDataView = new DataView(shSource.buffer);
-    }
-
-    const unitProperties = initProperties(unitSplats);
-    const unitProperties_f_rest = shFile ? Array.from({ length: 45 }, () => new Float32Array(unitSplats)) : null;
-
-    for (let i = 0; i < unitSplats; i++) {
-        decodeSplat(dataView, shDataView, i, compressInfo, unitProperties, unitProperties_f_rest);
-    }
-
-    for (const key of floatProps) {
-        properties[`property_${key}`].set(unitProperties[`property_${key}`], propertyOffset);
-    }
-
-    if (unitProperties_f_rest) {
-        for (let j = 0; j < 45; j++) {
-            properties_f_rest[j].set(unitProperties_f_rest[j], propertyOffset);
-        }
-    }
-
-    return propertyOffset + unitSplats;
-};
-
-// this function would stream data directly into GSplatData buffers
-const deserializeFromLcc = async (param: LccParam) => {
-    const { totalSplats, unitInfos, targetLod, dataFile, shFile, compressInfo } = param;
-
-    // properties to GSplatData
-    const properties: Record<string, Float32Array> = initProperties(totalSplats);
-    const properties_f_rest = shFile ? Array.from({ length: 45 }, () => createStorage(totalSplats)) : null;
-
-    let propertyOffset = 0;
-    for (const info of unitInfos) {
-        propertyOffset = await processUnit({
-            info,
-            targetLod,
-            dataFile,
-            shFile,
-            compressInfo,
-            propertyOffset,
-            properties,
-            properties_f_rest
-        });
-    }
-
-    const columns = [
-        ...floatProps.map(name => new Column(name, properties[`property_${name}`])),
-        ...(properties_f_rest ? properties_f_rest.map((storage, i) => new Column(`f_rest_${i}`, storage)) : [])
-    ];
-
-    return new DataTable(columns);
-};
-
 const deserializeEnvironment = (raw: Uint8Array, compressInfo: CompressInfo, hasSH: boolean) => {
     const stride = hasSH ? 96 : 32;
 
@@ -431,82 +345,391 @@ const deserializeEnvironment = (raw: Uint8Array, compressInfo: CompressInfo, has
     return new DataTable(columns);
 };
 
-const readLcc = async (fileHandle: FileHandle, sourceName: string, options: Options): Promise<DataTable[]> => {
-    const lccData = await read(fileHandle);
-    const lccText = new TextDecoder().decode(lccData);
-    const lccJson = JSON.parse(lccText);
+const shNames = new Array(45).fill('').map((_, i) => `f_rest_${i}`);
+
+// decode one lod of a unit, reading only its byte ranges of data.bin and shcoef.bin
+const decodeUnit = async (lod: LccLod, dataFile: FileHandle, shFile: FileHandle | null, compressInfo: CompressInfo): Promise<DataTable> => {
+    const unitSplats = lod.points;
+    const offset = Number(lod.offset);
+    const size = lod.size;
 
-    const determineSH = () => {
-        if (lccJson.fileType === 'Portable') {
-            return false;
+    const unitProperties = initProperties(unitSplats);
+    const unitProperties_f_rest = shFile ? Array.from({ length: 45 }, () => createStorage(unitSplats)) : null;
+
+    if (unitSplats > 0) {
+        // load data
+        const dataSource = await readPart(dataFile, offset, offset + size);
+        const dataView = new DataView(dataSource.buffer);
+
+        // load sh data
+        let shDataView: DataView | null = null;
+        if (shFile) {
+            const shSource = await readPart(shFile, offset * 2, offset * 2 + size * 2);
+            shDataView = new DataView(shSource.buffer);
         }
 
-        if (lccJson.fileType === 'Quality') {
-            return true;
+        for (let i = 0; i < unitSplats; i++) {
+            decodeSplat(dataView, shDataView, i, compressInfo, unitProperties, unitProperties_f_rest);
         }
+    }
 
-        // before version 4 sh seems to have always been present, but we test for shcoef attribute anyway
-        return lccJson.attributes.findIndex((attr: any) => attr.name === 'shcoef') !== -1;
-    };
+    return new DataTable([
+        ...floatProps.map(name => new Column(name, unitProperties[`property_${name}`])),
+        ...(unitProperties_f_rest ? unitProperties_f_rest.map((storage, i) => new Column(shNames[i], storage)) : [])
+    ]);
+};
+
+const tableBytes = (dataTable: DataTable) => dataTable.columns.reduce((total, column) => total + column.data.byteLength, 0);
+
+// decoded units keyed by unit and lod, least recently used first
+class UnitCache {
+    capacity: number;
+    bytes = 0;
+    hits = 0;
+    misses = 0;
+    entries: Map<string, DataTable> = new Map();
+
+    constructor(capacity: number) {
+        this.capacity = capacity;
+    }
+
+    get(key: string) {
+        const result = this.entries.get(key);
+        if (result) {
+            // move to the most recently used end
+            this.entries.delete(key);
+            this.entries.set(key, result);
+            this.hits++;
+        } else {
+            this.misses++;
+        }
+        return result;
+    }
+
+    add(key: string, dataTable: DataTable) {
+        const size = tableBytes(dataTable);
+        if (size > this.capacity) {
+            return;
+        }
+
+        this.entries.set(key, dataTable);
+        this.bytes += size;
+
+        for (const [oldest, entry] of this.entries) {
+            if (this.bytes <= this.capacity) {
+                break;
+            }
+            this.entries.delete(oldest);
+            this.bytes -= tableBytes(entry);
+        }
+    }
+
+    clear() {
+        this.entries.clear();
+        this.bytes = 0;
+    }
+}
+
+// bounding box of every unit from the quadtree of meta.lcc, as min xyz, max xyz. a unit's
+// xy extent is its cell, counted in cellLengthX by cellLengthY steps from the scene
+// bounding box min, and its z extent is that of the scene. every side is padded by 3 sigma
+// of the largest scale the scene can encode, so splats centered in the cell are covered
+// whatever their size. returns null when meta.lcc doesn't describe a grid holding every unit.
+const gridBounds = (lccJson: any, units: LccUnitInfo[], compressInfo: CompressInfo): Float32Array | null => {
+    const { boundingBox, cellLengthX, cellLengthY } = lccJson;
+    const min = boundingBox?.min;
+    const max = boundingBox?.max;
+    const valid = (v: any) => Array.isArray(v) && v.length >= 3 && v.slice(0, 3).every(Number.isFinite);
+    if (!valid(min) || !valid(max) || !(cellLengthX > 0) || !(cellLengthY > 0)) {
+        return null;
+    }
+
+    // a splat on the max face falls in the cell just past the last full one
+    const cellsX = Math.ceil((max[0] - min[0]) / cellLengthX);
+    const cellsY = Math.ceil((max[1] - min[1]) / cellLengthY);
+    if (units.some(({ x, y }) => x < 0 || y < 0 || x > cellsX || y > cellsY)) {
+        return null;
+    }
+
+    const { scaleMax } = compressInfo;
+    const pad = 3 * Math.max(scaleMax.x, scaleMax.y, scaleMax.z);
+
+    const bounds = new Float32Array(units.length * 6);
+    units.forEach(({ x, y }, u) => {
+        bounds.set([
+            min[0] + x * cellLengthX - pad,
+            min[1] + y * cellLengthY - pad,
+            min[2] - pad,
+            min[0] + (x + 1) * cellLengthX + pad,
+            min[1] + (y + 1) * cellLengthY + pad,
+            max[2] + pad
+        ], u * 6);
+    });
+    return bounds;
+};
+
+// test whether a unit's bounding box, given as min xyz, max xyz at offset o, can hold
+// splats the region keeps
+const createRegionTest = (region: LccRegion): (bounds: Float32Array, o: number) => boolean => {
+    switch (region.kind) {
+        case 'filterBox': {
+            const { min, max } = region;
+            return (b, o) => b[o] <= max.x && b[o + 3] >= min.x &&
+                b[o + 1] <= max.y && b[o + 4] >= min.y &&
+                b[o + 2] <= max.z && b[o + 5] >= min.z;
+        }
+        case 'filterSphere': {
+            const { center, radius } = region;
+            return (b, o) => {
+                const dx = Math.max(b[o] - center.x, 0, center.x - b[o + 3]);
+                const dy = Math.max(b[o + 1] - center.y, 0, center.y - b[o + 4]);
+                const dz = Math.max(b[o + 2] - center.z, 0, center.z - b[o + 5]);
+                return dx * dx + dy * dy + dz * dz <= radius * radius;
+            };
+        }
+        case 'filterFrustum': {
+            // the box extents already include the splats, and the screen size test is left
+            // to the filter itself
+            const frustums = region.settings.cameras.map(camera => createFrustum(camera, region.settings));
+            return (b, o) => {
+                const ex = (b[o + 3] - b[o]) * 0.5;
+                const ey = (b[o + 4] - b[o + 1]) * 0.5;
+                const ez = (b[o + 5] - b[o + 2]) * 0.5;
+                const r = Math.sqrt(ex * ex + ey * ey + ez * ez);
+                return frustums.some(f => isVisible(f, b[o] + ex, b[o + 1] + ey, b[o + 2] + ez, r, 0, 0));
+            };
+        }
+    }
+};
+
+// indexed access to an LCC scene. the unit directory from index.bin stays resident and
+// splat data is read on demand with positional reads of data.bin and shcoef.bin, one unit
+// and lod at a time, so a query only decodes the units it needs. unit bounds come from the
+// quadtree in meta.lcc, so selecting units decodes nothing. decoded units are kept in a
+// least recently used cache of cacheBytes, so repeated queries over the same part of the
+// scene don't decode it again.
+class LccScene {
+    sourceName: string;
+    hasSH: boolean;
+    compressInfo: CompressInfo;
+    units: LccUnitInfo[];
+    numLods: number;
+    dataFile: FileHandle;
+    shFile: FileHandle | null;
+    bounds: Float32Array | null;
+    cache: UnitCache;
+
+    constructor(sourceName: string, lccJson: any, units: LccUnitInfo[], dataFile: FileHandle, shFile: FileHandle | null, cacheBytes: number) {
+        this.sourceName = sourceName;
+        this.hasSH = !!shFile;
+        this.compressInfo = parseMeta(lccJson);
+        this.units = units;
+        this.numLods = lccJson.splats.length;
+        this.dataFile = dataFile;
+        this.shFile = shFile;
+        this.bounds = gridBounds(lccJson, units, this.compressInfo);
+        this.cache = new UnitCache(cacheBytes);
+    }
+
+    // open the scene described by a meta.lcc file
+    static async open(filename: string, cacheBytes = defaultCacheBytes) {
+        const lccJson = JSON.parse(new TextDecoder().decode(await openAndRead(filename)));
+        return LccScene.load(lccJson, filename, cacheBytes);
+    }
+
+    // open the scene of already parsed meta.lcc contents
+    static async load(lccJson: any, sourceName: string, cacheBytes = defaultCacheBytes) {
+        const determineSH = () => {
+            if (lccJson.fileType === 'Portable') {
+                return false;
+            }
+
+            if (lccJson.fileType === 'Quality') {
+                return true;
+            }
+
+            // before version 4 sh seems to have always been present, but we test for shcoef attribute anyway
+            return lccJson.attributes.findIndex((attr: any) => attr.name === 'shcoef') !== -1;
+        };
+
+        // FIXME: it seems some meta.lcc files at https://developer.xgrids.com/#/download?page=sampledata do not have
+        // 'fileType' field, but do appear to contain spherical harmonics data. So for now assume presence of SH when
+        // the field is missing.
+        // See https://github.com/xgrids/LCCWhitepaper/issues/3
+        const hasSH = determineSH();
+
+        const relatedFilename = (name: string) => join(dirname(sourceName ?? ''), name);
 
-    // FIXME: it seems some meta.lcc files at https://developer.xgrids.com/#/download?page=sampledata do not have
-    // 'fileType' field, but do appear to contain spherical harmonics data. So for now assume presence of SH when
-    // the field is missing.
-    // See https://github.com/xgrids/LCCWhitepaper/issues/3
-    const hasSH = determineSH();
-    const compressInfo = parseMeta(lccJson);
-    const splats = lccJson.splats;
+        const indexData = await openAndRead(relatedFilename('index.bin'));
+        const units = parseIndexBin(indexData.buffer as ArrayBuffer, lccJson);
+        const dataFile = await open(relatedFilename('data.bin'), 'r');
+        const shFile = hasSH ? await open(relatedFilename('shcoef.bin'), 'r') : null;
 
-    const relatedFilename = (name: string) => join(dirname(sourceName ?? ''), name);
+        return new LccScene(sourceName, lccJson, units, dataFile, shFile, cacheBytes);
+    }
 
-    const indexData = await openAndRead(relatedFilename('index.bin'));
-    const dataFile = await open(relatedFilename('data.bin'), 'r');
-    const shFile = hasSH ? await open(relatedFilename('shcoef.bin'), 'r') : null;
+    // splats of one unit at one lod. the table may be shared with the cache, so callers
+    // must not modify it.
+    async readUnit(unit: number, lod: number): Promise<DataTable> {
+        const key = `${unit}:${lod}`;
+        let result = this.cache.get(key);
+        if (!result) {
+            result = await decodeUnit(this.units[unit].lods[lod], this.dataFile, this.shFile, this.compressInfo);
+            this.cache.add(key, result);
+        }
+        return result;
+    }
+
+    // indices of the units that can hold splats every region keeps. without regions, or
+    // without unit bounds in meta.lcc, all units are returned.
+    selectUnits(regions: LccRegion[]): number[] {
+        const all = this.units.map((_, i) => i);
+        if (regions.length === 0) {
+            return all;
+        }
 
-    const unitInfos: LccUnitInfo[] = parseIndexBin(indexData.buffer as ArrayBuffer, lccJson);
+        const { bounds } = this;
+        if (!bounds) {
+            logger.warn(`meta.lcc of ${this.sourceName} has no quadtree grid covering its units, reading every unit`);
+            return all;
+        }
+
+        const tests = regions.map(createRegionTest);
+        return all.filter(u => tests.every(test => test(bounds, u * 6)));
+    }
+
+    // pick each unit's lod from its distance to the nearest camera: lod 0, the finest, up
+    // to lodDistance unit sizes away, then one lod coarser each time the distance doubles.
+    // a unit without splats at that lod gets the nearest lod it has, finer first.
+    selectLods(units: number[], cameras: CullCamera[], lodDistance = 1): LccSelection[] {
+        const { bounds } = this;
+        if (!bounds) {
+            throw new Error(`LOD selection 'auto' needs the quadtree grid of meta.lcc, which ${this.sourceName} lacks`);
+        }
+
+        return units.map((unit) => {
+            const o = unit * 6;
+            const size = Math.max(bounds[o + 3] - bounds[o], bounds[o + 4] - bounds[o + 1], bounds[o + 5] - bounds[o + 2], 1e-6);
+
+            let distance = Infinity;
+            for (const { position: [px, py, pz] } of cameras) {
+                const dx = Math.max(bounds[o] - px, 0, px - bounds[o + 3]);
+                const dy = Math.max(bounds[o + 1] - py, 0, py - bounds[o + 4]);
+                const dz = Math.max(bounds[o + 2] - pz, 0, pz - bounds[o + 5]);
+                distance = Math.min(distance, Math.sqrt(dx * dx + dy * dy + dz * dz));
+            }
+
+            const target = Math.min(this.numLods - 1, Math.floor(Math.log2(Math.max(distance / (size * lodDistance), 1))));
+            const { lods } = this.units[unit];
+            for (let d = 0; d < this.numLods; ++d) {
+                for (const lod of [target - d, target + d]) {
+                    if (lod >= 0 && lod < this.numLods && lods[lod].points > 0) {
+                        return { unit, lod };
+                    }
+                }
+            }
+            return { unit, lod: target };
+        });
+    }
+
+    // the selected units in one table, decoding those not in the cache
+    async read(selection: LccSelection[]): Promise<DataTable> {
+        const numRows = selection.reduce((total, { unit, lod }) => total + this.units[unit].lods[lod].points, 0);
+        const columns = [...floatProps, ...(this.hasSH ? shNames : [])].map(name => new Column(name, createStorage(numRows)));
+
+        let offset = 0;
+        for (const { unit, lod } of selection) {
+            const dataTable = await this.readUnit(unit, lod);
+            columns.forEach((column, i) => column.data.set(dataTable.columns[i].data, offset));
+            offset += dataTable.numRows;
+        }
+
+        return new DataTable(columns);
+    }
+
+    // the environment splats surrounding the scene
+    async readEnvironment(): Promise<DataTable> {
+        const envData = await openAndRead(join(dirname(this.sourceName ?? ''), 'environment.bin'));
+        return deserializeEnvironment(envData, this.compressInfo, this.hasSH);
+    }
+
+    async close() {
+        await this.dataFile.close();
+        if (this.shFile) {
+            await this.shFile.close();
+        }
+        this.cache.clear();
+    }
+}
+
+// the units to read, as one selection per output lod. with regions, only the units that can
+// hold splats they keep are selected. options.lodSelect 'auto' instead selects each unit
+// once, at the lod its distance to the filter-frustum cameras calls for.
+const planReads = (scene: LccScene, options: Options, regions: LccRegion[]) => {
+    const { sourceName } = scene;
+    const numPoints = (selection: LccSelection[]) => selection.reduce((total, { unit, lod }) => total + scene.units[unit].lods[lod].points, 0);
+
+    const units = scene.selectUnits(regions);
+    if (regions.length > 0) {
+        logger.info(`reading ${units.length} of ${scene.units.length} LCC units`);
+    }
+
+    if (options.lodSelect === 'auto') {
+        const cameras = regions.flatMap(region => (region.kind === 'filterFrustum' ? region.settings.cameras : []));
+        if (cameras.length === 0) {
+            throw new Error(`LOD selection 'auto' needs a filter-frustum action on the LCC input file: ${sourceName}`);
+        }
+
+        const selection = scene.selectLods(units, cameras);
+        if (numPoints(selection) === 0) {
+            throw new Error(`No LCC units inside the filter regions of ${sourceName}`);
+        }
+        return [{ lod: 0, selection }];
+    }
+
+    const numLods = scene.numLods;
 
     // build table of input -> output lods
     const lods = options.lodSelect.length > 0 ?
         options.lodSelect
-        .map(lod => (lod < 0 ? splats.length + lod : lod))    // negative indices map from the end of lod
-        .filter(lod => lod >= 0 && lod < splats.length) :
-        new Array(splats.length).fill(0).map((_, i) => i);
+        .map(lod => (lod < 0 ? numLods + lod : lod))    // negative indices map from the end of lod
+        .filter(lod => lod >= 0 && lod < numLods) :
+        new Array(numLods).fill(0).map((_, i) => i);
 
     if (lods.length === 0) {
         throw new Error(`No valid LODs selected for LCC input file: ${sourceName} lods: ${JSON.stringify(lods)}`);
     }
 
-    const result = [];
-
-    for (let i = 0; i < lods.length; i++) {
-        const inputLod = lods[i];
-        const outputLod = i;
-        const totalSplats = splats[inputLod];
-
-        const dataTable = await deserializeFromLcc({
-            totalSplats,
-            unitInfos,
-            targetLod: inputLod,
-            dataFile,
-            shFile,
-            compressInfo
-        });
+    return lods
+    .map((inputLod, outputLod) => ({ lod: outputLod, selection: units.map(unit => ({ unit, lod: inputLod })) }))
+    // a lod can lie entirely outside the regions
+    .filter(({ selection }) => regions.length === 0 || numPoints(selection) > 0);
+};
 
-        dataTable.addColumn(new Column('lod', new Float32Array(totalSplats).fill(outputLod)));
+// read an LCC scene as one table per selected lod plus the environment, see planReads
+const readLcc = async (fileHandle: FileHandle, sourceName: string, options: Options, regions: LccRegion[] = []): Promise<DataTable[]> => {
+    const lccData = await read(fileHandle);
+    const lccText = new TextDecoder().decode(lccData);
+    const lccJson = JSON.parse(lccText);
 
-        result.push(dataTable);
-    }
+    // every unit is decoded once here, so caching them would only hold memory
+    const scene = await LccScene.load(lccJson, sourceName, 0);
+    const result = [];
 
-    // cleanup
-    await dataFile.close();
-    if (shFile) {
-        await shFile.close();
+    try {
+        for (const { lod, selection } of planReads(scene, options, regions)) {
+            const dataTable = await scene.read(selection);
+            dataTable.addColumn(new Column('lod', new Float32Array(dataTable.numRows).fill(lod)));
+            result.push(dataTable);
+        }
+    } finally {
+        // cleanup
+        await scene.close();
     }
 
     // load environment and tag as lod -1
     try {
-        const envData = await openAndRead(relatedFilename('environment.bin'));
-        const envDataTable  = await deserializeEnvironment(envData, compressInfo, hasSH);
+        const envDataTable = await scene.readEnvironment();
         envDataTable.addColumn(new Column('lod', new Float32Array(envDataTable.numRows).fill(-1)));
         result.push(envDataTable);
     } catch (err) {
@@ -516,4 +739,53 @@ const readLcc = async (fileHandle: FileHandle, sourceName: string, options: Opti
     return result;
 };
 
-export { readLcc };
+// open an LCC scene as a source of row blocks, reading the same units and lods as readLcc.
+// units are decoded one at a time and split into blocks. the scene stays open until close(),
+// and the passes over the source reuse units from a cache of cacheBytes. the environment,
+// which only LOD output uses, is left out.
+const readLccBlocks = async (filename: string, options: Options, regions: LccRegion[] = [], cacheBytes = 0): Promise<BlockSource> => {
+    const scene = await LccScene.open(filename, cacheBytes);
+    let reads;
+    try {
+        reads = planReads(scene, options, regions);
+    } catch (err) {
+        await scene.close();
+        throw err;
+    }
+
+    const numRows = reads.reduce((total, { selection }) => {
+        return selection.reduce((sum, { unit, lod }) => sum + scene.units[unit].lods[lod].points, total);
+    }, 0);
+
+    const blocks = async function* (blockRows: number) {
+        for (const { lod, selection } of reads) {
+            for (const { unit, lod: unitLod } of selection) {
+                if (scene.units[unit].lods[unitLod].points === 0) {
+                    continue;
+                }
+
+                // blocks are copies, since process actions modify them and the unit may be cached
+                const dataTable = await scene.readUnit(unit, unitLod);
+                for (let start = 0; start < dataTable.numRows; start += blockRows) {
+                    const block = sliceRows(dataTable, start, Math.min(dataTable.numRows, start + blockRows));
+                    block.addColumn(new Column('lod', new Float32Array(block.numRows).fill(lod)));
+                    yield block;
+                }
+            }
+        }
+    };
+
+    const close = async () => {
+        const { hits, misses } = scene.cache;
+        logger.info(`decoded ${misses} LCC units, reused ${hits} from the cache`);
+        await scene.close();
+    };
+
+    return {
+        numRows,
+        blocks,
+        close
+    };
+};
+
+export { LccRegion, LccScene, LccSelection, readLcc, readLccBlocks };
@@ -1,7 +1,9 @@
 import { Buffer } from 'node:buffer';
-import { FileHandle } from 'node:fs/promises';
+import { FileHandle, open } from 'node:fs/promises';
 
-import { isCompressedPly, decompressPly } from './decompress-ply';
+import { COMPRESSED_CHUNK_SIZE, isCompressedPly, decompressPly } from './decompress-ply';
+import { StreamReader } from './stream-reader';
+import { BlockSource } from '../data-table/block-source';
 import { Column, DataTable } from '../data-table/data-table';
 
 type PlyProperty = {
@@ -109,7 +111,55 @@ const cmp = (a: Uint8Array, b: Uint8Array, aOffset = 0) => {
 const magicBytes = new Uint8Array([112, 108, 121, 10]);                                                 // ply\n
 const endHeaderBytes = new Uint8Array([10, 101, 110, 100, 95, 104, 101, 97, 100, 101, 114, 10]);        // \nend_header\n
 
-const readPly = async (fileHandle: FileHandle): Promise<DataTable> => {
+// read numRows rows of an element into a column per property. rows are read sequentially
+// from the current position unless a file position is given.
+const readElementRows = async (fileHandle: FileHandle | StreamReader, element: PlyElement, numRows: number, position: number | null = null) => {
+    const columns = element.properties.map((property) => {
+        return new Column(property.name, new (getDataType(property.type))(numRows));
+    });
+
+    const buffers = columns.map(column => new Uint8Array(column.data.buffer));
+    const sizes = columns.map(column => column.data.BYTES_PER_ELEMENT);
+    const rowSize = sizes.reduce((total, size) => total + size, 0);
+
+    // read data in chunks of 1024 rows at a time
+    const chunkSize = 1024;
+    const numChunks = Math.ceil(numRows / chunkSize);
+    const chunkData = Buffer.alloc(chunkSize * rowSize);
+
+    for (let c = 0; c < numChunks; ++c) {
+        const chunkRows = Math.min(chunkSize, numRows - c * chunkSize);
+
+        if (position === null) {
+            await fileHandle.read(chunkData, 0, rowSize * chunkRows);
+        } else {
+            await (fileHandle as FileHandle).read(chunkData, 0, rowSize * chunkRows, position + c * chunkSize * rowSize);
+        }
+
+        let offset = 0;
+
+        // read data row at a time
+        for (let r = 0; r < chunkRows; ++r) {
+            const rowOffset = c * chunkSize + r;
+
+            // copy into column data
+            for (let p = 0; p < columns.length; ++p) {
+                const s = sizes[p];
+                chunkData.copy(buffers[p], rowOffset * s, offset, offset + s);
+                offset += s;
+            }
+        }
+    }
+
+    return new DataTable(columns);
+};
+
+const getRowSize = (element: PlyElement) => {
+    return element.properties.reduce((total, property) => total + getDataType(property.type).BYTES_PER_ELEMENT, 0);
+};
+
+// read and parse the ply header, leaving the read position at the start of the data
+const readHeader = async (fileHandle: FileHandle | StreamReader) => {
 
     // we don't support ply text header larger than 128k
     const headerBuf = Buffer.alloc(128 * 1024);
@@ -139,49 +189,25 @@ const readPly = async (fileHandle: FileHandle): Promise<DataTable> => {
     }
 
     // parse the header
-    const header = parseHeader(headerBuf.subarray(0, headerSize));
+    return {
+        header: parseHeader(headerBuf.subarray(0, headerSize)),
+        headerSize
+    };
+};
+
+// data is read strictly sequentially, so a StreamReader over stdin works as well as a file
+const readPly = async (fileHandle: FileHandle | StreamReader): Promise<DataTable> => {
+
+    const { header } = await readHeader(fileHandle);
 
     // create a data table for each ply element
     const elements = [];
     for (let i = 0; i < header.elements.length; ++i) {
         const element = header.elements[i];
 
-        const columns = element.properties.map((property) => {
-            return new Column(property.name, new (getDataType(property.type))(element.count));
-        });
-
-        const buffers = columns.map(column => new Uint8Array(column.data.buffer));
-        const sizes = columns.map(column => column.data.BYTES_PER_ELEMENT);
-        const rowSize = sizes.reduce((total, size) => total + size, 0);
-
-        // read data in chunks of 1024 rows at a time
-        const chunkSize = 1024;
-        const numChunks = Math.ceil(element.count / chunkSize);
-        const chunkData = Buffer.alloc(chunkSize * rowSize);
-
-        for (let c = 0; c < numChunks; ++c) {
-            const numRows = Math.min(chunkSize, element.count - c * chunkSize);
-
-            await fileHandle.read(chunkData, 0, rowSize * numRows);
-
-            let offset = 0;
-
-            // read data row at a time
-            for (let r = 0; r < numRows; ++r) {
-                const rowOffset = c * chunkSize + r;
-
-                // copy into column data
-                for (let p = 0; p < columns.length; ++p) {
-                    const s = sizes[p];
-                    chunkData.copy(buffers[p], rowOffset * s, offset, offset + s);
-                    offset += s;
-                }
-            }
-        }
-
         elements.push({
             name: element.name,
-            dataTable: new DataTable(columns)
+            dataTable: await readElementRows(fileHandle, element, element.count)
         });
     }
 
@@ -202,4 +228,77 @@ const readPly = async (fileHandle: FileHandle): Promise<DataTable> => {
     return vertexElement.dataTable;
 };
 
-export { PlyData, readPly };
+// open a ply file as a source of row blocks. only the header (and the chunk table of a
+// compressed ply) is held in memory, rows are read from the file as blocks are requested.
+const readPlyBlocks = async (filename: string): Promise<BlockSource> => {
+    const fileHandle = await open(filename, 'r');
+    const { header, headerSize } = await readHeader(fileHandle);
+
+    // file offset of each element's data
+    const offsets = new Map<string, number>();
+    let offset = headerSize;
+    for (const element of header.elements) {
+        offsets.set(element.name, offset);
+        offset += element.count * getRowSize(element);
+    }
+
+    const find = (name: string) => header.elements.find(e => e.name === name);
+    const vertex = find('vertex');
+    if (!vertex) {
+        await fileHandle.close();
+        throw new Error('PLY file does not contain vertex element');
+    }
+
+    const chunk = find('chunk');
+    const sh = find('sh');
+    const compressed = !!chunk && vertex.properties.some(p => p.name === 'packed_position');
+
+    // the chunk table is tiny (one row per 256 splats), so keep it resident
+    const chunkTable = compressed ? await readElementRows(fileHandle, chunk, chunk.count, offsets.get('chunk')) : null;
+    await fileHandle.close();
+
+    const blocks = async function* (blockRows: number) {
+        // compressed blocks must start on a chunk boundary
+        if (compressed) {
+            blockRows = Math.ceil(blockRows / COMPRESSED_CHUNK_SIZE) * COMPRESSED_CHUNK_SIZE;
+        }
+
+        const handle = await open(filename, 'r');
+        try {
+            for (let start = 0; start < vertex.count; start += blockRows) {
+                const numRows = Math.min(blockRows, vertex.count - start);
+                const rows = await readElementRows(handle, vertex, numRows, offsets.get('vertex') + start * getRowSize(vertex));
+
+                if (!compressed) {
+                    yield rows;
+                    continue;
+                }
+
+                const chunkStart = start / COMPRESSED_CHUNK_SIZE;
+                const chunkRows = chunkTable.permuteRows(
+                    Array.from({ length: Math.ceil(numRows / COMPRESSED_CHUNK_SIZE) }, (_, i) => chunkStart + i)
+                );
+                const elements = [
+                    { name: 'chunk', dataTable: chunkRows },
+                    { name: 'vertex', dataTable: rows }
+                ];
+                if (sh) {
+                    elements.push({
+                        name: 'sh',
+                        dataTable: await readElementRows(handle, sh, numRows, offsets.get('sh') + start * getRowSize(sh))
+                    });
+                }
+                yield decompressPly({ comments: header.comments, elements });
+            }
+        } finally {
+            await handle.close();
+        }
+    };
+
+    return {
+        numRows: vertex.count,
+        blocks
+    };
+};
+
+export { PlyData, readPly, readPlyBlocks };
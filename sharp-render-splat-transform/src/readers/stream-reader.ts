@@ -0,0 +1,53 @@
+import { Readable } from 'node:stream';
+
+/**
+ * Adapts a readable stream (e.g. stdin) to the sequential `read(buffer, offset, length)` calls
+ * readers make on a FileHandle. Each read resolves once `length` bytes are available or the
+ * stream has ended, and chunks are pulled on demand so the stream stays back-pressured.
+ */
+class StreamReader {
+    private iterator: AsyncIterator<Buffer>;
+    private chunks: Buffer[] = [];
+    private available = 0;
+    private ended = false;
+
+    constructor(stream: Readable) {
+        this.iterator = stream[Symbol.asyncIterator]();
+    }
+
+    async read(buffer: Uint8Array, offset = 0, length = buffer.length - offset) {
+        while (this.available < length && !this.ended) {
+            const { value, done } = await this.iterator.next();
+            if (done) {
+                this.ended = true;
+            } else {
+                this.chunks.push(value);
+                this.available += value.length;
+            }
+        }
+
+        let bytesRead = 0;
+        while (bytesRead < length && this.chunks.length > 0) {
+            const chunk = this.chunks[0];
+            const n = Math.min(chunk.length, length - bytesRead);
+            buffer.set(chunk.subarray(0, n), offset + bytesRead);
+            bytesRead += n;
+
+            if (n === chunk.length) {
+                this.chunks.shift();
+            } else {
+                this.chunks[0] = chunk.subarray(n);
+            }
+        }
+        this.available -= bytesRead;
+
+        return { bytesRead, buffer };
+    }
+
+    async close() {
+        // release the stream without consuming the rest of it
+        await this.iterator.return?.();
+    }
+}
+
+export { StreamReader };
@@ -0,0 +1,194 @@
+import { Vec3 } from 'playcanvas';
+
+import { BTree, BTreeNode } from './b-tree';
+import { DataTable } from '../data-table/data-table';
+
+type CullCamera = {
+    position: [number, number, number];
+    target: [number, number, number];
+    up?: [number, number, number];
+    fov?: number;                       // vertical fov in degrees
+};
+
+type CullSettings = {
+    width: number;
+    height: number;
+    fov: number;                        // vertical fov in degrees
+    minPixelSize?: number;              // splats with a smaller projected diameter are culled
+    cameras: CullCamera[];
+};
+
+// camera basis and projection constants used by the visibility tests
+type Frustum = {
+    position: Vec3;
+    forward: Vec3;
+    right: Vec3;
+    up: Vec3;
+    tanX: number;
+    tanY: number;
+    secX: number;
+    secY: number;
+    focal: number;                      // focal length in pixels
+};
+
+// bounding volume index over splat centers, with per-node splat extents
+class SplatIndex {
+    btree: BTree;
+    x: Float32Array;
+    y: Float32Array;
+    z: Float32Array;
+    radius: Float32Array;
+    nodeRadius: Map<BTreeNode, number> = new Map();
+
+    constructor(dataTable: DataTable) {
+        const [x, y, z] = ['x', 'y', 'z'].map(name => dataTable.getColumnByName(name));
+        const scales = ['scale_0', 'scale_1', 'scale_2'].map(name => dataTable.getColumnByName(name)?.data);
+
+        this.x = x.data as Float32Array;
+        this.y = y.data as Float32Array;
+        this.z = z.data as Float32Array;
+        this.btree = new BTree(new DataTable([x, y, z]));
+
+        // bounding sphere radius of each gaussian, taken at 3 sigma of its largest axis
+        const { numRows } = dataTable;
+        this.radius = new Float32Array(numRows);
+        if (scales.every(s => s)) {
+            for (let i = 0; i < numRows; ++i) {
+                this.radius[i] = 3 * Math.exp(Math.max(scales[0][i], scales[1][i], scales[2][i]));
+            }
+        }
+
+        const calcNodeRadius = (node: BTreeNode): number => {
+            let result = 0;
+            if (node.indices) {
+                for (let i = 0; i < node.indices.length; ++i) {
+                    result = Math.max(result, this.radius[node.indices[i]]);
+                }
+            } else {
+                result = Math.max(calcNodeRadius(node.left), calcNodeRadius(node.right));
+            }
+            this.nodeRadius.set(node, result);
+            return result;
+        };
+
+        calcNodeRadius(this.btree.root);
+    }
+}
+
+// indices are built once per data table and reused by subsequent culls. actions that move
+// splats in place must drop the table's index, which would otherwise be stale.
+const indexCache = new WeakMap<DataTable, SplatIndex>();
+
+const getSplatIndex = (dataTable: DataTable) => {
+    let result = indexCache.get(dataTable);
+    // a column replaced since the index was built also makes it stale
+    if (!result || ['x', 'y', 'z'].some((name, i) => dataTable.getColumnByName(name)?.data !== [result.x, result.y, result.z][i])) {
+        result = new SplatIndex(dataTable);
+        indexCache.set(dataTable, result);
+    }
+    return result;
+};
+
+const dropSplatIndex = (dataTable: DataTable) => {
+    indexCache.delete(dataTable);
+};
+
+const createFrustum = (camera: CullCamera, settings: CullSettings): Frustum => {
+    const position = new Vec3(camera.position);
+    const forward = new Vec3(camera.target).sub(position).normalize();
+    const right = new Vec3().cross(forward, new Vec3(camera.up ?? [0, 1, 0])).normalize();
+    const up = new Vec3().cross(right, forward);
+
+    const tanY = Math.tan((camera.fov ?? settings.fov) * Math.PI / 360);
+    const tanX = tanY * settings.width / settings.height;
+
+    return {
+        position,
+        forward,
+        right,
+        up,
+        tanX,
+        tanY,
+        secX: Math.sqrt(1 + tanX * tanX),
+        secY: Math.sqrt(1 + tanY * tanY),
+        focal: settings.height * 0.5 / tanY
+    };
+};
+
+// test whether a sphere overlaps the frustum and, given the largest splat radius it
+// contains, whether any of those splats can project larger than minPixelSize
+const isVisible = (f: Frustum, x: number, y: number, z: number, radius: number, splatRadius: number, minPixelSize: number) => {
+    const dx = x - f.position.x;
+    const dy = y - f.position.y;
+    const dz = z - f.position.z;
+
+    const cz = dx * f.forward.x + dy * f.forward.y + dz * f.forward.z;
+    if (cz <= -radius) {
+        return false;
+    }
+
+    const cx = dx * f.right.x + dy * f.right.y + dz * f.right.z;
+    if (Math.abs(cx) - f.tanX * cz > radius * f.secX) {
+        return false;
+    }
+
+    const cy = dx * f.up.x + dy * f.up.y + dz * f.up.z;
+    if (Math.abs(cy) - f.tanY * cz > radius * f.secY) {
+        return false;
+    }
+
+    // screen size check uses the nearest depth the sphere can reach
+    const nearest = cz - radius;
+    if (minPixelSize > 0 && nearest > 0 && 2 * splatRadius * f.focal < minPixelSize * nearest) {
+        return false;
+    }
+
+    return true;
+};
+
+// return the indices of splats visible from at least one of the cameras
+const frustumCull = (dataTable: DataTable, settings: CullSettings): Uint32Array => {
+    const index = getSplatIndex(dataTable);
+    const frustums = settings.cameras.map(camera => createFrustum(camera, settings));
+    const minPixelSize = settings.minPixelSize ?? 0;
+    const { x, y, z, radius, nodeRadius } = index;
+
+    const result = new Uint32Array(dataTable.numRows);
+    let count = 0;
+
+    const recurse = (node: BTreeNode) => {
+        const { min, max } = node.aabb;
+        const cx = (min[0] + max[0]) * 0.5;
+        const cy = (min[1] + max[1]) * 0.5;
+        const cz = (min[2] + max[2]) * 0.5;
+        const ex = (max[0] - min[0]) * 0.5;
+        const ey = (max[1] - min[1]) * 0.5;
+        const ez = (max[2] - min[2]) * 0.5;
+        const splatRadius = nodeRadius.get(node);
+        const r = Math.sqrt(ex * ex + ey * ey + ez * ez) + splatRadius;
+
+        if (!frustums.some(f => isVisible(f, cx, cy, cz, r, splatRadius, minPixelSize))) {
+            return;
+        }
+
+        if (node.indices) {
+            const { indices } = node;
+            for (let i = 0; i < indices.length; ++i) {
+                const idx = indices[i];
+                if (frustums.some(f => isVisible(f, x[idx], y[idx], z[idx], radius[idx], radius[idx], minPixelSize))) {
+                    result[count++] = idx;
+                }
+            }
+        } else {
+            recurse(node.left);
+            recurse(node.right);
+        }
+    };
+
+    recurse(index.btree.root);
+
+    // keep the original row order
+    return result.subarray(0, count).sort();
+};
+
+export { CullCamera, CullSettings, createFrustum, dropSplatIndex, frustumCull, isVisible };
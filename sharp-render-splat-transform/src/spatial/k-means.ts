@@ -122,6 +122,9 @@ const clusterKdTreeCpu = (points: DataTable, centroids: DataTable, labels: Uint3
     }
 };
 
+// assigns each point to its nearest centroid, writing the result to labels
+type ClusterFunc = (points: DataTable, centroids: DataTable, labels: Uint32Array) => void | Promise<void>;
+
 const groupLabels = (labels: Uint32Array, k: number) => {
     const clusters: number[][] = [];
 
@@ -136,7 +139,7 @@ const groupLabels = (labels: Uint32Array, k: number) => {
     return clusters;
 };
 
-const kmeans = async (points: DataTable, k: number, iterations: number, device?: GpuDevice) => {
+const kmeans = async (points: DataTable, k: number, iterations: number, device?: GpuDevice, cluster: ClusterFunc = clusterKdTreeCpu) => {
     // too few data points
     if (points.numRows < k) {
         return {
@@ -170,7 +173,7 @@ const kmeans = async (points: DataTable, k: number, iterations: number, device?:
         if (gpuClustering) {
             await gpuClustering.execute(points, centroids, labels);
         } else {
-            clusterKdTreeCpu(points, centroids, labels);
+            await cluster(points, centroids, labels);
         }
 
         // calculate the new centroid positions
@@ -205,4 +208,4 @@ const kmeans = async (points: DataTable, k: number, iterations: number, device?:
     return { centroids, labels };
 };
 
-export { kmeans };
+export { ClusterFunc, kmeans };
@@ -0,0 +1,129 @@
+import { BlockSource, conformToSchema, firstBlock, getRowBytes, getSchema, mergeSchemas } from './data-table/block-source';
+import { createBounds, externalMortonSort, updateBounds } from './data-table/external-sort';
+import { ProcessAction, processDataTable } from './process';
+import { COMPRESSED_CHUNK_SIZE } from './readers/decompress-ply';
+import { FileSystem } from './serialize/file-system';
+import { Options } from './types';
+import { logger } from './utils/logger';
+import { OutputFormat } from './write';
+import { writeCompressedPlyBlocks } from './writers/write-compressed-ply';
+import { writeCsvBlocks } from './writers/write-csv';
+import { writePlyBlocks } from './writers/write-ply';
+
+// an input delivered in blocks, with the actions still to be applied to each block
+type StreamSource = {
+    source: BlockSource;
+    processActions: ProcessAction[];
+};
+
+type StreamFileOptions = {
+    filename: string;
+    outputFormat: OutputFormat;
+    sources: StreamSource[];
+    processActions: ProcessAction[];    // output actions
+    options: Options;
+};
+
+const clamp = (value: number, min: number, max: number) => Math.max(min, Math.min(max, Math.floor(value)));
+
+// actions that can drop rows, so the output row count is only known after a pass over the data
+const isFilterAction = (action: ProcessAction) => {
+    return ['filterNaN', 'filterByValue', 'filterBox', 'filterSphere', 'filterFrustum'].includes(action.kind);
+};
+
+// outputs written block by block
+const streamedOutputs: OutputFormat[] = ['ply', 'compressed-ply', 'csv'];
+
+// convert the inputs to the output holding only a few blocks of rows at a time. memory is
+// bounded by options.memoryBudget: block sizes and external sort runs are derived from it.
+const streamFile = async (streamFileOptions: StreamFileOptions, fs: FileSystem) => {
+    const { filename, outputFormat, sources, processActions, options } = streamFileOptions;
+
+    if (!streamedOutputs.includes(outputFormat)) {
+        throw new Error(`--memory-budget supports .ply, .compressed.ply and .csv output. ${outputFormat} output clusters and lays out the whole scene in memory, so convert without a budget`);
+    }
+
+    // baking picks a band count for the whole scene, which blocks can't agree on
+    if (sources.some(s => s.processActions.some(a => a.kind === 'bakeHarmonics')) || processActions.some(a => a.kind === 'bakeHarmonics')) {
+        throw new Error('--bake-harmonics needs the whole scene in memory and cannot be used with --memory-budget');
+    }
+
+    // work out the input and output columns by running a single row of each input through
+    // the actions, since actions may add, rename or drop columns
+    const samples = [];
+    for (const { source, processActions } of sources) {
+        const block = await firstBlock(source, 1);
+        if (block) {
+            samples.push(processDataTable(block, processActions));
+        }
+    }
+    if (samples.length === 0) {
+        throw new Error('No Gaussians to write');
+    }
+    const inputSchema = mergeSchemas(samples.map(getSchema));
+    const outputSchema = getSchema(processDataTable(conformToSchema(samples[0], inputSchema), processActions));
+
+    // size blocks and sort runs from the budget
+    const budget = options.memoryBudget * 1024 * 1024;
+    const rowBytes = Math.max(getRowBytes(inputSchema), getRowBytes(outputSchema));
+    const blockRows = clamp(budget / 16 / rowBytes / COMPRESSED_CHUNK_SIZE, 1, 256) * COMPRESSED_CHUNK_SIZE;
+    const runRows = clamp(budget / 4 / rowBytes, blockRows, Infinity);
+
+    const processedBlocks = async function* () {
+        for (const { source, processActions: inputActions } of sources) {
+            for await (const block of source.blocks(blockRows)) {
+                const result = processDataTable(conformToSchema(processDataTable(block, inputActions), inputSchema), processActions);
+                if (result.numRows > 0) {
+                    yield conformToSchema(result, outputSchema);
+                }
+            }
+        }
+    };
+
+    const sorted = outputFormat === 'compressed-ply';
+    const filtered = sources.some(s => s.processActions.some(isFilterAction)) || processActions.some(isFilterAction);
+
+    // count rows and find the scene bounds for morton ordering
+    let numRows = sources.reduce((total, s) => total + s.source.numRows, 0);
+    const bounds = createBounds();
+    if (filtered || sorted) {
+        numRows = 0;
+        for await (const block of processedBlocks()) {
+            numRows += block.numRows;
+            if (sorted) {
+                updateBounds(bounds, block);
+            }
+        }
+    }
+
+    if (numRows === 0) {
+        throw new Error('No Gaussians to write');
+    }
+
+    logger.info(`Streaming ${numRows} gaussians in blocks of ${blockRows} rows (${options.memoryBudget} MB budget)`);
+
+    const sortedBlocks = () => {
+        const numRuns = Math.ceil(numRows / runRows);
+        return externalMortonSort(processedBlocks(), outputSchema, bounds, {
+            runRows,
+            mergeRows: clamp(budget / 2 / numRuns / (rowBytes + 4), 1024, runRows),
+            blockRows
+        });
+    };
+
+    logger.info(`writing '${filename}'...`);
+
+    switch (outputFormat) {
+        case 'ply':
+            await writePlyBlocks({ filename, schema: outputSchema, numRows, blocks: processedBlocks() }, fs);
+            break;
+        case 'csv':
+            await writeCsvBlocks({ filename, schema: outputSchema, blocks: processedBlocks() }, fs);
+            break;
+        case 'compressed-ply':
+            await writeCompressedPlyBlocks({ filename, schema: outputSchema, numRows, blocks: sortedBlocks() }, fs);
+            break;
+    }
+};
+
+export { streamFile, type StreamSource };
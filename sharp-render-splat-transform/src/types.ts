@@ -1,3 +1,6 @@
+// SOG encoding tier: preview trades fidelity for speed and size
+type Quality = 'preview' | 'standard' | 'archival';
+
 type Options = {
     overwrite: boolean;
     help: boolean;
@@ -6,9 +9,12 @@ type Options = {
     iterations: number;
     listGpus: boolean;
     deviceIdx: number;  // -1 = auto, -2 = CPU, 0+ = GPU index
+    threads: number;    // worker threads for SOG compression, 1 = main thread only
+    quality: Quality;
+    memoryBudget: number;   // MB, 0 = load the whole scene into memory
 
     // lcc input options
-    lodSelect: number[];
+    lodSelect: number[] | 'auto';   // empty = all, 'auto' = per unit by distance to the filter-frustum cameras
 
     // html output options
     viewerSettingsJson?: any;
@@ -24,4 +30,4 @@ type Param = {
     value: string;
 };
 
-export type { Options, Param };
+export type { Options, Param, Quality };
@@ -40,6 +40,30 @@ class WebPCodec {
         return Buffer.from(bytes);
     }
 
+    encodeRGBA(rgba: Uint8Array, width: number, height: number, quality: number, stride = width * 4) {
+        const { Module } = this;
+
+        const inPtr = Module._malloc(rgba.length);
+        const outPtrPtr = Module._malloc(4);
+        const outSizePtr = Module._malloc(4);
+
+        Module.HEAPU8.set(rgba, inPtr);
+
+        const ok = Module._webp_encode_rgba(inPtr, width, height, stride, quality, outPtrPtr, outSizePtr);
+        if (!ok) {
+            throw new Error('WebP lossy encode failed');
+        }
+
+        const outPtr = Module.HEAPU32[outPtrPtr >> 2];
+        const outSize = Module.HEAPU32[outSizePtr >> 2];
+        const bytes = Module.HEAPU8.slice(outPtr, outPtr + outSize);
+
+        Module._webp_free(outPtr);
+        Module._free(inPtr); Module._free(outPtrPtr); Module._free(outSizePtr);
+
+        return Buffer.from(bytes);
+    }
+
     decodeRGBA(webp: Uint8Array): { rgba: Uint8Array, width: number, height: number } {
         const { Module } = this;
 
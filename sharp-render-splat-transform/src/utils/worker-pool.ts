@@ -0,0 +1,129 @@
+import { Worker } from 'node:worker_threads';
+
+type Task = {
+    id: number;
+    type: string;
+    payload: any;
+    transfer: ArrayBuffer[];
+    resolve: (result: any) => void;
+    reject: (err: Error) => void;
+};
+
+/**
+ * Fixed-size pool of worker threads running the same script. Tasks are queued and handed to the
+ * next idle worker. Workers receive `{ id, type, payload }` and must reply with `{ id, result }`
+ * or `{ id, error }`. A worker that dies fails its current task and leaves the pool; once no
+ * workers remain, queued and new tasks fail too.
+ */
+class WorkerPool {
+    size: number;
+
+    private workers: Worker[] = [];
+    private idle: Worker[] = [];
+    private queue: Task[] = [];
+    private active = new Map<Worker, Task>();
+    private nextId = 0;
+    private lastError: Error = null;
+
+    constructor(url: URL, size: number) {
+        this.size = size;
+
+        for (let i = 0; i < size; ++i) {
+            const worker = new Worker(url);
+
+            worker.on('message', (message: { id: number, result?: any, error?: string }) => {
+                const task = this.active.get(worker);
+                this.active.delete(worker);
+                this.idle.push(worker);
+
+                // idle workers don't keep the process alive, busy ones must so the
+                // process can't exit with tasks still pending
+                worker.unref();
+
+                if (message.error !== undefined) {
+                    task.reject(new Error(message.error));
+                } else {
+                    task.resolve(message.result);
+                }
+
+                this.dispatch();
+            });
+
+            worker.on('error', (err: Error) => {
+                this.remove(worker, err);
+            });
+
+            worker.on('exit', (code: number) => {
+                this.remove(worker, new Error(`Worker exited with code ${code}`));
+            });
+
+            worker.unref();
+
+            this.workers.push(worker);
+            this.idle.push(worker);
+        }
+    }
+
+    // workers still alive
+    get numWorkers() {
+        return this.workers.length;
+    }
+
+    /**
+     * Run a task on the next available worker.
+     * @param type - The task type understood by the worker script.
+     * @param payload - The task data.
+     * @param transfer - Buffers to transfer instead of copy. They are unusable afterwards.
+     * @returns The task result.
+     */
+    run<T>(type: string, payload: any, transfer: ArrayBuffer[] = []): Promise<T> {
+        return new Promise<T>((resolve, reject) => {
+            if (this.workers.length === 0) {
+                reject(new Error(`Worker pool has no workers left${this.lastError ? `: ${this.lastError.message}` : ''}`));
+                return;
+            }
+            this.queue.push({ id: this.nextId++, type, payload, transfer, resolve, reject });
+            this.dispatch();
+        });
+    }
+
+    async destroy() {
+        const workers = this.workers;
+        this.workers = [];
+        this.idle = [];
+        await Promise.all(workers.map(worker => worker.terminate()));
+    }
+
+    private dispatch() {
+        while (this.idle.length > 0 && this.queue.length > 0) {
+            const worker = this.idle.pop();
+            const task = this.queue.shift();
+            this.active.set(worker, task);
+            worker.ref();
+            worker.postMessage({ id: task.id, type: task.type, payload: task.payload }, task.transfer);
+        }
+    }
+
+    // drop a dead worker, failing its task, and the queue once no workers are left
+    private remove(worker: Worker, err: Error) {
+        if (!this.workers.includes(worker)) {
+            return;
+        }
+
+        this.lastError = err;
+        this.workers = this.workers.filter(w => w !== worker);
+        this.idle = this.idle.filter(w => w !== worker);
+
+        const task = this.active.get(worker);
+        this.active.delete(worker);
+        task?.reject(err);
+
+        if (this.workers.length === 0) {
+            const queue = this.queue;
+            this.queue = [];
+            queue.forEach(task => task.reject(new Error(`Worker pool has no workers left: ${err.message}`)));
+        }
+    }
+}
+
+export { WorkerPool };
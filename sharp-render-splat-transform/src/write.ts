@@ -58,7 +58,9 @@ const writeFile = async (writeOptions: WriteOptions, fs: FileSystem) => {
                 dataTable,
                 bundle: outputFormat === 'sog-bundle',
                 iterations: options.iterations,
-                deviceIdx: options.deviceIdx
+                deviceIdx: options.deviceIdx,
+                threads: options.threads,
+                quality: options.quality
             }, fs);
             break;
         case 'lod':
@@ -68,6 +70,8 @@ const writeFile = async (writeOptions: WriteOptions, fs: FileSystem) => {
                 envDataTable,
                 iterations: options.iterations,
                 deviceIdx: options.deviceIdx,
+                threads: options.threads,
+                quality: options.quality,
                 chunkCount: options.lodChunkCount,
                 chunkExtent: options.lodChunkExtent
             }, fs);
@@ -95,7 +99,9 @@ const writeFile = async (writeOptions: WriteOptions, fs: FileSystem) => {
                 viewerSettingsJson: options.viewerSettingsJson,
                 bundle: outputFormat === 'html-bundle',
                 iterations: options.iterations,
-                deviceIdx: options.deviceIdx
+                deviceIdx: options.deviceIdx,
+                threads: options.threads,
+                quality: options.quality
             }, fs);
             break;
     }
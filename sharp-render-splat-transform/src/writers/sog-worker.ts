@@ -0,0 +1,70 @@
+import { parentPort } from 'node:worker_threads';
+
+import { Column, DataTable } from '../data-table/data-table';
+import { KdTree } from '../spatial/kd-tree';
+import { WebPCodec } from '../utils/webp-codec';
+
+// worker thread entry point used by writeSog to run texture encodes and
+// k-means label assignment in parallel. each worker owns its own codec.
+
+let webPCodec: WebPCodec;
+
+type WebpTask = {
+    data: Uint8Array;
+    width: number;
+    height: number;
+    quality?: number;               // lossy quality 0-100, lossless when undefined
+};
+
+type LabelTask = {
+    points: Float32Array[];         // shared column data
+    centroids: Float32Array[];
+    labels: Uint32Array;            // shared output
+    start: number;
+    end: number;
+};
+
+const encodeWebp = async (task: WebpTask) => {
+    if (!webPCodec) {
+        webPCodec = await WebPCodec.create();
+    }
+    const { data, width, height, quality } = task;
+    return new Uint8Array(quality === undefined ?
+        webPCodec.encodeLosslessRGBA(data, width, height) :
+        webPCodec.encodeRGBA(data, width, height, quality));
+};
+
+// assign the points in [start, end) to their nearest centroid
+const assignLabels = (task: LabelTask) => {
+    const { points, centroids, labels, start, end } = task;
+    const kdTree = new KdTree(new DataTable(centroids.map((data, i) => new Column(`${i}`, data))));
+    const point = new Float32Array(points.length);
+
+    for (let i = start; i < end; ++i) {
+        for (let j = 0; j < points.length; ++j) {
+            point[j] = points[j][i];
+        }
+        labels[i] = kdTree.findNearest(point).index;
+    }
+};
+
+parentPort.on('message', async ({ id, type, payload }) => {
+    try {
+        switch (type) {
+            case 'webp': {
+                const result = await encodeWebp(payload);
+                parentPort.postMessage({ id, result }, [result.buffer]);
+                break;
+            }
+            case 'label': {
+                assignLabels(payload);
+                parentPort.postMessage({ id, result: null });
+                break;
+            }
+            default:
+                throw new Error(`Unknown task type '${type}'`);
+        }
+    } catch (err) {
+        parentPort.postMessage({ id, error: err?.message ?? String(err) });
+    }
+});
@@ -1,8 +1,14 @@
+import { Buffer } from 'node:buffer';
+import { FileHandle, mkdtemp, open, rm } from 'node:fs/promises';
+import { tmpdir } from 'node:os';
+import { join } from 'node:path';
+
 import { CompressedChunk } from './compressed-chunk';
 import { version } from '../../package.json';
+import { ColumnSchema } from '../data-table/block-source';
 import { DataTable } from '../data-table/data-table';
 import { sortMortonOrder } from '../data-table/morton-order';
-import { FileSystem } from '../serialize/file-system';
+import { FileSystem, Writer } from '../serialize/file-system';
 
 const generatedByString = `Generated by splat-transform ${version}`;
 
@@ -32,13 +38,12 @@ type WriteCompressedPlyOptions = {
     dataTable: DataTable;
 };
 
-const writeCompressedPly = async (options: WriteCompressedPlyOptions, fs: FileSystem) => {
-    const { filename, dataTable } = options;
+const getSHBands = (columnNames: string[]) => {
+    return { '9': 1, '24': 2, '-1': 3 }[shNames.findIndex(v => !columnNames.includes(v))] ?? 0;
+};
 
-    const shBands = { '9': 1, '24': 2, '-1': 3 }[shNames.findIndex(v => !dataTable.hasColumn(v))] ?? 0;
+const encodeHeader = (numSplats: number, shBands: number) => {
     const outputSHCoeffs = [0, 3, 8, 15][shBands];
-
-    const numSplats = dataTable.numRows;
     const numChunks = Math.ceil(numSplats / CHUNK_SIZE);
 
     const shHeader = shBands ? [
@@ -58,7 +63,57 @@ const writeCompressedPly = async (options: WriteCompressedPlyOptions, fs: FileSy
         'end_header\n'
     ].flat().join('\n');
 
-    const header = (new TextEncoder()).encode(headerText);
+    return (new TextEncoder()).encode(headerText);
+};
+
+// pack the rows at indices (at most CHUNK_SIZE of them) into chunk, writing the packed
+// vertex data and quantized sh data at the given offsets
+const packChunk = (chunk: CompressedChunk, dataTable: DataTable, indices: ArrayLike<number>, outputSHCoeffs: number, splatIData: Uint32Array, splatOffset: number, shData: Uint8Array, shOffset: number) => {
+    const row: any = {};
+    const num = indices.length;
+
+    for (let j = 0; j < num; ++j) {
+        // read splat data
+        dataTable.getRow(indices[j], row);
+
+        // update chunk
+        chunk.set(j, row);
+
+        // quantize and write sh data
+        let off = shOffset + j * outputSHCoeffs * 3;
+        for (let k = 0; k < outputSHCoeffs * 3; ++k) {
+            const nvalue = row[shNames[k]] / 8 + 0.5;
+            shData[off++] = Math.max(0, Math.min(255, Math.trunc(nvalue * 256)));
+        }
+    }
+
+    // repeat the last gaussian to fill the rest of the final chunk
+    for (let j = num; j < CHUNK_SIZE; ++j) {
+        chunk.set(j, row);
+    }
+
+    // pack the chunk
+    chunk.pack();
+
+    // write packed bits
+    for (let j = 0; j < num; ++j) {
+        splatIData[splatOffset + j * 4 + 0] = chunk.position[j];
+        splatIData[splatOffset + j * 4 + 1] = chunk.rotation[j];
+        splatIData[splatOffset + j * 4 + 2] = chunk.scale[j];
+        splatIData[splatOffset + j * 4 + 3] = chunk.color[j];
+    }
+};
+
+const writeCompressedPly = async (options: WriteCompressedPlyOptions, fs: FileSystem) => {
+    const { filename, dataTable } = options;
+
+    const shBands = getSHBands(dataTable.columnNames);
+    const outputSHCoeffs = [0, 3, 8, 15][shBands];
+
+    const numSplats = dataTable.numRows;
+    const numChunks = Math.ceil(numSplats / CHUNK_SIZE);
+
+    const header = encodeHeader(numSplats, shBands);
     const chunkData = new Float32Array(numChunks * chunkProps.length);
     const splatIData = new Uint32Array(numSplats * vertexProps.length);
     const shData = new Uint8Array(numSplats * outputSHCoeffs * 3);
@@ -70,48 +125,16 @@ const writeCompressedPly = async (options: WriteCompressedPlyOptions, fs: FileSy
     }
     sortMortonOrder(dataTable, sortIndices);
 
-    const row: any = {};
-
     const chunk = new CompressedChunk();
 
     for (let i = 0; i < numChunks; ++i) {
-        const num = Math.min(numSplats, (i + 1) * CHUNK_SIZE) - i * CHUNK_SIZE;
-        for (let j = 0; j < num; ++j) {
-            const index = sortIndices[i * CHUNK_SIZE + j];
-
-            // read splat data
-            dataTable.getRow(index, row);
-
-            // update chunk
-            chunk.set(j, row);
+        const start = i * CHUNK_SIZE;
+        const end = Math.min(numSplats, start + CHUNK_SIZE);
 
-            // quantize and write sh data
-            let off = (i * CHUNK_SIZE + j) * outputSHCoeffs * 3;
-            for (let k = 0; k < outputSHCoeffs * 3; ++k) {
-                const nvalue = row[shNames[k]] / 8 + 0.5;
-                shData[off++] = Math.max(0, Math.min(255, Math.trunc(nvalue * 256)));
-            }
-        }
-
-        // repeat the last gaussian to fill the rest of the final chunk
-        for (let j = num; j < CHUNK_SIZE; ++j) {
-            chunk.set(j, row);
-        }
-
-        // pack the chunk
-        chunk.pack();
+        packChunk(chunk, dataTable, sortIndices.subarray(start, end), outputSHCoeffs, splatIData, start * 4, shData, start * outputSHCoeffs * 3);
 
         // store the float data
         chunkData.set(chunk.chunkData, i * 18);
-
-        // write packed bits
-        const offset = i * CHUNK_SIZE * 4;
-        for (let j = 0; j < num; ++j) {
-            splatIData[offset + j * 4 + 0] = chunk.position[j];
-            splatIData[offset + j * 4 + 1] = chunk.rotation[j];
-            splatIData[offset + j * 4 + 2] = chunk.scale[j];
-            splatIData[offset + j * 4 + 3] = chunk.color[j];
-        }
     }
 
     const writer = await fs.createWriter(filename);
@@ -122,4 +145,84 @@ const writeCompressedPly = async (options: WriteCompressedPlyOptions, fs: FileSy
     await writer.close();
 };
 
-export { writeCompressedPly };
+type WriteCompressedPlyBlocksOptions = {
+    filename: string;
+    schema: ColumnSchema[];
+    numRows: number;                // total rows of all blocks
+    blocks: AsyncIterable<DataTable>;   // rows in output order, every block but the last a multiple of CHUNK_SIZE rows
+};
+
+// append the first length bytes of a temporary file to writer
+const copyToWriter = async (handle: FileHandle, length: number, writer: Writer) => {
+    const buffer = Buffer.alloc(1024 * 1024);
+    for (let position = 0; position < length; position += buffer.length) {
+        const size = Math.min(buffer.length, length - position);
+        await handle.read(buffer, 0, size, position);
+        await writer.write(buffer.subarray(0, size));
+    }
+};
+
+// write a compressed ply from a stream of presorted row blocks. only the chunk table is held
+// in memory; packed vertex and sh data are spilled to temporary files, since they follow the
+// chunk table in the file.
+const writeCompressedPlyBlocks = async (options: WriteCompressedPlyBlocksOptions, fs: FileSystem) => {
+    const { filename, schema, numRows, blocks } = options;
+
+    const shBands = getSHBands(schema.map(s => s.name));
+    const outputSHCoeffs = [0, 3, 8, 15][shBands];
+    const numChunks = Math.ceil(numRows / CHUNK_SIZE);
+    const chunkData = new Float32Array(numChunks * chunkProps.length);
+
+    const tempDir = await mkdtemp(join(tmpdir(), 'splat-transform-'));
+    let vertexFile: FileHandle;
+    let shFile: FileHandle;
+
+    try {
+        vertexFile = await open(join(tempDir, 'vertex.bin'), 'w+');
+        shFile = await open(join(tempDir, 'sh.bin'), 'w+');
+
+        const chunk = new CompressedChunk();
+        let written = 0;
+
+        for await (const block of blocks) {
+            if (written % CHUNK_SIZE !== 0) {
+                throw new Error(`Compressed PLY blocks must be a multiple of ${CHUNK_SIZE} rows`);
+            }
+
+            const splatIData = new Uint32Array(block.numRows * vertexProps.length);
+            const shData = new Uint8Array(block.numRows * outputSHCoeffs * 3);
+            const indices = new Uint32Array(CHUNK_SIZE);
+
+            for (let start = 0; start < block.numRows; start += CHUNK_SIZE) {
+                const num = Math.min(CHUNK_SIZE, block.numRows - start);
+                for (let j = 0; j < num; ++j) {
+                    indices[j] = start + j;
+                }
+
+                packChunk(chunk, block, indices.subarray(0, num), outputSHCoeffs, splatIData, start * 4, shData, start * outputSHCoeffs * 3);
+                chunkData.set(chunk.chunkData, ((written + start) / CHUNK_SIZE) * 18);
+            }
+
+            await vertexFile.write(new Uint8Array(splatIData.buffer));
+            await shFile.write(shData);
+            written += block.numRows;
+        }
+
+        if (written !== numRows) {
+            throw new Error(`Expected ${numRows} rows but received ${written}`);
+        }
+
+        const writer = await fs.createWriter(filename);
+        await writer.write(encodeHeader(numRows, shBands));
+        await writer.write(new Uint8Array(chunkData.buffer));
+        await copyToWriter(vertexFile, numRows * vertexProps.length * 4, writer);
+        await copyToWriter(shFile, numRows * outputSHCoeffs * 3, writer);
+        await writer.close();
+    } finally {
+        await vertexFile?.close();
+        await shFile?.close();
+        await rm(tempDir, { recursive: true, force: true });
+    }
+};
+
+export { writeCompressedPly, writeCompressedPlyBlocks };
@@ -1,16 +1,30 @@
+import { ColumnSchema } from '../data-table/block-source';
 import { DataTable } from '../data-table/data-table';
-import { FileSystem } from '../serialize/file-system';
+import { FileSystem, Writer } from '../serialize/file-system';
 
 type WriteCSVOptions = {
     filename: string;
     dataTable: DataTable;
 };
 
+const writeRows = async (writer: Writer, dataTable: DataTable, textEncoder: TextEncoder) => {
+    const len = dataTable.numRows;
+    const columns = dataTable.columns.map(c => c.data);
+
+    // write rows
+    for (let i = 0; i < len; ++i) {
+        let row = '';
+        for (let c = 0; c < columns.length; ++c) {
+            if (c) row += ',';
+            row += columns[c][i];
+        }
+        await writer.write(textEncoder.encode(`${row}\n`));
+    }
+};
+
 const writeCsv = async (options: WriteCSVOptions, fs: FileSystem) => {
     const { filename, dataTable } = options;
 
-    const len = dataTable.numRows;
-
     const textEncoder = new TextEncoder();
 
     const writer = await fs.createWriter(filename);
@@ -18,19 +32,32 @@ const writeCsv = async (options: WriteCSVOptions, fs: FileSystem) => {
     // write header
     await writer.write(textEncoder.encode(`${dataTable.columnNames.join(',')}\n`));
 
-    const columns = dataTable.columns.map(c => c.data);
+    await writeRows(writer, dataTable, textEncoder);
 
-    // write rows
-    for (let i = 0; i < len; ++i) {
-        let row = '';
-        for (let c = 0; c < dataTable.columns.length; ++c) {
-            if (c) row += ',';
-            row += columns[c][i];
-        }
-        await writer.write(textEncoder.encode(`${row}\n`));
+    await writer.close();
+};
+
+type WriteCSVBlocksOptions = {
+    filename: string;
+    schema: ColumnSchema[];
+    blocks: AsyncIterable<DataTable>;
+};
+
+// write rows as they arrive from a stream of row blocks
+const writeCsvBlocks = async (options: WriteCSVBlocksOptions, fs: FileSystem) => {
+    const { filename, schema, blocks } = options;
+
+    const textEncoder = new TextEncoder();
+
+    const writer = await fs.createWriter(filename);
+
+    await writer.write(textEncoder.encode(`${schema.map(s => s.name).join(',')}\n`));
+
+    for await (const block of blocks) {
+        await writeRows(writer, block, textEncoder);
     }
 
     await writer.close();
 };
 
-export { writeCsv };
+export { writeCsv, writeCsvBlocks };
@@ -7,6 +7,7 @@ import { DataTable } from '../data-table/data-table';
 import { FileSystem } from '../serialize/file-system';
 import { MemoryFileSystem } from '../serialize/memory-file-system';
 import { writeFile } from '../serialize/write-helpers';
+import { Quality } from '../types';
 import { toBase64 } from '../utils/base64';
 
 type ViewerSettings = {
@@ -30,10 +31,12 @@ type WriteHtmlOptions = {
     bundle: boolean;
     iterations: number;
     deviceIdx: number;
+    threads?: number;
+    quality?: Quality;
 };
 
 const writeHtml = async (options: WriteHtmlOptions, fs: FileSystem) => {
-    const { filename, dataTable, viewerSettingsJson, bundle, iterations, deviceIdx } = options;
+    const { filename, dataTable, viewerSettingsJson, bundle, iterations, deviceIdx, threads, quality } = options;
 
     const pad = (text: string, spaces: number) => {
         const whitespace = ' '.repeat(spaces);
@@ -112,7 +115,9 @@ const writeHtml = async (options: WriteHtmlOptions, fs: FileSystem) => {
             dataTable,
             bundle: true,
             iterations,
-            deviceIdx
+            deviceIdx,
+            threads,
+            quality
         }, memoryFs);
 
         // get the memory buffer
@@ -144,7 +149,9 @@ const writeHtml = async (options: WriteHtmlOptions, fs: FileSystem) => {
             dataTable,
             bundle: true,
             iterations,
-            deviceIdx
+            deviceIdx,
+            threads,
+            quality
         }, fs);
 
         // Write CSS file
@@ -7,6 +7,7 @@ import { TypedArray, DataTable } from '../data-table/data-table';
 import { sortMortonOrder } from '../data-table/morton-order';
 import { FileSystem } from '../serialize/file-system';
 import { BTreeNode, BTree } from '../spatial/b-tree';
+import { Quality } from '../types';
 import { logger } from '../utils/logger';
 
 
@@ -141,12 +142,14 @@ type WriteLodOptions = {
     envDataTable: DataTable | null;
     iterations: number;
     deviceIdx: number;
+    threads?: number;
+    quality?: Quality;
     chunkCount: number;
     chunkExtent: number;
 };
 
 const writeLod = async (options: WriteLodOptions, fs: FileSystem) => {
-    const { filename, dataTable, envDataTable, iterations, deviceIdx, chunkCount, chunkExtent } = options;
+    const { filename, dataTable, envDataTable, iterations, deviceIdx, threads, quality, chunkCount, chunkExtent } = options;
 
     const outputDir = dirname(filename);
 
@@ -167,7 +170,9 @@ const writeLod = async (options: WriteLodOptions, fs: FileSystem) => {
             dataTable: envDataTable,
             bundle: false,
             iterations,
-            deviceIdx
+            deviceIdx,
+            threads,
+            quality
         }, fs);
     }
 
@@ -308,7 +313,9 @@ const writeLod = async (options: WriteLodOptions, fs: FileSystem) => {
                 indices,
                 bundle: false,
                 iterations,
-                deviceIdx
+                deviceIdx,
+                threads,
+                quality
             }, fs);
         }
     }
@@ -1,5 +1,7 @@
+import { ColumnSchema } from '../data-table/block-source';
+import { Column, DataTable } from '../data-table/data-table';
 import { PlyData } from '../readers/read-ply';
-import { FileSystem } from '../serialize/file-system';
+import { FileSystem, Writer } from '../serialize/file-system';
 
 const columnTypeToPlyType = (type: string): string => {
     switch (type) {
@@ -19,17 +21,15 @@ type WritePlyOptions = {
     plyData: PlyData;
 };
 
-const writePly = async (options: WritePlyOptions, fs: FileSystem) => {
-    const { filename, plyData } = options;
-
+const encodeHeader = (comments: string[], elements: { name: string, numRows: number, columns: { name: string, dataType: string }[] }[]) => {
     const header = [
         'ply',
         'format binary_little_endian 1.0',
-        plyData.comments.map(c => `comment ${c}`),
-        plyData.elements.map((element) => {
+        comments.map(c => `comment ${c}`),
+        elements.map((element) => {
             return [
-                `element ${element.name} ${element.dataTable.numRows}`,
-                element.dataTable.columns.map((column) => {
+                `element ${element.name} ${element.numRows}`,
+                element.columns.map((column) => {
                     return `property ${columnTypeToPlyType(column.dataType)} ${column.name}`;
                 })
             ];
@@ -37,43 +37,90 @@ const writePly = async (options: WritePlyOptions, fs: FileSystem) => {
         'end_header'
     ];
 
+    return (new TextEncoder()).encode(`${header.flat(3).join('\n')}\n`);
+};
+
+// write the rows of a table in binary ply layout
+const writeRows = async (writer: Writer, table: DataTable) => {
+    const columns = table.columns;
+    const buffers = columns.map(c => Buffer.from(c.data.buffer, c.data.byteOffset, c.data.byteLength));
+    const sizes = columns.map(c => c.data.BYTES_PER_ELEMENT);
+    const rowSize = sizes.reduce((total, size) => total + size, 0);
+
+    // write to file in chunks of 1024 rows
+    const chunkSize = 1024;
+    const numChunks = Math.ceil(table.numRows / chunkSize);
+    const chunkData = Buffer.alloc(chunkSize * rowSize);
+
+    for (let c = 0; c < numChunks; ++c) {
+        const numRows = Math.min(chunkSize, table.numRows - c * chunkSize);
+
+        let offset = 0;
+
+        for (let r = 0; r < numRows; ++r) {
+            const rowOffset = c * chunkSize + r;
+
+            for (let p = 0; p < columns.length; ++p) {
+                const s = sizes[p];
+                buffers[p].copy(chunkData, offset, rowOffset * s, rowOffset * s + s);
+                offset += s;
+            }
+        }
+
+        // write the chunk
+        await writer.write(chunkData.subarray(0, offset));
+    }
+};
+
+const writePly = async (options: WritePlyOptions, fs: FileSystem) => {
+    const { filename, plyData } = options;
+
     // write the header
     const writer = await fs.createWriter(filename);
-    await writer.write((new TextEncoder()).encode(`${header.flat(3).join('\n')}\n`));
+    await writer.write(encodeHeader(plyData.comments, plyData.elements.map((element) => {
+        return {
+            name: element.name,
+            numRows: element.dataTable.numRows,
+            columns: element.dataTable.columns
+        };
+    })));
 
     for (let i = 0; i < plyData.elements.length; ++i) {
-        const table = plyData.elements[i].dataTable;
-        const columns = table.columns;
-        const buffers = columns.map(c => Buffer.from(c.data.buffer));
-        const sizes = columns.map(c => c.data.BYTES_PER_ELEMENT);
-        const rowSize = sizes.reduce((total, size) => total + size, 0);
-
-        // write to file in chunks of 1024 rows
-        const chunkSize = 1024;
-        const numChunks = Math.ceil(table.numRows / chunkSize);
-        const chunkData = Buffer.alloc(chunkSize * rowSize);
-
-        for (let c = 0; c < numChunks; ++c) {
-            const numRows = Math.min(chunkSize, table.numRows - c * chunkSize);
-
-            let offset = 0;
-
-            for (let r = 0; r < numRows; ++r) {
-                const rowOffset = c * chunkSize + r;
-
-                for (let p = 0; p < columns.length; ++p) {
-                    const s = sizes[p];
-                    buffers[p].copy(chunkData, offset, rowOffset * s, rowOffset * s + s);
-                    offset += s;
-                }
-            }
+        await writeRows(writer, plyData.elements[i].dataTable);
+    }
 
-            // write the chunk
-            await writer.write(chunkData.subarray(0, offset));
-        }
+    await writer.close();
+};
+
+type WritePlyBlocksOptions = {
+    filename: string;
+    schema: ColumnSchema[];
+    numRows: number;                // total rows of all blocks, written to the header
+    blocks: AsyncIterable<DataTable>;
+};
+
+// write a vertex-only ply from a stream of row blocks, holding one block at a time
+const writePlyBlocks = async (options: WritePlyBlocksOptions, fs: FileSystem) => {
+    const { filename, schema, numRows, blocks } = options;
+
+    const writer = await fs.createWriter(filename);
+    await writer.write(encodeHeader([], [{
+        name: 'vertex',
+        numRows,
+        columns: schema.map(s => new Column(s.name, new s.type(0)))
+    }]));
+
+    let written = 0;
+    for await (const block of blocks) {
+        await writeRows(writer, block);
+        written += block.numRows;
+    }
+
+    if (written !== numRows) {
+        throw new Error(`Expected ${numRows} rows but received ${written}`);
     }
 
     await writer.close();
 };
 
-export { writePly };
+export { writePly, writePlyBlocks };
@@ -7,10 +7,12 @@ import { createDevice, enumerateAdapters, GpuDevice } from '../gpu/gpu-device';
 import { FileSystem } from '../serialize/file-system';
 import { writeFile } from '../serialize/write-helpers';
 import { ZipFileSystem } from '../serialize/zip-file-system';
-import { kmeans } from '../spatial/k-means';
+import { ClusterFunc, kmeans } from '../spatial/k-means';
+import { Quality } from '../types';
 import { logger } from '../utils/logger';
 import { sigmoid } from '../utils/math';
 import { WebPCodec } from '../utils/webp-codec';
+import { WorkerPool } from '../utils/worker-pool';
 
 const shNames = new Array(45).fill('').map((_, i) => `f_rest_${i}`);
 
@@ -36,6 +38,10 @@ const logTransform = (value: number) => {
     return Math.sign(value) * Math.log(Math.abs(value) + 1);
 };
 
+const invLogTransform = (value: number) => {
+    return Math.sign(value) * (Math.exp(Math.abs(value)) - 1);
+};
+
 // no packing
 const identity = (index: number, width: number) => {
     return index;
@@ -50,12 +56,54 @@ const generateIndices = (dataTable: DataTable) => {
     return result;
 };
 
+type KmeansFunc = (points: DataTable, k: number) => Promise<{ centroids: DataTable, labels: Uint32Array }>;
+
+// split k-means label assignment across the worker pool. the points are copied
+// into shared memory once, after which each iteration only shares the centroids.
+const pooledCluster = (pool: WorkerPool): ClusterFunc => {
+    let points: DataTable;
+    let sharedPoints: Float32Array[];
+    let sharedLabels: Uint32Array;
+
+    const toShared = (data: ArrayLike<number>) => {
+        const result = new Float32Array(new SharedArrayBuffer(data.length * 4));
+        result.set(data);
+        return result;
+    };
+
+    return async (p: DataTable, centroids: DataTable, labels: Uint32Array) => {
+        if (p !== points) {
+            points = p;
+            sharedPoints = p.columns.map(c => toShared(c.data));
+            sharedLabels = new Uint32Array(new SharedArrayBuffer(p.numRows * 4));
+        }
+
+        const sharedCentroids = centroids.columns.map(c => toShared(c.data));
+        const { numRows } = p;
+        const numTasks = Math.max(1, Math.min(pool.size, Math.ceil(numRows / 4096)));
+
+        const tasks = [];
+        for (let i = 0; i < numTasks; ++i) {
+            tasks.push(pool.run('label', {
+                points: sharedPoints,
+                centroids: sharedCentroids,
+                labels: sharedLabels,
+                start: Math.floor(i * numRows / numTasks),
+                end: Math.floor((i + 1) * numRows / numTasks)
+            }));
+        }
+        await Promise.all(tasks);
+
+        labels.set(sharedLabels);
+    };
+};
+
 // convert a dataTable with multiple columns into a single column
 // calculate 256 clusters using kmeans
 // return
 //      - the resulting labels in a new datatable having same shape as the input
 //      - array of 256 centroids
-const cluster1d = async (dataTable: DataTable, iterations: number, device?: GpuDevice) => {
+const cluster1d = async (dataTable: DataTable, runKmeans: KmeansFunc) => {
     const { numColumns, numRows } = dataTable;
 
     // construct 1d points from the columns of data
@@ -66,7 +114,7 @@ const cluster1d = async (dataTable: DataTable, iterations: number, device?: GpuD
 
     const src = new DataTable([new Column('data', data)]);
 
-    const { centroids, labels } = await kmeans(src, 256, iterations, device);
+    const { centroids, labels } = await runKmeans(src, 256);
 
     // order centroids smallest to largest
     const centroidsData = centroids.getColumn(0).data;
@@ -102,6 +150,55 @@ const cluster1d = async (dataTable: DataTable, iterations: number, device?: GpuD
 
 let webPCodec: WebPCodec;
 let gpuDevice: GpuDevice;
+let workerPool: WorkerPool;
+
+// the pool is shared by all writeSog calls in the process (LOD writes many SOGs)
+const getWorkerPool = async (threads: number) => {
+    if (workerPool?.size !== threads || workerPool.numWorkers === 0) {
+        await workerPool?.destroy();
+        workerPool = new WorkerPool(new URL('./sog-worker.mjs', import.meta.url), threads);
+    }
+    return workerPool;
+};
+
+// textures are written in this order regardless of which encode finishes first
+const textureOrder = [
+    'means_l.webp',
+    'means_u.webp',
+    'quats.webp',
+    'scales.webp',
+    'sh0.webp',
+    'shN_centroids.webp',
+    'shN_labels.webp'
+];
+
+type QualityTier = {
+    iterations: (requested: number) => number;
+    maxShBands: number;
+    maxPaletteSize: number;         // SH palette entries in K
+    lossyQuality?: number;          // webp quality for the low position bytes, lossless when undefined
+};
+
+// preview spends a fraction of the clustering time and drops detail that is hard to
+// see in a quick look. archival spends extra iterations on a closer palette fit.
+const qualityTiers: Record<Quality, QualityTier> = {
+    preview: {
+        iterations: requested => Math.min(requested, 3),
+        maxShBands: 1,
+        maxPaletteSize: 16,
+        lossyQuality: 85
+    },
+    standard: {
+        iterations: requested => requested,
+        maxShBands: 3,
+        maxPaletteSize: 64
+    },
+    archival: {
+        iterations: requested => requested * 2,
+        maxShBands: 3,
+        maxPaletteSize: 64
+    }
+};
 
 type WriteSogOptions = {
     filename: string;
@@ -110,10 +207,15 @@ type WriteSogOptions = {
     bundle: boolean;
     iterations: number;
     deviceIdx: number;
+    threads?: number;               // worker threads for encoding and clustering, 1 = none
+    quality?: Quality;
 };
 
 const writeSog = async (options: WriteSogOptions, fs: FileSystem) => {
-    const { filename: outputFilename, bundle, dataTable, iterations, deviceIdx } = options;
+    const { filename: outputFilename, bundle, dataTable, deviceIdx, threads = 1, quality = 'standard' } = options;
+
+    const tier = qualityTiers[quality];
+    const iterations = tier.iterations(options.iterations);
 
     // initialize output stream - use ZipFileSystem for bundled output
     const zipFs = bundle ? new ZipFileSystem(await fs.createWriter(outputFilename)) : null;
@@ -128,18 +230,43 @@ const writeSog = async (options: WriteSogOptions, fs: FileSystem) => {
     // the layout function determines how the data is packed into the output texture.
     const layout = identity; // rectChunks;
 
-    const writeWebp = async (filename: string, data: Uint8Array, w = width, h = height) => {
-        const pathname = zipFs ? filename : resolve(dirname(outputFilename), filename);
-        logger.info(`writing '${pathname}'...`);
+    const pool = threads > 1 ? await getWorkerPool(threads) : null;
+
+    // GPU k-means jobs share one device, so run them one at a time
+    let gpuQueue = Promise.resolve();
+
+    const runKmeans: KmeansFunc = (points: DataTable, k: number) => {
+        if (gpuDevice) {
+            const result = gpuQueue.then(() => kmeans(points, k, iterations, gpuDevice));
+            gpuQueue = result.then(() => undefined, () => undefined);
+            return result;
+        }
+        return kmeans(points, k, iterations, undefined, pool ? pooledCluster(pool) : undefined);
+    };
 
+    const textures = new Map<string, Uint8Array>();
+
+    // rms errors of the encoded data against the source, reported in the summary
+    const errors = { position: 0, sh: 0 };
+
+    const getWebPCodec = async () => {
         // construct the encoder on first use
         if (!webPCodec) {
             webPCodec = await WebPCodec.create();
         }
+        return webPCodec;
+    };
 
-        const webp = await webPCodec.encodeLosslessRGBA(data, w, h);
-
-        await writeFile(outputFs, pathname, webp);
+    const writeWebp = async (filename: string, data: Uint8Array, w = width, h = height, lossyQuality?: number) => {
+        let webp: Uint8Array;
+        if (pool) {
+            // data is not used after encoding, so hand its buffer to the worker
+            webp = await pool.run<Uint8Array>('webp', { data, width: w, height: h, quality: lossyQuality }, [data.buffer as ArrayBuffer]);
+        } else {
+            const codec = await getWebPCodec();
+            webp = lossyQuality === undefined ? codec.encodeLosslessRGBA(data, w, h) : codec.encodeRGBA(data, w, h, lossyQuality);
+        }
+        textures.set(filename, webp);
     };
 
     const writeTableData = (filename: string, dataTable: DataTable, w = width, h = height) => {
@@ -186,8 +313,41 @@ const writeSog = async (options: WriteSogOptions, fs: FileSystem) => {
             meansU[ti * 4 + 2] = (z >> 8) & 0xff;
             meansU[ti * 4 + 3] = 0xff;
         }
-        await writeWebp('means_l.webp', meansL);
-        await writeWebp('means_u.webp', meansU);
+
+        // distance between the source positions and those decoded from the textures
+        const calcPositionError = (lower: Uint8Array, upper: Uint8Array) => {
+            const meansRow: any = {};
+            let sum = 0;
+            for (let i = 0; i < indices.length; ++i) {
+                dataTable.getRow(indices[i], meansRow, meansColumns);
+                const ti = layout(i, width);
+                for (let j = 0; j < 3; ++j) {
+                    const [min, max] = meansMinMax[j];
+                    const q = (upper[ti * 4 + j] << 8) | lower[ti * 4 + j];
+                    const v = invLogTransform(min + (max - min) * q / 65535);
+                    sum += (v - meansRow[meansNames[j]]) ** 2;
+                }
+            }
+            return Math.sqrt(sum / Math.max(1, indices.length));
+        };
+
+        // the low bytes carry the least position information, so they are the only
+        // means data that is lossy encoded. the error is measured after decoding.
+        const { lossyQuality } = tier;
+        const upper = lossyQuality === undefined ? meansU : meansU.slice();
+        if (lossyQuality === undefined) {
+            errors.position = calcPositionError(meansL, upper);
+        }
+
+        await Promise.all([
+            writeWebp('means_l.webp', meansL, width, height, lossyQuality),
+            writeWebp('means_u.webp', meansU)
+        ]);
+
+        if (lossyQuality !== undefined) {
+            const decoded = (await getWebPCodec()).decodeRGBA(textures.get('means_l.webp'));
+            errors.position = calcPositionError(decoded.rgba, upper);
+        }
 
         return {
             mins: meansMinMax.map(v => v[0]),
@@ -251,8 +411,7 @@ const writeSog = async (options: WriteSogOptions, fs: FileSystem) => {
     const writeScales = async () => {
         const scaleData = await cluster1d(
             new DataTable(['scale_0', 'scale_1', 'scale_2'].map(name => dataTable.getColumnByName(name))),
-            iterations,
-            gpuDevice
+            runKmeans
         );
 
         await writeTableData('scales.webp', scaleData.labels);
@@ -263,8 +422,7 @@ const writeSog = async (options: WriteSogOptions, fs: FileSystem) => {
     const writeColors = async () => {
         const colorData = await cluster1d(
             new DataTable(['f_dc_0', 'f_dc_1', 'f_dc_2'].map(name => dataTable.getColumnByName(name))),
-            iterations,
-            gpuDevice
+            runKmeans
         );
 
         // generate and store sigmoid(opacity) [0..1]
@@ -280,9 +438,12 @@ const writeSog = async (options: WriteSogOptions, fs: FileSystem) => {
         return Array.from(colorData.centroids.getColumn(0).data);
     };
 
-    const writeSH = async (shBands: number) => {
+    const writeSH = async (shBands: number, srcBands: number) => {
         const shCoeffs = [0, 3, 8, 15][shBands];
-        const shColumnNames = shNames.slice(0, shCoeffs * 3);
+        const srcCoeffs = [0, 3, 8, 15][srcBands];
+
+        // coefficients are stored channel-major, so truncated bands leave gaps in the source names
+        const shColumnNames = [0, 1, 2].flatMap(c => shNames.slice(c * srcCoeffs, c * srcCoeffs + shCoeffs));
         const shColumns = shColumnNames.map(name => dataTable.getColumnByName(name));
 
         // create a table with just spherical harmonics data
@@ -292,13 +453,13 @@ const writeSog = async (options: WriteSogOptions, fs: FileSystem) => {
         // indices.
         const shDataTable = new DataTable(shColumns);
 
-        const paletteSize = Math.min(64, 2 ** Math.floor(Math.log2(indices.length / 1024))) * 1024;
+        const paletteSize = Math.min(tier.maxPaletteSize, 2 ** Math.floor(Math.log2(indices.length / 1024))) * 1024;
 
         // calculate kmeans
-        const { centroids, labels } = await kmeans(shDataTable, paletteSize, iterations, gpuDevice);
+        const { centroids, labels } = await runKmeans(shDataTable, paletteSize);
 
         // construct a codebook for all spherical harmonic coefficients
-        const codebook = await cluster1d(centroids, iterations, gpuDevice);
+        const codebook = await cluster1d(centroids, runKmeans);
 
         // write centroids
         const centroidsBuf = new Uint8Array(64 * shCoeffs * Math.ceil(centroids.numRows / 64) * channels);
@@ -317,7 +478,7 @@ const writeSog = async (options: WriteSogOptions, fs: FileSystem) => {
                 centroidsBuf[i * shCoeffs * 4 + j * 4 + 3] = 0xff;
             }
         }
-        await writeWebp('shN_centroids.webp', centroidsBuf, 64 * shCoeffs, Math.ceil(centroids.numRows / 64));
+        const writeCentroids = writeWebp('shN_centroids.webp', centroidsBuf, 64 * shCoeffs, Math.ceil(centroids.numRows / 64));
 
         // write labels
         const labelsBuf = new Uint8Array(width * height * channels);
@@ -330,7 +491,28 @@ const writeSog = async (options: WriteSogOptions, fs: FileSystem) => {
             labelsBuf[ti * 4 + 2] = 0;
             labelsBuf[ti * 4 + 3] = 0xff;
         }
-        await writeWebp('shN_labels.webp', labelsBuf);
+        await Promise.all([writeCentroids, writeWebp('shN_labels.webp', labelsBuf)]);
+
+        // compare the palette reconstruction against the source, counting truncated bands as error
+        const codebookValues = codebook.centroids.getColumn(0).data;
+        const keptSrc = shColumns.map(c => c.data);
+        const keptCodes = shColumnNames.map(name => codebook.labels.getColumnByName(name).data);
+        const droppedSrc = shNames.slice(0, srcCoeffs * 3)
+        .filter(name => !shColumnNames.includes(name))
+        .map(name => dataTable.getColumnByName(name).data);
+
+        let sum = 0;
+        for (let i = 0; i < indices.length; ++i) {
+            const idx = indices[i];
+            const label = labels[idx];
+            for (let j = 0; j < keptSrc.length; ++j) {
+                sum += (codebookValues[keptCodes[j][label]] - keptSrc[j][idx]) ** 2;
+            }
+            for (let j = 0; j < droppedSrc.length; ++j) {
+                sum += droppedSrc[j][idx] ** 2;
+            }
+        }
+        errors.sh = Math.sqrt(sum / Math.max(1, indices.length * srcCoeffs * 3));
 
         return {
             count: paletteSize,
@@ -343,11 +525,8 @@ const writeSog = async (options: WriteSogOptions, fs: FileSystem) => {
         };
     };
 
-    const shBands = { '9': 1, '24': 2, '-1': 3 }[shNames.findIndex(v => !dataTable.hasColumn(v))] ?? 0;
-
-    // convert and write attributes
-    const meansMinMax = await writeMeans();
-    await writeQuaternions();
+    const srcBands = { '9': 1, '24': 2, '-1': 3 }[shNames.findIndex(v => !dataTable.hasColumn(v))] ?? 0;
+    const shBands = Math.min(srcBands, tier.maxShBands);
 
     // Initialize GPU device if not using CPU mode
     // device: -1 = auto, -2 = CPU, 0+ = specific GPU index
@@ -367,9 +546,31 @@ const writeSog = async (options: WriteSogOptions, fs: FileSystem) => {
         gpuDevice = await createDevice(adapterName);
     }
 
-    const scalesCodebook = await writeScales();
-    const colorsCodebook = await writeColors();
-    const shN = shBands > 0 ? await writeSH(shBands) : null;
+    // convert attributes. the branches are independent, so their clustering and
+    // texture encodes run concurrently on the worker pool when one is available.
+    const [meansMinMax, , scalesCodebook, colorsCodebook, shN] = await Promise.all([
+        writeMeans(),
+        writeQuaternions(),
+        writeScales(),
+        writeColors(),
+        shBands > 0 ? writeSH(shBands, srcBands) : null
+    ]);
+
+    // write textures
+    for (const filename of textureOrder) {
+        if (textures.has(filename)) {
+            const pathname = zipFs ? filename : resolve(dirname(outputFilename), filename);
+            logger.info(`writing '${pathname}'...`);
+            await writeFile(outputFs, pathname, textures.get(filename));
+        }
+    }
+
+    const textureBytes = textureOrder.reduce((sum, filename) => sum + (textures.get(filename)?.length ?? 0), 0);
+    logger.info(
+        `${quality} quality: ${(textureBytes / 1024).toFixed(1)} KiB (${(textureBytes * 8 / Math.max(1, numRows)).toFixed(2)} bits/splat), ` +
+        `${iterations} iterations, ${shBands}/${srcBands} SH bands, ` +
+        `position rms error ${errors.position.toExponential(2)}, SH rms error ${errors.sh.toExponential(2)}`
+    );
 
     // construct meta.json
     const meta: any = {
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Tests for sharded orbit rendering across render workers"""
+
+import hashlib
+import shutil
+import sys
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sharp_render_distributed import (
+    TOKEN_HEADER, LocalWorkers, RenderCoordinator, RenderWorker, pack_frames, split_frames, unpack_frames
+)
+from sharp_render_scheduler import JobScheduler
+from sharp_render_splat_data import SplatData
+
+ROOT = Path(__file__).parent
+TOKEN = "test-token"
+
+
+class FakeSplat:
+    """Stands in for SplatTransform, writing each frame as its index and scene names"""
+
+    def __init__(self, failures=0):
+        self.scheduler = JobScheduler(shared_dir="")
+        self.failures = failures
+        self.calls = []
+        self.barrier = None
+
+    def render_orbit(self, input_ply, output_dir, frame_range, client="", cleanup=False, **params):
+        self.calls.append((tuple(frame_range), client, params))
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("renderer crashed")
+
+        # like orbit-render, keep scratch files next to the output directory
+        scratch = Path(output_dir).parent / ".temp_splat_render"
+        scratch.mkdir(parents=True, exist_ok=True)
+        (scratch / "cameras.json").write_text(repr(frame_range))
+        if self.barrier is not None:
+            self.barrier.wait(timeout=10)
+        if (scratch / "cameras.json").read_text() != repr(frame_range):
+            raise RuntimeError("scratch files overwritten by another render")
+        if cleanup:
+            shutil.rmtree(scratch)
+
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        names = ",".join(Path(scene["path"]).name[:8] for scene in input_ply)
+        files = []
+        for i in range(*frame_range):
+            path = Path(output_dir) / f"frame_{i:03d}.png"
+            path.write_bytes(f"{i}:{names}".encode())
+            files.append(str(path))
+        return files
+
+
+@pytest.fixture
+def workers(tmp_path):
+    started = []
+
+    def start(count=2, **kwargs):
+        for i in range(count):
+            worker = RenderWorker(str(tmp_path / f"worker-{i}"), splat=FakeSplat(), token=TOKEN, **kwargs)
+            worker.url = worker.serve("127.0.0.1", 0)
+            started.append(worker)
+        return started[-count:]
+
+    yield start
+    for worker in started:
+        worker.shutdown()
+
+
+def make_scene(tmp_path, name, count=64):
+    rng = np.random.default_rng(count)
+    splat = SplatData({axis: rng.standard_normal(count).astype(np.float32) for axis in "xyz"})
+    return splat.save_ply(str(tmp_path / name))
+
+
+def request(url, method="GET", data=None, headers=None):
+    req = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return response.status
+
+
+def test_split_frames():
+    assert split_frames(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    # more shards than frames, and no shards
+    assert split_frames(2, 5) == [(0, 1), (1, 2)]
+    assert split_frames(4, 0) == [(0, 4)]
+
+
+def test_pack_frames_round_trip():
+    frames = [(3, b"png three"), (4, b""), (5, b"\x89PNG")]
+    assert unpack_frames(pack_frames(frames)) == frames
+    assert unpack_frames(b"") == []
+
+    body = pack_frames(frames)
+    with pytest.raises(ValueError, match="frame 5"):
+        unpack_frames(body[:-1])
+    with pytest.raises(ValueError, match="record"):
+        unpack_frames(body[:4])
+
+
+def test_frames_come_back_in_order_and_scenes_upload_once(tmp_path, workers, capsys):
+    first, second = workers(2)
+    scene = make_scene(tmp_path, "scene.ply")
+    splat = SplatData.from_ply(scene)
+    coordinator = RenderCoordinator([first.url, second.url], token=TOKEN)
+
+    frame_files = coordinator.render_orbit([scene, splat], str(tmp_path / "out"), frames=10, shards=4)
+
+    assert [Path(f).name for f in frame_files] == [f"frame_{i:03d}.png" for i in range(10)]
+    assert [Path(f).read_bytes().split(b":")[0] for f in frame_files] == [str(i).encode() for i in range(10)]
+    # the file and in-memory copy of the same scene share one cache entry
+    assert {first.status()["scenes"], second.status()["scenes"]} == {1}
+    assert sorted(r for w in (first, second) for r, _, _ in w.splat.calls) == [(0, 2), (2, 5), (5, 7), (7, 10)]
+
+    capsys.readouterr()
+    coordinator.render_orbit(scene, str(tmp_path / "again"), frames=4)
+    assert "Uploading" not in capsys.readouterr().out
+
+
+def test_failed_shard_is_retried_on_another_worker(tmp_path, workers):
+    broken, healthy = workers(2)
+    broken.splat.failures = 1
+    coordinator = RenderCoordinator([broken.url, healthy.url], token=TOKEN, retries=1)
+
+    frame_files = coordinator.render_orbit(make_scene(tmp_path, "scene.ply"), str(tmp_path / "out"), frames=6)
+
+    assert [Path(f).read_bytes().split(b":")[0] for f in frame_files] == [str(i).encode() for i in range(6)]
+    # the broken worker sat out the rest of the render
+    assert len(broken.splat.calls) == 1
+    assert [r for r, _, _ in healthy.splat.calls] == [(3, 6), (0, 3)]
+
+
+def test_priority_and_client_reach_the_worker(tmp_path, workers):
+    (worker,) = workers(1)
+    RenderCoordinator([worker.url], token=TOKEN).render_orbit(
+        make_scene(tmp_path, "scene.ply"), str(tmp_path / "out"), frames=2, priority=7, client="alice"
+    )
+    _, client, params = worker.splat.calls[0]
+    assert client == "127.0.0.1/alice"
+    assert params["priority"] == 7
+
+
+def test_overlapping_renders_on_one_worker(tmp_path, workers):
+    (worker,) = workers(1)
+    data = Path(make_scene(tmp_path, "scene.ply")).read_bytes()
+    name = hashlib.sha256(data).hexdigest() + ".ply"
+    (worker.scene_dir / name).write_bytes(data)
+    worker.splat.barrier = threading.Barrier(2)
+
+    results = {}
+
+    def render(frame_range):
+        request = {"scenes": [{"name": name}], "frames": 4, "frame_range": frame_range}
+        results[frame_range] = worker.render(request)
+
+    threads = [threading.Thread(target=render, args=(r,)) for r in ((0, 2), (2, 4))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=20)
+
+    assert [i for r in sorted(results) for i, _ in results[r]] == [0, 1, 2, 3]
+    assert list(worker.job_dir.iterdir()) == []
+
+
+def test_requests_need_the_token(workers):
+    (worker,) = workers(1)
+    assert request(f"{worker.url}/status", headers={TOKEN_HEADER: TOKEN}) == 200
+    for headers in ({}, {TOKEN_HEADER: "wrong"}):
+        with pytest.raises(urllib.error.HTTPError) as e:
+            request(f"{worker.url}/status", headers=headers)
+        assert e.value.code == 401
+
+    with pytest.raises(urllib.error.HTTPError) as e:
+        RenderCoordinator([worker.url], token="wrong")._request("HEAD", f"{worker.url}/scenes/{'0' * 64}.ply")
+    assert e.value.code == 401
+
+
+def test_public_interfaces_need_a_token(tmp_path):
+    worker = RenderWorker(str(tmp_path), splat=FakeSplat(), token="")
+    with pytest.raises(ValueError, match="token"):
+        worker.serve("0.0.0.0", 0)
+
+
+def test_oversized_uploads_are_rejected(tmp_path, workers):
+    (worker,) = workers(1, max_scene_bytes=1000)
+    data = b"x" * 2000
+    name = hashlib.sha256(data).hexdigest() + ".ply"
+    with pytest.raises(urllib.error.HTTPError) as e:
+        request(f"{worker.url}/scenes/{name}", "PUT", data, {TOKEN_HEADER: TOKEN})
+    assert e.value.code == 413
+    assert worker.status()["scenes"] == 0
+
+    with pytest.raises(urllib.error.HTTPError) as e:
+        request(f"{worker.url}/scenes/{'0' * 64}.ply", "PUT", b"not it", {TOKEN_HEADER: TOKEN})
+    assert e.value.code == 400
+    assert list(worker.scene_dir.iterdir()) == []
+
+
+def test_scene_cache_evicts_least_recently_used(workers):
+    (worker,) = workers(1, cache_bytes=250)
+    names = []
+    for i in range(3):
+        data = bytes([i]) * 100
+        names.append(hashlib.sha256(data).hexdigest() + ".ply")
+        if i == 2:
+            # a scene held by a running render is kept even when it is the oldest
+            worker._in_use[names[0]] = 1
+        assert request(f"{worker.url}/scenes/{names[i]}", "PUT", data, {TOKEN_HEADER: TOKEN}) == 201
+
+    assert sorted(p.name for p in worker.scene_dir.iterdir()) == sorted([names[0], names[2]])
+
+
+def test_local_workers_share_a_token_and_die_alone():
+    with LocalWorkers(2) as local:
+        scene_url = [f"{url}/scenes/{'0' * 64}.ply" for url in local.urls]
+        local.processes[0].kill()
+        local.processes[0].wait()
+
+        coordinator = RenderCoordinator(local.urls, token=local.token)
+        with pytest.raises(urllib.error.URLError) as e:
+            coordinator._request("HEAD", scene_url[0], timeout=5)
+        assert not isinstance(e.value, urllib.error.HTTPError)
+        with pytest.raises(urllib.error.HTTPError) as e:
+            coordinator._request("HEAD", scene_url[1], timeout=5)
+        # the survivor checked the token and answered that it doesn't have the scene
+        assert e.value.code == 404
+        with pytest.raises(urllib.error.HTTPError) as e:
+            request(scene_url[1], "HEAD")
+        assert e.value.code == 401
+
+
+@pytest.mark.skipif(
+    shutil.which("node") is None
+    or not (ROOT / "dist" / "index.mjs").exists()
+    or not (ROOT / "tools" / "orbit-render" / "node_modules").exists(),
+    reason="splat-transform and orbit-render are not installed"
+)
+def test_local_workers_survive_a_killed_worker(tmp_path):
+    scene = make_scene(tmp_path, "scene.ply", count=2000)
+    with LocalWorkers(2) as local:
+        local.processes[0].kill()
+        local.processes[0].wait()
+        coordinator = RenderCoordinator(local.urls, token=local.token, retries=1)
+        frame_files = coordinator.render_orbit(scene, str(tmp_path / "out"), frames=4, width=64, height=64)
+
+    assert [Path(f).name for f in frame_files] == [f"frame_{i:03d}.png" for i in range(4)]
+    assert all(Path(f).read_bytes().startswith(b"\x89PNG") for f in frame_files)
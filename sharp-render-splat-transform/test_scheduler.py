@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Tests for the resource-aware job scheduler"""
+
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sharp_render_scheduler import JobCost, JobScheduler, SharedBudget, estimate_html_cost
+
+SMALL = JobCost(memory_mb=100, cpus=1, seconds=1)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class Jobs:
+    """Runs jobs on threads against one scheduler and records the order they start in"""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.started = []
+        self.threads = []
+
+    def submit(self, name, priority=0, client="", cost=SMALL, hold=None):
+        def run():
+            with self.scheduler.reserve(cost, priority=priority, client=client, name=name):
+                self.started.append(name)
+                if hold is not None:
+                    hold.wait()
+
+        queued = self.scheduler.metrics()["queue_depth"]
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        # wait until the job is either running or queued, so submission order is fixed
+        wait_until(lambda: name in self.started or self.scheduler.metrics()["queue_depth"] > queued)
+
+    def join(self):
+        for thread in self.threads:
+            thread.join(timeout=10)
+        assert not any(thread.is_alive() for thread in self.threads)
+
+
+def serial_scheduler(**kwargs):
+    return JobScheduler(memory_budget_mb=1000, cpu_budget=4, max_jobs=1, shared_dir="", **kwargs)
+
+
+def test_priority_then_arrival_order():
+    jobs = Jobs(serial_scheduler())
+    blocker = threading.Event()
+    jobs.submit("blocker", hold=blocker)
+    jobs.submit("low 1")
+    jobs.submit("high", priority=5)
+    jobs.submit("low 2")
+    blocker.set()
+    jobs.join()
+
+    assert jobs.started == ["blocker", "high", "low 1", "low 2"]
+
+
+def test_clients_take_turns():
+    jobs = Jobs(serial_scheduler())
+    blocker = threading.Event()
+    jobs.submit("blocker", client="a", hold=blocker)
+    for i in range(3):
+        jobs.submit(f"a{i}", client="a")
+    jobs.submit("b0", client="b")
+    jobs.submit("b1", client="b")
+    blocker.set()
+    jobs.join()
+
+    # a already had a job running, so b goes first
+    assert jobs.started == ["blocker", "b0", "a0", "b1", "a1", "a2"]
+
+
+def test_waiting_raises_priority():
+    jobs = Jobs(serial_scheduler(aging_seconds=0.1))
+    blocker = threading.Event()
+    jobs.submit("blocker", hold=blocker)
+    jobs.submit("old")
+    time.sleep(0.35)
+    # 3 aging steps outrank priority 2
+    jobs.submit("new", priority=2)
+    blocker.set()
+    jobs.join()
+
+    assert jobs.started == ["blocker", "old", "new"]
+
+
+def test_budgets_and_oversized_jobs():
+    scheduler = JobScheduler(memory_budget_mb=250, cpu_budget=4, shared_dir="")
+    jobs = Jobs(scheduler)
+    blocker = threading.Event()
+    jobs.submit("a", hold=blocker)
+    jobs.submit("b", hold=blocker)
+    # a third 100 MB job exceeds the 250 MB budget
+    jobs.submit("c", hold=blocker)
+    assert jobs.started == ["a", "b"]
+    assert scheduler.metrics()["memory_in_use_mb"] == 200
+    blocker.set()
+    jobs.join()
+
+    # a job larger than the whole budget still runs alone
+    Jobs(scheduler).submit("huge", cost=JobCost(memory_mb=10_000, cpus=64, seconds=1))
+    assert scheduler.metrics()["completed"] == 4
+
+
+def test_failed_jobs_release_their_reservation():
+    scheduler = serial_scheduler()
+    with pytest.raises(RuntimeError):
+        with scheduler.reserve(SMALL):
+            raise RuntimeError("tool crashed")
+    metrics = scheduler.metrics()
+    assert metrics["failed"] == 1
+    assert metrics["running"] == 0 and metrics["memory_in_use_mb"] == 0
+
+
+def test_interrupted_waiter_leaves_the_queue():
+    scheduler = serial_scheduler()
+    jobs = Jobs(scheduler)
+    blocker = threading.Event()
+    jobs.submit("blocker", hold=blocker)
+
+    # a queued job interrupted while waiting, as by Ctrl+C or a cancelled prompt
+    wait = scheduler._condition.wait
+
+    def interruptible_wait(timeout=None):
+        if threading.current_thread().name == "cancelled":
+            raise KeyboardInterrupt
+        return wait(timeout)
+
+    scheduler._condition.wait = interruptible_wait
+    interrupted = []
+
+    def cancelled():
+        try:
+            with scheduler.reserve(SMALL, priority=5, name="cancelled"):
+                pass
+        except KeyboardInterrupt:
+            interrupted.append(True)
+
+    thread = threading.Thread(target=cancelled, name="cancelled")
+    thread.start()
+    thread.join(timeout=5)
+    assert interrupted == [True]
+    assert scheduler.metrics()["queue_depth"] == 0
+
+    jobs.submit("next")
+    blocker.set()
+    jobs.join()
+    assert jobs.started == ["blocker", "next"]
+    assert scheduler.metrics()["running"] == 0
+
+
+def test_budget_is_shared_across_schedulers(tmp_path):
+    # two schedulers on one directory stand in for two processes
+    first = JobScheduler(memory_budget_mb=150, cpu_budget=4, shared_dir=str(tmp_path))
+    second = JobScheduler(memory_budget_mb=150, cpu_budget=4, shared_dir=str(tmp_path))
+    second.shared_poll_seconds = 0.05
+
+    first_jobs, second_jobs = Jobs(first), Jobs(second)
+    blocker = threading.Event()
+    first_jobs.submit("first", hold=blocker)
+    second_jobs.submit("second")
+    assert second_jobs.started == []
+    assert second.metrics()["shared"] == {"jobs": 1, "memory_mb": 100, "cpus": 1}
+
+    blocker.set()
+    first_jobs.join()
+    second_jobs.join()
+    assert second_jobs.started == ["second"]
+    assert first.metrics()["shared"]["jobs"] == 0
+
+
+def test_reservations_of_dead_processes_are_dropped(tmp_path):
+    script = (
+        "import os, sys\n"
+        f"sys.path.insert(0, {str(Path(__file__).parent)!r})\n"
+        "from sharp_render_scheduler import JobCost, JobScheduler\n"
+        f"scheduler = JobScheduler(memory_budget_mb=150, shared_dir={str(tmp_path)!r})\n"
+        "with scheduler.reserve(JobCost(100, 1, 1)):\n"
+        "    os._exit(0)\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=30)
+    assert len(list(tmp_path.glob("*.job"))) == 1
+
+    assert SharedBudget(str(tmp_path)).usage()["jobs"] == 0
+    assert list(tmp_path.glob("*.job")) == []
+
+
+def test_encode_cost_is_fractional():
+    # one worker per core must not claim every core, or no two jobs could ever overlap
+    cost = estimate_html_cost(1_000_000, 16)
+    assert cost.cpus == 1 + 15 * 0.25
+    assert estimate_html_cost(1_000_000, 1).cpus == 1
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Tests for the in-memory SplatData container"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sharp_render_splat_data import SplatData
+
+
+def make_splats(count=5):
+    rng = np.random.default_rng(0)
+    columns = {name: rng.standard_normal(count).astype(np.float32) for name in ["x", "y", "z", "opacity"]}
+    columns["index"] = np.arange(count, dtype=np.uint32)
+    extra = [("extrinsic", np.array([(1.0,), (2.0,)], dtype=[("value", "<f4")]))]
+    return SplatData(columns, extra, ["generated by test"])
+
+
+def test_ply_round_trip():
+    splat = make_splats()
+    loaded = SplatData.from_ply_bytes(splat.to_ply_bytes())
+
+    assert loaded.column_names == splat.column_names
+    for name in splat.column_names:
+        assert loaded[name].dtype == splat[name].dtype
+        np.testing.assert_array_equal(loaded[name], splat[name])
+    assert loaded.comments == ["generated by test"]
+    assert [name for name, _ in loaded.extra_elements] == ["extrinsic"]
+    np.testing.assert_array_equal(loaded.extra_elements[0][1]["value"], [1.0, 2.0])
+
+
+def test_file_round_trip(tmp_path):
+    splat = make_splats()
+    path = splat.save_ply(str(tmp_path / "nested" / "splat.ply"))
+    np.testing.assert_array_equal(SplatData.from_ply(path)["x"], splat["x"])
+
+
+def test_big_endian_input():
+    header = b"ply\nformat binary_big_endian 1.0\nelement vertex 2\nproperty float x\nproperty short y\nend_header\n"
+    rows = np.array([(1.5, -2), (3.0, 7)], dtype=[("x", ">f4"), ("y", ">i2")])
+    splat = SplatData.from_ply_bytes(header + rows.tobytes())
+
+    np.testing.assert_array_equal(splat["x"], [1.5, 3.0])
+    np.testing.assert_array_equal(splat["y"], [-2, 7])
+    # re-serialized as little endian
+    assert b"binary_little_endian" in splat.to_ply_bytes()
+
+
+def test_crlf_header_with_obj_info():
+    header = (
+        b"ply\r\nformat binary_little_endian 1.0\r\ncomment made elsewhere\r\nobj_info scanner 2\r\n"
+        b"element vertex 2\r\nproperty float x\r\nend_header\r\n"
+    )
+    rows = np.array([1.5, -3.0], dtype="<f4")
+    splat = SplatData.from_ply_bytes(header + rows.tobytes())
+
+    np.testing.assert_array_equal(splat["x"], [1.5, -3.0])
+    assert splat.comments == ["made elsewhere"]
+
+
+def test_select_and_copy():
+    splat = make_splats()
+    selected = splat.select(splat["index"] % 2 == 0)
+    np.testing.assert_array_equal(selected["index"], [0, 2, 4])
+
+    copy = splat.copy()
+    copy["x"][0] = 100
+    assert splat["x"][0] != 100
+
+
+def test_invalid_data():
+    with pytest.raises(ValueError):
+        SplatData({"x": np.zeros(2), "y": np.zeros(3)})
+    with pytest.raises(ValueError, match="ascii"):
+        SplatData.from_ply_bytes(b"ply\nformat ascii 1.0\nelement vertex 0\nend_header\n")
+    with pytest.raises(ValueError, match="truncated"):
+        SplatData.from_ply_bytes(make_splats().to_ply_bytes()[:-4])
@@ -0,0 +1,427 @@
+// Temporally coherent depth sorting for the viewer's splat sort worker.
+//
+// The viewer sorts every splat from scratch whenever the camera moves. Between two
+// frames of an orbit the camera turns by a fraction of a degree, so last frame's
+// order is almost sorted already. sortWorkerPrelude() is injected ahead of the
+// viewer's sort worker source. It first lets the viewer's own sort answer, to learn
+// which direction it orders splats in and how it counts visible ones, then takes
+// over: the previous order is refined with an insertion pass, falling back to a
+// radix sort when too many splats changed place. When the worker does something it
+// doesn't recognise it hands everything back to the viewer's sort.
+//
+// Every sort result carries its duration, which the page collects in
+// window.__splatSortStats so the renderer can report sort time per frame. The worker
+// also reports how many camera updates it has answered, so the renderer can wait for
+// the order of the camera it just set instead of a fixed delay.
+
+// runs inside the sort worker, so it must not reference anything outside itself
+function sortWorkerPrelude(coherent) {
+  const nativeAddEventListener = self.addEventListener.bind(self);
+  const nativePostMessage = self.postMessage.bind(self);
+  const handlers = [];
+
+  // capture the viewer worker's message handlers so messages can be routed
+  self.addEventListener = (type, listener, options) => {
+    if (type === 'message') {
+      handlers.push(listener);
+    } else {
+      nativeAddEventListener(type, listener, options);
+    }
+  };
+  Object.defineProperty(self, 'onmessage', {
+    configurable: true,
+    get: () => null,
+    set: (listener) => handlers.push(listener)
+  });
+
+  // camera updates received, and how many of them have been answered with an order or
+  // needed no new one. the page waits on the answered count before capturing a frame.
+  let requests = 0;
+  let answered = 0;
+  let holdsOrder = false;       // the order buffer is in the worker, not with the main thread
+
+  const answer = () => {
+    answered = requests;
+    nativePostMessage({ splatSortDone: answered });
+  };
+
+  const forward = (data) => {
+    for (const handler of handlers) {
+      handler.call(self, { data });
+    }
+  };
+
+  // refine with insertion while fewer than this fraction of neighbours are out of order
+  const maxDisorder = 0.01;
+  // give up on insertion once it has shifted this many entries per splat
+  const maxShiftsPerSplat = 4;
+
+  // 'calibrate': the viewer sorts, its results are checked against ours
+  // 'active': we sort
+  // 'native': the viewer sorts, we only time it
+  let state = coherent ? 'calibrate' : 'native';
+  let descending = true;        // far splats first
+  let cullBehind = false;       // count excludes splats behind the camera
+
+  let centers = null;
+  let camera = null;
+  let lastCamera = null;
+  let orderBuffer = null;       // order buffer returned by the main thread, free for our next result
+  let requestTime = 0;
+
+  // depths are quantized like the viewer's own sort, so splats that barely move share a
+  // key and keep their relative place
+  let keyBits = 16;
+
+  // working state, sized to the splat count. splat centers are kept in last frame's order,
+  // so each frame starts from an almost sorted sequence and every pass below walks memory
+  // nearly sequentially.
+  let numSplats = 0;
+  let order;                    // splat index at each position, carried over to the next frame
+  let sortedCenters;            // centers in order
+  let keys;                     // quantized key at each position
+  let scratchOrder;
+  let scratchCenters;
+  let counts;
+  let inFront = 0;              // splats at or in front of the camera
+
+  const reset = (n) => {
+    numSplats = n;
+    keyBits = Math.max(10, Math.min(20, Math.ceil(Math.log2(n))));
+    order = new Uint32Array(n);
+    sortedCenters = new Float32Array(centers.subarray(0, n * 3));
+    keys = new Uint32Array(n);
+    scratchOrder = new Uint32Array(n);
+    scratchCenters = new Float32Array(n * 3);
+    counts = new Uint32Array(1 << keyBits);
+    for (let i = 0; i < n; ++i) {
+      order[i] = i;
+    }
+  };
+
+  // signed distance of each splat along the view direction
+  const calcDepths = (source, target) => {
+    const { x: px, y: py, z: pz } = camera.position;
+    const { x: dx, y: dy, z: dz } = camera.direction;
+    for (let i = 0; i < target.length; ++i) {
+      target[i] = (source[i * 3] - px) * dx + (source[i * 3 + 1] - py) * dy + (source[i * 3 + 2] - pz) * dz;
+    }
+  };
+
+  // quantize depths in current order, returning the number of out of order neighbours
+  const calcKeys = () => {
+    const depths = new Float32Array(keys.buffer);
+    calcDepths(sortedCenters, depths);
+
+    let min = Infinity;
+    let max = -Infinity;
+    inFront = 0;
+    for (let i = 0; i < numSplats; ++i) {
+      const d = depths[i];
+      if (d < min) min = d;
+      if (d > max) max = d;
+      if (d >= 0) inFront++;
+    }
+
+    // ascending keys, so far splats get small keys when sorting back to front
+    const maxKey = (1 << keyBits) - 1;
+    const scale = max > min ? maxKey / (max - min) : 0;
+    let descents = 0;
+    let prev = 0;
+    for (let i = 0; i < numSplats; ++i) {
+      const t = Math.floor((depths[i] - min) * scale);
+      const key = descending ? maxKey - t : t;
+      keys[i] = key;
+      if (key < prev) descents++;
+      prev = key;
+    }
+    return descents;
+  };
+
+  // single pass counting sort over the full key range. the input is last frame's order, so
+  // both the histogram and the scatter hit memory almost sequentially.
+  const radixSort = () => {
+    const n = numSplats;
+    counts.fill(0);
+    for (let i = 0; i < n; ++i) {
+      counts[keys[i]]++;
+    }
+    let sum = 0;
+    for (let b = 0; b < counts.length; ++b) {
+      const c = counts[b];
+      counts[b] = sum;
+      sum += c;
+    }
+    for (let i = 0; i < n; ++i) {
+      const dst = counts[keys[i]]++;
+      scratchOrder[dst] = order[i];
+      scratchCenters[dst * 3] = sortedCenters[i * 3];
+      scratchCenters[dst * 3 + 1] = sortedCenters[i * 3 + 1];
+      scratchCenters[dst * 3 + 2] = sortedCenters[i * 3 + 2];
+    }
+    [order, scratchOrder] = [scratchOrder, order];
+    [sortedCenters, scratchCenters] = [scratchCenters, sortedCenters];
+  };
+
+  // insertion sort of the nearly sorted sequence. returns false, leaving the sequence a
+  // valid permutation, when it needs more work than a full sort would.
+  const refine = () => {
+    let budget = numSplats * maxShiftsPerSplat;
+    for (let i = 1; i < numSplats; ++i) {
+      const key = keys[i];
+      if (key >= keys[i - 1]) {
+        continue;
+      }
+      const index = order[i];
+      const x = sortedCenters[i * 3];
+      const y = sortedCenters[i * 3 + 1];
+      const z = sortedCenters[i * 3 + 2];
+      let j = i - 1;
+      while (j >= 0 && keys[j] > key && budget > 0) {
+        keys[j + 1] = keys[j];
+        order[j + 1] = order[j];
+        sortedCenters.copyWithin((j + 1) * 3, j * 3, j * 3 + 3);
+        j--;
+        budget--;
+      }
+      keys[j + 1] = key;
+      order[j + 1] = index;
+      sortedCenters[(j + 1) * 3] = x;
+      sortedCenters[(j + 1) * 3 + 1] = y;
+      sortedCenters[(j + 1) * 3 + 2] = z;
+      if (budget <= 0) {
+        return false;
+      }
+    }
+    return true;
+  };
+
+  const sameCamera = (a, b) => {
+    const eps = 0.001;
+    return ['position', 'direction'].every(k => ['x', 'y', 'z'].every(c => Math.abs(a[k][c] - b[k][c]) < eps));
+  };
+
+  const sort = () => {
+    if (!orderBuffer || !centers || !camera || (lastCamera && sameCamera(camera, lastCamera))) {
+      return;
+    }
+
+    const start = performance.now();
+    if (numSplats !== centers.length / 3) {
+      reset(centers.length / 3);
+    }
+
+    const descents = calcKeys();
+    let mode = 'incremental';
+    if (descents > numSplats * maxDisorder || !refine()) {
+      mode = 'radix';
+      radixSort();
+    }
+
+    const result = new Uint32Array(orderBuffer);
+    result.set(order.subarray(0, Math.min(numSplats, result.length)));
+
+    lastCamera = {
+      position: { ...camera.position },
+      direction: { ...camera.direction }
+    };
+
+    nativePostMessage({
+      order: orderBuffer,
+      // splats behind the camera sort last when ordering back to front
+      count: cullBehind ? inFront : numSplats,
+      sortTime: performance.now() - start,
+      sortMode: mode
+    }, [orderBuffer]);
+    orderBuffer = null;
+    holdsOrder = false;
+    answer();
+  };
+
+  // check the viewer's first result against our conventions before taking over
+  const calibrate = (result, count) => {
+    const n = centers.length / 3;
+    if (count < 2) {
+      // nothing to learn from yet
+      return;
+    }
+    if (count > n || result.length < count) {
+      state = 'native';
+      return;
+    }
+
+    const depths = new Float32Array(n);
+    calcDepths(centers, depths);
+
+    let min = Infinity;
+    let max = -Infinity;
+    for (let i = 0; i < count; ++i) {
+      if (result[i] >= n) {
+        state = 'native';
+        return;
+      }
+      const d = depths[result[i]];
+      min = Math.min(min, d);
+      max = Math.max(max, d);
+    }
+
+    // the viewer quantizes depths, so allow small local disorder
+    const isDescending = depths[result[0]] >= depths[result[count - 1]];
+    const tolerance = (max - min) / 1024;
+    let violations = 0;
+    for (let i = 1; i < count; ++i) {
+      const step = depths[result[i]] - depths[result[i - 1]];
+      if (isDescending ? step > tolerance : step < -tolerance) {
+        violations++;
+      }
+    }
+    if (violations > count * 0.01) {
+      state = 'native';
+      return;
+    }
+
+    let inFront = 0;
+    for (let i = 0; i < n; ++i) {
+      if (depths[i] >= 0) inFront++;
+    }
+
+    if (count === n) {
+      cullBehind = false;
+    } else if (isDescending && Math.abs(count - inFront) <= Math.max(16, n * 0.01)) {
+      cullBehind = true;
+    } else {
+      state = 'native';
+      return;
+    }
+
+    descending = isDescending;
+    state = 'active';
+
+    // this camera is already sorted
+    lastCamera = {
+      position: { ...camera.position },
+      direction: { ...camera.direction }
+    };
+  };
+
+  self.postMessage = (data, transfer) => {
+    if (data && data.order && state !== 'active') {
+      data.sortTime = performance.now() - requestTime;
+      data.sortMode = 'native';
+      if (state === 'calibrate' && centers && camera) {
+        calibrate(new Uint32Array(data.order), data.count);
+      }
+    }
+    nativePostMessage(data, transfer);
+    if (data && data.order) {
+      holdsOrder = false;
+      answer();
+    }
+  };
+
+  nativeAddEventListener('message', (event) => {
+    const data = event.data ?? {};
+
+    if (data.order) {
+      holdsOrder = true;
+    }
+    if (data.cameraPosition) {
+      requests++;
+    }
+
+    // a mapping means the order indexes a subset of the centers, leave that to the viewer
+    if (data.mapping && state !== 'native') {
+      if (state === 'active' && orderBuffer) {
+        forward({ order: orderBuffer });
+        orderBuffer = null;
+      }
+      state = 'native';
+    }
+
+    if (state !== 'native') {
+      if (data.centers) {
+        centers = new Float32Array(data.centers);
+        lastCamera = null;
+        numSplats = 0;
+      }
+      if (data.cameraPosition && data.cameraDirection) {
+        camera = { position: data.cameraPosition, direction: data.cameraDirection };
+      }
+    }
+
+    if (state !== 'active') {
+      requestTime = performance.now();
+      forward(data);
+    } else {
+      // keep the viewer's sort in step, minus the order buffer we now own
+      if (data.order) {
+        orderBuffer = data.order;
+      }
+      forward({ ...data, order: undefined });
+      sort();
+    }
+
+    // the order was here and no sort was posted, so the camera didn't move enough to
+    // need one. without the order, the next result answers this camera.
+    if (holdsOrder && answered < requests) {
+      answer();
+    }
+  });
+}
+
+// runs in the page before the viewer loads. prepends the prelude to the viewer's sort
+// worker source and collects the sort timings and answered camera updates it reports.
+function installCoherentSort(preludeSource) {
+  window.__splatSortStats = [];
+  window.__splatSortAttached = false;
+  window.__splatSortRequested = 0;
+  window.__splatSortDone = 0;
+
+  // the sort worker is recognised by the message fields the prelude itself relies on.
+  // playcanvas builds it from a single source string, and minification keeps property
+  // names, so a worker without all of them can't be driven by the prelude anyway.
+  const protocol = ['cameraPosition', 'cameraDirection', 'centers', 'order'];
+  const isSortWorkerSource = parts => parts.length > 0 && parts.every(part => typeof part === 'string') &&
+    protocol.every(field => parts.some(part => part.includes(field)));
+
+  // proxies rather than subclasses, so instanceof checks against native objects still pass
+  window.Blob = new Proxy(window.Blob, {
+    construct(target, [parts = [], options]) {
+      if (!window.__splatSortAttached && isSortWorkerSource(parts)) {
+        window.__splatSortAttached = true;
+        parts = [preludeSource, ...parts];
+      }
+      return Reflect.construct(target, [parts, options]);
+    }
+  });
+
+  window.Worker = new Proxy(window.Worker, {
+    construct(target, args) {
+      const worker = Reflect.construct(target, args);
+      // registered before the viewer's own listener, so the prelude's control messages
+      // can be kept from it
+      worker.addEventListener('message', (event) => {
+        const data = event.data;
+        if (data && data.splatSortDone !== undefined) {
+          window.__splatSortDone = data.splatSortDone;
+          event.stopImmediatePropagation();
+        } else if (data && data.sortTime !== undefined) {
+          window.__splatSortStats.push({ time: data.sortTime, mode: data.sortMode, count: data.count });
+        }
+      });
+      const postMessage = worker.postMessage.bind(worker);
+      worker.postMessage = (message, transfer) => {
+        if (message && message.cameraPosition) {
+          window.__splatSortRequested++;
+        }
+        return postMessage(message, transfer);
+      };
+      return worker;
+    }
+  });
+}
+
+// source injected ahead of the sort worker
+const sortWorkerSource = coherent => `(${sortWorkerPrelude.toString()})(${JSON.stringify(coherent)});\n`;
+
+export { installCoherentSort, sortWorkerSource };
@@ -10,6 +10,8 @@ import { promisify } from 'node:util';
 
 import puppeteer from 'puppeteer';
 
+import { installCoherentSort, sortWorkerSource } from './coherent-sort.mjs';
+
 const execAsync = promisify(exec);
 const __dirname = dirname(fileURLToPath(import.meta.url));
 
@@ -18,7 +20,11 @@ Splat Orbit Render - Render orbit sequences from PLY files
 ==========================================================
 
 USAGE
-  node index.mjs <input.ply> [OPTIONS]
+  node index.mjs <input.ply> [SCENE OPTIONS] [<input2.ply> [SCENE OPTIONS] ...] [OPTIONS]
+
+  Several input files are composited in memory into a single scene with a
+  shared depth sort. Scene options apply to the input file preceding them.
+  An input of '-' reads binary PLY data from stdin.
 
 OPTIONS
   -o, --output <dir>           Output directory for frames (default: ./frames)
@@ -30,10 +36,23 @@ OPTIONS
   --target <x,y,z>             Camera target point (default: 0,0,0)
   --start-angle <n>            Start angle in degrees (default: 0)
   --swing-angle <n>            Swing angle range in degrees (default: 30, e.g., -15 to 15)
+  --frame-range <start,end>    Render only frames start to end - 1 of the orbit, keeping their
+                               global frame numbers (default: all frames)
+  --disable-cull               Encode all splats instead of only those visible along the orbit
+  --cull-min-size <n>          Cull splats smaller than n pixels in every frame (default: 0.5)
+  --disable-sh-bake            Keep every spherical harmonic band instead of refitting the
+                               view dependent color to the fewest bands the orbit needs
+  --disable-coherent-sort      Sort splats from scratch every frame instead of refining the
+                               previous frame's order
   --cleanup                    Clean up temporary files after rendering
   -q, --quiet                  Suppress non-error output
   --help                       Show this help and exit
 
+SCENE OPTIONS
+  --translate <x,y,z>          Translate the preceding scene by (x, y, z)
+  --rotate <x,y,z>             Rotate the preceding scene by Euler angles, in degrees
+  --scale <n>                  Uniformly scale the preceding scene by n
+
 EXAMPLES
   # Render 36 frames (360 degrees) with default settings
   node index.mjs input.ply
@@ -46,10 +65,20 @@ EXAMPLES
 
   # Render with custom target point
   node index.mjs input.ply --target 0,1,0
+
+  # Composite two scenes, moving the second one 1 unit to the right
+  node index.mjs a.ply b.ply --translate 1,0,0
+
+  # Render PLY data piped from another process
+  cat input.ply | node index.mjs -
+
+  # Render the second half of a 72 frame orbit, e.g. on another machine
+  node index.mjs input.ply -f 72 --frame-range 36,72
 `;
 
 const parseOptions = () => {
-  const { values, positionals } = parseArgs({
+  const { values, positionals, tokens } = parseArgs({
+    tokens: true,
     allowPositionals: true,
     options: {
       output: { type: 'string', short: 'o', default: './frames' },
@@ -61,6 +90,14 @@ const parseOptions = () => {
       target: { type: 'string', short: 't', default: '0,0,0' },
       'start-angle': { type: 'string', default: '0' },
       'swing-angle': { type: 'string', default: '30' },
+      'frame-range': { type: 'string' },
+      translate: { type: 'string', multiple: true },
+      rotate: { type: 'string', multiple: true },
+      scale: { type: 'string', multiple: true },
+      'disable-cull': { type: 'boolean', default: false },
+      'cull-min-size': { type: 'string', default: '0.5' },
+      'disable-sh-bake': { type: 'boolean', default: false },
+      'disable-coherent-sort': { type: 'boolean', default: false },
       cleanup: { type: 'boolean', default: false },
       quiet: { type: 'boolean', short: 'q', default: false },
       help: { type: 'boolean', default: false }
@@ -90,10 +127,39 @@ const parseOptions = () => {
     return parts;
   };
 
+  // each positional starts a new scene, scene options modify the latest one
+  const scenes = [];
+  for (const token of tokens) {
+    if (token.kind === 'positional') {
+      scenes.push({ inputFile: token.value === '-' ? '-' : resolve(token.value), actions: [] });
+    } else if (token.kind === 'option' && ['translate', 'rotate', 'scale'].includes(token.name)) {
+      if (scenes.length === 0) {
+        console.error(`--${token.name} must follow an input file`);
+        process.exit(1);
+      }
+      const value = token.name === 'scale' ?
+        String(parseNumber(token.value, 'scale')) :
+        parseVec3(token.value).join(',');
+      scenes[scenes.length - 1].actions.push(`--${token.name}=${value}`);
+    }
+  }
+
+  const frames = parseInt(values.frames, 10);
+  let frameRange = [0, frames];
+  if (values['frame-range'] !== undefined) {
+    frameRange = values['frame-range'].split(',').map(v => parseInt(v.trim(), 10));
+    if (frameRange.length !== 2 || frameRange.some(isNaN) || frameRange[0] < 0 ||
+        frameRange[0] >= frameRange[1] || frameRange[1] > frames) {
+      console.error(`Invalid frame range: ${values['frame-range']}`);
+      process.exit(1);
+    }
+  }
+
   return {
-    inputFile: resolve(positionals[0]),
+    scenes,
     outputDir: resolve(values.output),
-    frames: parseInt(values.frames, 10),
+    frames,
+    frameRange,
     radius: parseNumber(values.radius, 'radius'),
     width: parseInt(values.width, 10),
     height: parseInt(values['img-height'], 10),
@@ -101,22 +167,74 @@ const parseOptions = () => {
     target: parseVec3(values.target),
     startAngle: parseNumber(values['start-angle'], 'start-angle'),
     swingAngle: parseNumber(values['swing-angle'], 'swing-angle'),
+    cull: !values['disable-cull'],
+    cullMinSize: parseNumber(values['cull-min-size'], 'cull-min-size'),
+    bakeHarmonics: !values['disable-sh-bake'],
+    coherentSort: !values['disable-coherent-sort'],
     cleanup: values.cleanup,
     quiet: values.quiet
   };
 };
 
+// camera pose for frame i of the swing orbit. a single frame looks straight ahead.
+const orbitCamera = (options, i) => {
+  const halfSwingAngle = options.swingAngle / 2;
+  const angleDeg = options.frames > 1 ?
+    -halfSwingAngle + (i / (options.frames - 1)) * options.swingAngle :
+    0;
+  const angleRad = (angleDeg * Math.PI) / 180;
+  const radius = options.radius;
+
+  return {
+    position: [radius * Math.sin(angleRad), 0, radius * Math.cos(angleRad) - radius],
+    rotation: [180, angleDeg, 180],
+    // view direction of euler angles (180, angle, 180)
+    forward: [-Math.sin(angleRad), 0, Math.cos(angleRad)]
+  };
+};
+
+// describe every camera of the rendered frame range for splat-transform's frustum
+// filter and harmonics bake. the viewer flips the splat entity 180 degrees about z, so
+// cameras are given in the scene's own space, with x and y negated. a partial frame
+// range covers only one side of the swing, so it would otherwise keep and bake the
+// mirrored side of the scene.
+const writeCullCameras = (camerasFile, options) => {
+  const toScene = ([x, y, z]) => [-x, -y, z];
+  const cameras = [];
+  const [start, end] = options.frameRange;
+  for (let i = start; i < end; i++) {
+    const { position, forward } = orbitCamera(options, i);
+    cameras.push({
+      position: toScene(position),
+      target: toScene(position.map((v, j) => v + forward[j])),
+      up: toScene([0, 1, 0])
+    });
+  }
+
+  writeFileSync(camerasFile, JSON.stringify({
+    width: options.width,
+    height: options.height,
+    fov: options.fov,
+    minPixelSize: options.cullMinSize,
+    cameras
+  }, null, 2), 'utf-8');
+};
+
 const log = (message, quiet) => {
   if (!quiet) {
     console.log(`[INFO] ${message}`);
   }
 };
 
+const logWarning = (message) => {
+  console.warn(`[WARN] ${message}`);
+};
+
 const logError = (message) => {
   console.error(`[ERROR] ${message}`);
 };
 
-const generateViewerHtml = async (plyFile, options) => {
+const generateViewerHtml = async (options) => {
   const tempDir = join(dirname(options.outputDir), '.temp_splat_render');
   
   if (!existsSync(tempDir)) {
@@ -171,10 +289,32 @@ const generateViewerHtml = async (plyFile, options) => {
   const settingsJson = JSON.stringify(settings, null, 2);
   
   writeFileSync(settingsFile, settingsJson, 'utf-8');
+
+  // drop splats no frame of the trajectory can see before they are encoded, then
+  // reduce the harmonics to the bands the trajectory's view directions need
+  let cullArgs = '';
+  if (options.cull || options.bakeHarmonics) {
+    const camerasFile = join(tempDir, 'cameras.json');
+    writeCullCameras(camerasFile, options);
+    if (options.cull) {
+      cullArgs += ` -F "${camerasFile}"`;
+    }
+    if (options.bakeHarmonics) {
+      cullArgs += ` -D "${camerasFile}"`;
+    }
+  }
   
+  // all scenes are passed to a single splat-transform invocation, which combines
+  // them in memory so the viewer sorts every splat together
+  const sceneArgs = options.scenes
+    .map(scene => [`"${scene.inputFile}"`, ...scene.actions])
+    .flat()
+    .join(' ');
+
   try {
-    execSync(`splat-transform -w "${plyFile}" "${htmlFile}" -E "${settingsFile}"`, {
-      stdio: options.quiet ? 'pipe' : 'inherit'
+    // stdin is always inherited so a '-' input reads the PLY data piped to us
+    execSync(`splat-transform -w ${sceneArgs} "${htmlFile}"${cullArgs} -E "${settingsFile}"`, {
+      stdio: ['inherit', ...(options.quiet ? ['pipe', 'pipe'] : ['inherit', 'inherit'])]
     });
   } catch (error) {
     logError(`Failed to generate HTML viewer: ${error.message}`);
@@ -235,7 +375,7 @@ const disableCameraUpdate = async (htmlPath) => {
 };
 
 const renderOrbitSequence = async (options) => {
-  const { htmlFile, tempDir } = await generateViewerHtml(options.inputFile, options);
+  const { htmlFile, tempDir } = await generateViewerHtml(options);
 
   log(`Launching browser...`, options.quiet);
 
@@ -254,6 +394,9 @@ const renderOrbitSequence = async (options) => {
   });
 
   const page = await browser.newPage();
+
+  // time every depth sort, and carry each frame's order into the next unless disabled
+  await page.evaluateOnNewDocument(installCoherentSort, sortWorkerSource(options.coherentSort));
   
   await page.setViewport({
     width: options.width,
@@ -270,26 +413,27 @@ const renderOrbitSequence = async (options) => {
   
   await new Promise(resolve => setTimeout(resolve, 5000));
 
-  log(`Starting render sequence (${options.frames} frames)...`, options.quiet);
+  // without the prelude there is no sort to wait on, frames are captured after the
+  // camera has been applied and the next frame drawn
+  const sortAttached = await page.evaluate(() => window.__splatSortAttached);
+  if (!sortAttached) {
+    logWarning(`The viewer's sort worker was not recognised: sort times are not reported and frames are not synchronised with the depth sort`);
+  }
 
-  const halfSwingAngle = options.swingAngle / 2;
-  const startAngle = -halfSwingAngle;
-  const endAngle = halfSwingAngle;
-  const radius = options.radius;
+  const [start, end] = options.frameRange;
+  log(`Starting render sequence (${end - start} frames)...`, options.quiet);
 
-  for (let i = 0; i < options.frames; i++) {
-    const angleDeg = startAngle + (i / (options.frames - 1)) * (endAngle - startAngle);
-    const angleRad = (angleDeg * Math.PI) / 180;
-    
-    const cameraX = radius * Math.sin(angleRad);
-    const cameraY = 0;
-    const cameraZ = radius * Math.cos(angleRad) - radius;
-    
-    const rotationX = 180;
-    const rotationY = angleDeg;
-    const rotationZ = 180;
+  const sortTimes = [];
+
+  for (let i = start; i < end; i++) {
+    const camera = orbitCamera(options, i);
+    const [cameraX, cameraY, cameraZ] = camera.position;
+    const [rotationX, rotationY, rotationZ] = camera.rotation;
     
-    await page.evaluate((x, y, z, rotX, rotY, rotZ) => {
+    // the viewer sends the new camera to its sort worker while drawing the next frame
+    const requested = await page.evaluate(async (x, y, z, rotX, rotY, rotZ) => {
+      window.__splatSortStats.length = 0;
+
       const cameraElement = document.querySelector('pc-entity[name="camera"]');
       if (cameraElement && cameraElement.entity) {
         const camera = cameraElement.entity;
@@ -298,8 +442,20 @@ const renderOrbitSequence = async (options) => {
       }
       
       window.disableCameraUpdate = true;
+
+      await new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+      return window.__splatSortRequested;
     }, cameraX, cameraY, cameraZ, rotationX, rotationY, rotationZ);
 
+    // capture the frame once the worker has answered that camera and the order is drawn
+    if (sortAttached) {
+      await page.waitForFunction(n => window.__splatSortDone >= n, { timeout: 60000 }, requested).catch((err) => {
+        throw new Error(`Frame ${i}: no depth sort arrived for the new camera: ${err.message}`);
+      });
+      await page.evaluate(() => new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(resolve))));
+    }
+    const sorts = await page.evaluate(() => window.__splatSortStats.splice(0));
+
     const frameNumber = String(i).padStart(3, '0');
     const outputPath = join(options.outputDir, `frame_${frameNumber}.png`);
 
@@ -309,9 +465,25 @@ const renderOrbitSequence = async (options) => {
       clip: null
     });
 
-    if (!options.quiet && (i + 1) % 10 === 0) {
-      log(`Rendered ${i + 1}/${options.frames} frames`, options.quiet);
+    if (sorts.length > 0) {
+      const time = sorts.reduce((total, sort) => total + sort.time, 0);
+      sortTimes.push({ time, mode: sorts[sorts.length - 1].mode });
+      log(`Frame ${frameNumber}: sorted in ${time.toFixed(1)} ms (${sorts.map(sort => sort.mode).join(', ')})`, options.quiet);
     }
+
+    if (!options.quiet && (i + 1 - start) % 10 === 0) {
+      log(`Rendered ${i + 1 - start}/${end - start} frames`, options.quiet);
+    }
+  }
+
+  if (sortTimes.length > 0) {
+    const times = sortTimes.map(sort => sort.time);
+    const modes = Object.entries(sortTimes.reduce((result, sort) => {
+      result[sort.mode] = (result[sort.mode] ?? 0) + 1;
+      return result;
+    }, {})).map(([mode, count]) => `${count} ${mode}`).join(', ');
+    const mean = times.reduce((total, time) => total + time, 0) / times.length;
+    log(`Sort time per frame: mean ${mean.toFixed(1)} ms, max ${Math.max(...times).toFixed(1)} ms (${modes})`, options.quiet);
   }
 
   log(`Rendering complete!`, options.quiet);
@@ -330,18 +502,30 @@ const main = async () => {
   const options = parseOptions();
 
   log(`Splat Orbit Render v1.0.0`, options.quiet);
-  log(`Input file: ${options.inputFile}`, options.quiet);
+  for (const scene of options.scenes) {
+    log(`Input file: ${scene.inputFile} ${scene.actions.join(' ')}`.trimEnd(), options.quiet);
+  }
   log(`Output directory: ${options.outputDir}`, options.quiet);
   log(`Frames: ${options.frames}`, options.quiet);
+  if (options.frameRange[1] - options.frameRange[0] !== options.frames) {
+    log(`Frame range: ${options.frameRange[0]} to ${options.frameRange[1] - 1}`, options.quiet);
+  }
   log(`Radius: ${options.radius}`, options.quiet);
   log(`Image size: ${options.width}x${options.height}`, options.quiet);
   log(``, options.quiet);
 
-  if (!existsSync(options.inputFile)) {
-    logError(`Input file not found: ${options.inputFile}`);
+  if (options.scenes.filter(scene => scene.inputFile === '-').length > 1) {
+    logError('Only one input can be read from stdin');
     process.exit(1);
   }
 
+  for (const scene of options.scenes) {
+    if (scene.inputFile !== '-' && !existsSync(scene.inputFile)) {
+      logError(`Input file not found: ${scene.inputFile}`);
+      process.exit(1);
+    }
+  }
+
   await mkdir(options.outputDir, { recursive: true });
 
   try {